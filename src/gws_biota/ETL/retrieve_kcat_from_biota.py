@@ -3,11 +3,12 @@
 # The use and distribution of this software is prohibited without the prior consent of Gencovery SAS.
 # About us: https://gencovery.com
 
-import numpy as np
 import pandas as pd
 from gws_core import (
+    BoolParam,
     ConfigParams,
     ConfigSpecs,
+    Logger,
     OutputSpec,
     OutputSpecs,
     StrParam,
@@ -18,63 +19,95 @@ from gws_core import (
     task_decorator,
 )
 
-from gws_biota import Enzyme
+from gws_biota import EnzymeKinetics, Taxonomy
 
 
 @task_decorator("RetrieveKcatFromBiota", style=TypingStyle.material_icon(
     material_icon_name="database", background_color="#2b6d57"),
     human_name="Retrieve Kcat from BIOTA",
-    short_description="Add kcat to ec number using BIOTA for a selected species")
+    short_description="Add kcat to ec number using BIOTA for selected species")
 class RetrieveKcatFromBiota(Task):
-    output_specs = OutputSpecs({'results': OutputSpec(Table, human_name="Ec number to kcat",
-                                                      short_description="Correspondence table between kcat and ec number")})
-
-    config_specs = ConfigSpecs(
-        {"organism_name": StrParam(default_value="Saccharomyces cerevisiae")})
+    """
+    Retrieves the turnover numbers (kcat) of the enzymes of one or several organisms.
+
+    The values are read from the `biota_enzyme_kinetics` table with one indexed query per organism. The ranges
+    of values (e.g. `14-20`) and the values without substrate (`{more}`) are ignored. The median, mean and
+    number of values are computed per organism and EC number, and per organism, EC number and substrate.
+    """
+
+    output_specs = OutputSpecs({
+        'results': OutputSpec(Table, human_name="Ec number to kcat",
+                              short_description="Correspondence table between kcat and ec number"),
+        'substrate_results': OutputSpec(Table, human_name="Ec number and substrate to kcat",
+                                        short_description="Correspondence table between kcat, ec number and substrate",
+                                        optional=True)})
+
+    config_specs = ConfigSpecs({
+        "organism_name": StrParam(
+            default_value="Saccharomyces cerevisiae", human_name="Organism names",
+            short_description="Names of the organisms, separated by commas"),
+        "tax_ids": StrParam(
+            optional=True, human_name="Taxonomy ids",
+            short_description="Taxonomy ids of the organisms, separated by commas (in addition to the names)"),
+        "include_descendants": BoolParam(
+            default_value=False, human_name="Include descendants",
+            short_description="If True, the kcat of all the organisms of each taxon are used (e.g. all the species of a genus)"),
+    })
+
+    GROUP_COLUMNS = ["Organism", "Ec number"]
 
     # --------------------- RUN ---------------------
     def run(self, params: ConfigParams, inputs: TaskInputs) -> Table:
-        enzymes = Enzyme.select()
-        enzymes_dict: dict = {}
-
-        for enzyme in enzymes:
-            if enzyme.organism == params["organism_name"]:
-                ec_number = enzyme.ec_number
-                n = len(enzyme.get_params('TN'))  # TN = turn over = kcat
-
-                for i in range(0, n):
-                    # Retrieve only value and substrate name of TN and not all data about it
-                    tn_param = enzyme.get_params('TN')[i].value
-                    if "{more}" in tn_param or len(tn_param) == 0:  # not a value
-                        continue
-
-                    if ec_number not in enzymes_dict:
-                        enzymes_dict[ec_number] = []
-
-                    # split value and substrate name
-                    tn_param_values = tn_param.split(" ")
-                    tn_value = tn_param_values[0]
-                    # does not take into account values with a dash, so cannot be used to make a median => e.g. on brenda: for saccharomyces cerevisiae EC 4.1.1.23, TN 14-20 for substrate orotidine 5'-phosphate
-                    if "-" in tn_value:
-                        continue
-
-                    tn_substrat = tn_param_values[1]
-                    enzymes_dict[ec_number].append(
-                        (float(tn_value), tn_substrat))
-
-        enzymes_dict_normalize = {}
-        for ec, tn_values in enzymes_dict.items():
-            list_tn = []
-
-            for tn in tn_values:
-                list_tn.append(tn[0])  # take tn_value and not tn_substrat
-
-            # Make the median of TN and ignore NaN
-            tn_median = np.nanmedian(list_tn)
-
-            enzymes_dict_normalize[ec] = tn_median
-
-        df = pd.DataFrame(list(enzymes_dict_normalize.items()),
-                          columns=['Ec number', 'median Kcat'])
-
-        return {"results": Table(df)}
+        taxa = self._get_taxa(params["organism_name"], params.get_value("tax_ids"))
+
+        fields = [EnzymeKinetics.ec_number, EnzymeKinetics.substrate, EnzymeKinetics.chebi_id,
+                  EnzymeKinetics.min_value]
+        frames = []
+        for organism, tax_id, rank in taxa:
+            if not params["include_descendants"] or rank not in Taxonomy.get_tax_tree():
+                rank = None
+            query = EnzymeKinetics.select_by_tax_id("TN", tax_id, rank=rank, fields=fields)  # TN = turn over = kcat
+            query = query.where((EnzymeKinetics.min_value == EnzymeKinetics.max_value) &
+                                EnzymeKinetics.substrate.is_null(False))
+            frame = pd.DataFrame(list(query.tuples()), columns=["Ec number", "Substrate", "ChEBI id", "Kcat"])
+            frame.insert(0, "Organism", organism)
+            frames.append(frame)
+
+        values = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=["Organism", "Ec number", "Substrate", "ChEBI id", "Kcat"])
+        values["Kcat"] = values["Kcat"].astype(float)
+
+        results = self._aggregate(values, self.GROUP_COLUMNS)
+        substrate_results = self._aggregate(values, [*self.GROUP_COLUMNS, "Substrate"], first_columns=["ChEBI id"])
+
+        return {"results": Table(results), "substrate_results": Table(substrate_results)}
+
+    @classmethod
+    def _aggregate(cls, values: pd.DataFrame, columns: list[str], first_columns: list[str] = None) -> pd.DataFrame:
+        """ Returns the median, mean and number of kcat of each group (and the first value of `first_columns`) """
+        aggregations = {column: (column, "first") for column in first_columns or []}
+        aggregations.update({"median Kcat": ("Kcat", "median"), "mean Kcat": ("Kcat", "mean"),
+                             "count": ("Kcat", "count")})
+        return values.groupby(columns, sort=True).agg(**aggregations).reset_index()
+
+    def _get_taxa(self, organism_names: str, tax_ids: str) -> list[tuple[str, str, str]]:
+        """ Returns the (organism, tax_id, rank) of the organism names and taxonomy ids """
+        names = [name.strip() for name in (organism_names or "").split(",") if name.strip()]
+        tax_ids = [tax_id.strip() for tax_id in (tax_ids or "").split(",") if tax_id.strip()]
+
+        # the names are compared case-insensitively (as BRENDA organisms and the database collation)
+        names_by_key = {name.lower(): name for name in names}
+        taxa = []
+        found_names = set()
+        query = Taxonomy.select(Taxonomy.name, Taxonomy.tax_id, Taxonomy.rank).where(
+            (Taxonomy.name << names) | (Taxonomy.tax_id << tax_ids)).tuples()
+        for name, tax_id, rank in query:
+            if tax_id in tax_ids:
+                taxa.append((tax_id, tax_id, rank))
+            if name and name.lower() in names_by_key:
+                taxa.append((names_by_key[name.lower()], tax_id, rank))
+                found_names.add(names_by_key[name.lower()])
+        for name in names:
+            if name not in found_names:
+                Logger.warning(f"No taxonomy found for the organism '{name}'")
+        return taxa
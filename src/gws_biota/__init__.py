@@ -13,6 +13,7 @@ from .eco.eco import ECO
 from .enzyme.deprecated_enzyme import DeprecatedEnzyme
 from .enzyme.enzyme import Enzyme
 from .enzyme.enzyme_class import EnzymeClass
+from .enzyme.enzyme_kinetics import EnzymeKinetics
 from .enzyme.enzyme_ortholog import EnzymeOrtholog
 from .enzyme.enzyme_pathway import EnzymePathway
 from .go.go import GO
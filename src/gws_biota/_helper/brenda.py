@@ -1,6 +1,16 @@
 
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from typing import Callable
+
+import msgpack
 from brendapy import BrendaParser, BrendaSettings
+from gws_core import Logger
+
+from .file_hash import compute_hash
 
 
 # =============================================================================
@@ -135,44 +145,218 @@ BrendaParser._store_item = _patched_store_item
 class Brenda:
     """
     This module allows to get list of dictionnaries where terms represents brenda proteins/enzymes
+
+    If a `cache_dir` is given, the post-processed parse result is cached in a msgpack file keyed by the hash
+    of the BRENDA, taxonomy, BTO and ChEBI files and the brendapy version: a rebuild then loads it in seconds
+    instead of parsing again.
     """
     parser = None  # reuse parser
 
-    def __init__(self, brenda_file, taxonomy_dir=None, bto_file=None, chebi_file=None):
+    # Increment when the post-processing of `parse_all_enzyme_to_dict` changes, to invalidate the caches
+    CACHE_FORMAT_VERSION = 1
+
+    # Number of EC chunks per worker: smaller chunks balance the load between the workers
+    CHUNKS_PER_WORKER = 8
+
+    # Maximum number of parsing processes: each worker holds its own parser, with the whole BRENDA file
+    # and the ChEBI, BTO and taxonomy data loaded, so the peak memory grows with the number of workers
+    MAX_WORKERS = 8
+
+    def __init__(self, brenda_file, taxonomy_dir=None, bto_file=None, chebi_file=None, cache_dir=None):
         BrendaSettings.initialize_data_dir(
             brenda_file=brenda_file, taxonomy_dir=taxonomy_dir, bto_file=bto_file, chebi_file=chebi_file)
-        self.parser = BrendaParser(brenda_file=brenda_file)
+        self.brenda_file = brenda_file
+        self.taxonomy_dir = taxonomy_dir
+        self.bto_file = bto_file
+        self.chebi_file = chebi_file
+        self.cache_dir = cache_dir
+
+    def get_parser(self) -> BrendaParser:
+        """ Returns the brendapy parser (created on first use, as it reads the whole BRENDA file) """
+        if self.parser is None:
+            self.parser = BrendaParser(brenda_file=self.brenda_file)
+        return self.parser
+
+    def get_cache_path(self) -> str:
+        """
+        Returns the path of the parse cache, keyed by the hash of the source files and the brendapy version.
+        The taxonomy, BTO and ChEBI files are part of the key, as the parser reads them (e.g. the ChEBI ids
+        of the substrates).
+
+        :returns: the path of the cache file, or None if no `cache_dir` is set
+        :rtype: str
+        """
+        if self.cache_dir is None:
+            return None
+        source_files = [self.brenda_file, self.taxonomy_dir, self.bto_file, self.chebi_file]
+        source_hash = compute_hash([path for path in source_files if path])
+        try:
+            brendapy_version = metadata.version("brendapy")
+        except metadata.PackageNotFoundError:
+            brendapy_version = "unknown"
+        key = f"{source_hash}_brendapy-{brendapy_version}_v{self.CACHE_FORMAT_VERSION}"
+        return os.path.join(self.cache_dir, f"brenda_{key}.msgpack")
 
-    def parse_all_enzyme_to_dict(self):
+    def parse_all_enzyme_to_dict(self, num_workers: int = 1, progress_callback: Callable[[str], None] = None):
         """
         Uses the package brandapy to parses the brenda_download.txt file and returns a list of dictionnaries
         where terms represent proteins filled with their informations (experimental properties, citations, synonyms, etc...).
+        The result is read from (or written to) the parse cache if a `cache_dir` is set.
 
-        :returns: list of all brenda proteins
-        :rtype: list
+        :param num_workers: number of parsing processes (at most `MAX_WORKERS`). If greater than 1, the EC
+        classes are split across worker processes and the results are merged in the EC order, so the result
+        does not depend on the number of workers. Each worker holds its own parser (i.e. a copy of the BRENDA
+        file and of the ChEBI, BTO and taxonomy data): the peak memory grows with the number of workers.
+        :type num_workers: int
+        :param progress_callback: function called with progress messages (e.g. `MessageDispatcher.notify_info_message`)
+        :type progress_callback: Callable[[str], None]
+        :returns: list of all brenda proteins, and list of deprecated ec numbers
+        :rtype: tuple[list, list]
         """
+        cache_path = self.get_cache_path()
+        if cache_path is not None and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "rb") as fp:
+                    cache = msgpack.unpack(fp, raw=False, strict_map_key=False)
+                return cache["proteins"], cache["deprecated_ec"]
+            except Exception as err:
+                Logger.warning(f"Could not load the BRENDA parse cache {cache_path}, parsing again: {err}")
+
+        num_workers = min(num_workers, self.MAX_WORKERS)
+        if num_workers > 1:
+            list_proteins, list_deprecated_ec = self._parse_all_enzyme_to_dict_in_parallel(
+                num_workers, progress_callback)
+        else:
+            list_proteins, list_deprecated_ec = _parse_ec_classes(self.get_parser(), self.get_parser().keys())
+
+        if cache_path is not None:
+            self._write_cache(cache_path, list_proteins, list_deprecated_ec)
+
+        return list_proteins, list_deprecated_ec
+
+    def _write_cache(self, cache_path: str, list_proteins: list, list_deprecated_ec: list) -> None:
+        """ Writes the parse cache. The cache is only an optimization: a failure is logged, not raised """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_path + ".tmp", "wb") as fp:
+                msgpack.pack({"proteins": list_proteins, "deprecated_ec": list_deprecated_ec},
+                             fp, use_bin_type=True, default=_to_msgpack)
+            os.replace(cache_path + ".tmp", cache_path)
+
+            # the caches of older BRENDA files or brendapy versions are obsolete
+            for file_name in os.listdir(self.cache_dir):
+                file_path = os.path.join(self.cache_dir, file_name)
+                if file_name.startswith("brenda_") and file_path != cache_path:
+                    os.unlink(file_path)
+        except Exception as err:
+            Logger.warning(f"Could not write the BRENDA parse cache {cache_path}: {err}")
+            if os.path.exists(cache_path + ".tmp"):
+                os.unlink(cache_path + ".tmp")
+
+    def _parse_all_enzyme_to_dict_in_parallel(self, num_workers: int, progress_callback: Callable[[str], None]):
+        ec_numbers = _read_ec_numbers(self.brenda_file)
+        if not ec_numbers:
+            return [], []
+        num_chunks = min(len(ec_numbers), num_workers * self.CHUNKS_PER_WORKER)
+        chunk_size = -(-len(ec_numbers) // num_chunks)
+        ec_chunks = [ec_numbers[i:i + chunk_size] for i in range(0, len(ec_numbers), chunk_size)]
+
         list_proteins = []
         list_deprecated_ec = []
-        for ec in self.parser.keys():
-            proteins, deprecated_ec = self.parser.get_all_proteins(ec)
+        parsed_count = 0
+        init_args = (self.brenda_file, self.taxonomy_dir, self.bto_file, self.chebi_file)
+        # the workers are spawned, not forked: the calling task process has live threads and an open
+        # database connection, whose locks must not be copied in the children
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=init_args) as executor:
+            # results are merged in the submission order (i.e. the EC order)
+            results = executor.map(_parse_ec_chunk, ec_chunks)
+            for chunk_id, (proteins, deprecated_ec, count) in enumerate(results, start=1):
+                list_proteins.extend(proteins)
+                list_deprecated_ec.extend(deprecated_ec)
+                parsed_count += count
+                if progress_callback is not None:
+                    progress_callback(f"  Chunk {chunk_id}/{len(ec_chunks)}: {count} EC classes parsed "
+                                      f"({parsed_count}/{len(ec_numbers)} in total)")
 
-            if deprecated_ec:
-                list_deprecated_ec.append(deprecated_ec)
+        return list_proteins, list_deprecated_ec
 
-            for p in proteins.values():
-                for k in p.data:
-                    if isinstance(p.data[k], set):
-                        p.data[k] = list(p.data[k])
-                        p.data[k].sort()
 
-                    # only keep pubmed ids if possible
-                    if k == 'references':
-                        for idx in p.data[k]:
-                            if "pubmed" in p.data[k][idx]:
-                                p.data[k][idx] = p.data[k][idx]["pubmed"]
-                            else:
-                                p.data[k][idx] = p.data[k][idx]["info"]
+def _read_ec_numbers(brenda_file: str) -> list:
+    """
+    Returns the EC numbers of the entries of the BRENDA file, in the order of `BrendaParser.keys()`.
+    Only the `ID` lines (`ID\\t<ec number> ...`) are read: the entries are not kept in memory, unlike in
+    the parser. As in the parser, the entries whose id is not an EC number are listed as None.
+    """
+    ec_numbers = {}
+    ec = None
+    in_entry = False
+    with open(brenda_file, "r", encoding="utf-8") as fp:
+        for line in fp:
+            if line.startswith("ID\t"):
+                in_entry = True
+                ec = line.strip().split("\t")[1].strip().split(" ")[0]
+                if not all(number.isdigit() for number in ec.split(".")):
+                    ec = None
+            elif in_entry and line.startswith("///"):
+                in_entry = False
+                ec_numbers[ec] = None
+    return list(ec_numbers)
 
-                list_proteins.append(p.data)
 
-        return list_proteins, list_deprecated_ec
+def _postprocess_protein_data(data: dict) -> dict:
+    """ Converts the sets to sorted lists and only keeps the pubmed ids of the references (if possible) """
+    for k in data:
+        if isinstance(data[k], set):
+            data[k] = list(data[k])
+            data[k].sort()
+
+        # only keep pubmed ids if possible
+        if k == 'references':
+            for idx in data[k]:
+                if "pubmed" in data[k][idx]:
+                    data[k][idx] = data[k][idx]["pubmed"]
+                else:
+                    data[k][idx] = data[k][idx]["info"]
+    return data
+
+
+def _parse_ec_classes(parser: BrendaParser, ec_numbers) -> tuple[list, list]:
+    list_proteins = []
+    list_deprecated_ec = []
+    for ec in ec_numbers:
+        proteins, deprecated_ec = parser.get_all_proteins(ec)
+
+        if deprecated_ec:
+            list_deprecated_ec.append(deprecated_ec)
+
+        for p in proteins.values():
+            list_proteins.append(_postprocess_protein_data(p.data))
+
+    return list_proteins, list_deprecated_ec
+
+
+# Parser of a worker process (see `Brenda._parse_all_enzyme_to_dict_in_parallel`)
+_worker_parser: BrendaParser = None
+
+
+def _init_worker(brenda_file, taxonomy_dir, bto_file, chebi_file):
+    """ Creates the parser of a worker process. The `_store_item` patch is applied when this module is imported """
+    global _worker_parser
+    BrendaSettings.initialize_data_dir(
+        brenda_file=brenda_file, taxonomy_dir=taxonomy_dir, bto_file=bto_file, chebi_file=chebi_file)
+    _worker_parser = BrendaParser(brenda_file=brenda_file)
+
+
+def _parse_ec_chunk(ec_numbers: list[str]) -> tuple[list, list, int]:
+    list_proteins, list_deprecated_ec = _parse_ec_classes(_worker_parser, ec_numbers)
+    return list_proteins, list_deprecated_ec, len(ec_numbers)
+
+
+def _to_msgpack(obj):
+    """ Converts the values that msgpack does not support natively """
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=str)
+    if isinstance(obj, tuple):
+        return list(obj)
+    raise TypeError(f"Cannot cache a value of type {type(obj).__name__} in the BRENDA parse cache")
@@ -0,0 +1,28 @@
+
+
+import hashlib
+import os
+
+
+def compute_hash(paths: list[str]) -> str:
+    """
+    Returns the sha256 of the content of files or directories
+
+    :param paths: Paths of the files or directories
+    :type paths: list[str]
+    :returns: The hexadecimal hash
+    :rtype: str
+    """
+    sha = hashlib.sha256()
+    for path in paths:
+        if os.path.isdir(path):
+            file_paths = sorted(os.path.join(root, file)
+                                for root, _, files in os.walk(path) for file in files)
+        else:
+            file_paths = [path]
+        for file_path in file_paths:
+            sha.update(os.path.relpath(file_path, path).encode() if os.path.isdir(path) else b"")
+            with open(file_path, "rb") as fp:
+                for block in iter(lambda: fp.read(1024 * 1024), b""):
+                    sha.update(block)
+    return sha.hexdigest()
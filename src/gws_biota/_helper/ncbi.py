@@ -71,6 +71,48 @@ class Taxonomy:
 
             return (dict_taxons)
 
+    @classmethod
+    def get_all_lineages(cls, dict_taxons, ranks):
+        """
+        Get the lineage of all ncbi taxonomy terms in one pass over the tree
+
+        For each term, the lineage gives the tax_id of the term or its ancestors at each rank of `ranks`.
+        When several ancestors have the same rank (e.g. `clade`), the highest one is kept.
+
+        :type dict_taxons: dict
+        :param dict_taxons: dictionnary of ncbi taxonomy terms returned by get_all_taxonomy()
+        :type ranks: list
+        :param ranks: the ranks to keep
+        :returns: dictionnary of lineages in the following format {tax_id: {rank: tax_id}}
+        :rtype: dict
+        """
+
+        ranks = set(ranks)
+        lineages = {}
+        for tax_id in dict_taxons:
+            if tax_id in lineages:
+                continue
+
+            # walk up until a known lineage (or the root) is reached
+            path = []
+            current = tax_id
+            while current not in lineages:
+                path.append(current)
+                ancestor = dict_taxons[current]["ancestor"]
+                if ancestor == current or ancestor not in dict_taxons or ancestor in path:
+                    break
+                current = ancestor
+
+            # then fill lineages from top to bottom
+            lineage = lineages.get(current, {}) if current not in path else {}
+            for node in reversed(path):
+                rank = dict_taxons[node]["rank"]
+                if rank in ranks and rank not in lineage:
+                    lineage = {**lineage, rank: node}
+                lineages[node] = lineage
+
+        return lineages
+
     @classmethod
     def get_ncbi_names(cls, ncbi_names_file):
         """
@@ -197,6 +197,8 @@ class Onto:
             ancestors = term.superclasses(distance=1000, with_self=False)
             for sup in ancestors:
                 dict_["ancestors"].append(sup.id)
+            # direct parents, from which the hierarchy is computed by OntologyClosure
+            dict_["parents"] = [sup.id for sup in term.superclasses(distance=1, with_self=False)]
 
             list_bto.append(dict_)
 
@@ -444,6 +446,9 @@ class Onto:
                 if c.id != term.id:
                     dict_term["ancestors"].append(c.id)
 
+            # direct parents, from which the hierarchy is computed by OntologyClosure
+            dict_term["parents"] = [c.id for c in term.superclasses(distance=1, with_self=False)]
+
             # synonyms
             dict_term["synonyms"] = []
             for syn in term.synonyms:
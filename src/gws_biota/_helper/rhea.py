@@ -3,6 +3,11 @@
 import csv
 import os
 import re
+from typing import Generator
+
+RECORD_SEPARATOR = "///"
+FIELD_PATTERN = re.compile(r"\s*(ENTRY|DEFINITION|EQUATION|ENZYME)\s+(.*)", flags=re.DOTALL)
+COMPOUND_DELIMITER_PATTERN = re.compile(r",| \+ ")
 
 
 class Rhea:
@@ -41,10 +46,28 @@ class Rhea:
         return list__
 
     @staticmethod
-    def parse_reaction_from_file(path, file):
+    def parse_reaction_from_file(path, file) -> list:
         """
         Parses a rhea-kegg.reaction file of biological reactions and returns a list of dictionaries
 
+        See `iter_reactions_from_file()`
+
+        :type path: str
+        :param path: location of the file
+        :type file: str
+        :param file: name of the file
+        :returns: list of dictionnaries reapresenting reactions
+        :rtype: list
+        """
+
+        return list(Rhea.iter_reactions_from_file(path, file))
+
+    @staticmethod
+    def iter_reactions_from_file(path, file) -> Generator[dict, None, None]:
+        """
+        Streams a rhea-kegg.reaction file of biological reactions line by line and yields the reactions
+        one at a time, as dictionaries. Only the current reaction is kept in memory.
+
         This tool accepts only the formated reaction file on which reaction are
         described this way:
 
@@ -52,102 +75,95 @@ class Rhea:
         DEFINITION  (S)-2-amino-6-oxohexanoate + H(+) + L-glutamate + NADPH => H2O + L-saccharopine + NADP(+)
         EQUATION    CHEBI:58321 + CHEBI:15378 + CHEBI:29985 + CHEBI:57783 => CHEBI:15377 + CHEBI:57951 + CHEBI:58349
 
-        and reactions are separated by the "///" symbol
+        and reactions are separated by the "///" symbol. Blocks without equation are skipped.
 
         :type path: str
         :param path: location of the file
         :type file: str
         :param file: name of the file
-        :returns: list of dictionnaries reapresenting reactions
-        :rtype: list
+        :returns: a generator of dictionnaries reapresenting reactions
+        :rtype: Generator[dict]
         """
 
         file_path = os.path.join(path, file)
         with open(file_path) as fh:
-            contents = fh.read()
-            list_content = contents.split('///')
-
-            list_reaction = []
-            for cont in list_content:
-                m1 = re.search(r"ENTRY\s+(.*)", cont)
-                m2 = re.search(r"DEFINITION\s+(.*)", cont)
-                m3 = re.search(r"EQUATION\s+(.*)", cont)
-                m4 = re.search(r"ENZYME\s+(.*)", cont, flags=re.DOTALL)
-                dict__ = {}
-                if m1:
-                    dict__["entry"] = m1[1]
-
-                if m2:
-                    dict__["definition"] = m2[1]
-
-                if m3:
-                    dict__["equation"] = m3[1]
-
-                if m4:
-                    dict__["enzymes"] = m4[1].split()
-
-                if 'equation' in dict__:
-                    dict__['source_equation'] = dict__['equation']
-                    if len(re.findall(' =>', dict__['equation'])) > 0:
-                        list_compound = dict__['equation'].split(" => ")
-
-                    elif len(re.findall('<=>', dict__['equation'])) > 0:
-                        list_compound = dict__['equation'].split(" <=> ")
-
-                    elif len(re.findall(' = ', dict__['equation'])) > 0:
-                        list_compound = dict__['equation'].split(" = ")
-
-                reagents = list_compound[0]
-                products = list_compound[1]
-                delimiters = ",", " + "
-                regexPattern = '|'.join(map(re.escape, delimiters))
-                list_substrates = re.split(regexPattern, reagents)
-                list_products = re.split(regexPattern, products)
-                list_dict_s = []
-                list_dict_p = []
-
-                for i in range(0, len(list_substrates)):
-                    list_substrates[i] = re.sub(' $', '', list_substrates[i])
-
-                for i in range(0, len(list_products)):
-                    list_products[i] = re.sub(' $', '', list_products[i])
-
-                dict__['equation'] = {}
-
-                dict_substrates = {}
-                for i in range(0, len(list_substrates)):
-                    if ' ' in list_substrates[i]:
-                        coeff_compound = re.split(' ', list_substrates[i])
-                        compound = coeff_compound[1]
-                        coeff = coeff_compound[0]
-                        dict_substrates[compound] = coeff
-                        list_dict_s.append(compound)
-                    else:
-                        dict_substrates[list_substrates[i]] = 1
-                        list_dict_s.append(list_substrates[i])
-
-                dict__['substrates'] = list_dict_s
-                dict__['equation']["substrates"] = dict_substrates
-
-                dict_products = {}
-                for i in range(0, len(list_products)):
-                    if ' ' in list_products[i]:
-                        coeff_compound = re.split(' ', list_products[i])
-                        compound = coeff_compound[1]
-                        coeff = coeff_compound[0]
-                        dict_products[compound] = coeff
-                        list_dict_p.append(compound)
-                    else:
-                        dict_products[list_products[i]] = 1
-                        list_dict_p.append(list_products[i])
-
-                dict__['products'] = list_dict_p
-                dict__['equation']['products'] = dict_products
-
-                if dict__:
-                    list_reaction.append(dict__)
-
-        return list_reaction
+            record = {}
+            enzymes = None
+            for line in fh:
+                parts = line.split(RECORD_SEPARATOR)
+                for i, part in enumerate(parts):
+                    if i > 0:
+                        # end of record
+                        reaction = Rhea._create_reaction(record, enzymes)
+                        if reaction is not None:
+                            yield reaction
+                        record = {}
+                        enzymes = None
+
+                    match = FIELD_PATTERN.match(part)
+                    if match:
+                        field, value = match.group(1), match.group(2).rstrip("\r\n")
+                        if field == "ENZYME":
+                            # the ENZYME field goes up to the end of the record
+                            enzymes = value.split()
+                        elif field not in record:
+                            record[field] = value
+                    elif enzymes is not None:
+                        enzymes.extend(part.split())
+
+            reaction = Rhea._create_reaction(record, enzymes)
+            if reaction is not None:
+                yield reaction
+
+    @staticmethod
+    def _create_reaction(record: dict, enzymes: list) -> dict:
+        """ Creates the reaction dictionary of a parsed record, or returns None if the record has no equation """
+
+        if "EQUATION" not in record:
+            return None
+
+        dict__ = {}
+        if "ENTRY" in record:
+            dict__["entry"] = record["ENTRY"]
+        if "DEFINITION" in record:
+            dict__["definition"] = record["DEFINITION"]
+        dict__["equation"] = record["EQUATION"]
+        if enzymes is not None:
+            dict__["enzymes"] = enzymes
+
+        equation = record["EQUATION"]
+        dict__['source_equation'] = equation
+        if ' =>' in equation:
+            list_compound = equation.split(" => ")
+        elif '<=>' in equation:
+            list_compound = equation.split(" <=> ")
+        else:
+            list_compound = equation.split(" = ")
+
+        list_dict_s, dict_substrates = Rhea._parse_compounds(list_compound[0])
+        list_dict_p, dict_products = Rhea._parse_compounds(list_compound[1])
+        dict__['equation'] = {"substrates": dict_substrates, "products": dict_products}
+        dict__['substrates'] = list_dict_s
+        dict__['products'] = list_dict_p
+        return dict__
+
+    @staticmethod
+    def _parse_compounds(side: str) -> tuple[list, dict]:
+        """ Parses one side of an equation: returns the list of compounds and their stoichiometric coefficients """
+
+        list_compounds = []
+        dict_compounds = {}
+        for item in COMPOUND_DELIMITER_PATTERN.split(side):
+            if item.endswith(' '):
+                item = item[:-1]
+            if ' ' in item:
+                coeff, compound = item.split(' ')[0:2]
+                dict_compounds[compound] = coeff
+            else:
+                compound = item
+                dict_compounds[compound] = 1
+            list_compounds.append(compound)
+        return list_compounds, dict_compounds
 
     @staticmethod
     def get_columns_from_lines(list_lines):
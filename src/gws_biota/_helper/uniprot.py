@@ -0,0 +1,88 @@
+
+
+import gzip
+import re
+from typing import Generator
+
+HEADER_PATTERN = re.compile(r".*OX=([0-9]+).*PE=(\d).*")
+
+
+class Uniprot:
+    """
+
+    This module allows to stream UniProt FASTA files (Swiss-Prot or TrEMBL, gzipped or not) and to parse the
+    records into plain tuples: (uniprot_id, uniprot_db, uniprot_gene, evidence_score, tax_id, description, sequence)
+
+    """
+
+    READ_BLOCK_SIZE = 8 * 1024 * 1024
+
+    @staticmethod
+    def read_fasta_chunks(file_path: str, chunk_size: int = 10000,
+                          block_size: int = READ_BLOCK_SIZE) -> Generator[list[str], None, None]:
+        """
+        Decompresses a FASTA file block by block and yields lists of raw records.
+        Only one block and one chunk of records are kept in memory.
+
+        :param file_path: path of the FASTA file (gzipped if ends with .gz)
+        :type file_path: str
+        :param chunk_size: number of records per chunk
+        :type chunk_size: int
+        :param block_size: number of characters read at once
+        :type block_size: int
+        :returns: a generator of lists of raw records (header line without '>' followed by the sequence lines)
+        :rtype: Generator[list[str]]
+        """
+        open_fn = gzip.open if file_path.endswith(".gz") else open
+        chunk = []
+        remainder = ""
+        with open_fn(file_path, "rt") as handle:
+            while True:
+                block = handle.read(block_size)
+                if not block:
+                    break
+                records = (remainder + block).split("\n>")
+                # the last record may continue in the next block
+                remainder = records.pop()
+                for record in records:
+                    if record:
+                        chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if remainder.strip():
+            chunk.append(remainder)
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def parse_fasta_records(records: list[str]) -> list[tuple]:
+        """
+        Parses raw FASTA records into plain tuples (cheap to send between processes)
+
+        :param records: raw records returned by `read_fasta_chunks`
+        :type records: list[str]
+        :returns: a list of tuples (uniprot_id, uniprot_db, uniprot_gene, evidence_score, tax_id, description, sequence)
+        :rtype: list[tuple]
+        """
+        rows = []
+        for record in records:
+            header, _, sequence = record.lstrip(">").partition("\n")
+            description = header.strip()
+            record_id = description.split(None, 1)[0] if description else ""
+            id_parts = record_id.split("|")
+            if len(id_parts) < 3:
+                continue
+            m = HEADER_PATTERN.match(description)
+            tax = m.group(1) if m else ""
+            evidence = int(m.group(2)) if m else 0
+            rows.append((
+                id_parts[1],
+                id_parts[0],
+                id_parts[2],
+                evidence,
+                tax,
+                description,
+                sequence.replace("\n", "").replace("\r", "").strip()
+            ))
+        return rows
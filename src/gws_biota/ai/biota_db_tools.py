@@ -159,33 +159,42 @@ Inherited fields from base classes are listed once and apply to all tables that
 - `chebi_id` VARCHAR (nullable, indexed)
 - `species` VARCHAR (nullable, indexed) - e.g. "Homo sapiens"
 
+Each ontology ancestor table stores the transitive closure of the hierarchy: one row per (term, ancestor),
+so all the ancestors or descendants of a term are read without recursion.
+
 **biota_compound_ancestors** - compound ChEBI ontology tree
 - `compound_id` INTEGER (FK -> biota_compound.id)
 - `ancestor_id` INTEGER (FK -> biota_compound.id)
+- `depth` INTEGER - distance to the ancestor (1 for the parents)
 - UNIQUE(compound_id, ancestor_id)
 
 **biota_pathway_ancestors** - pathway hierarchy
 - `pathway_id` INTEGER (FK -> biota_pathways.id)
 - `ancestor_id` INTEGER (FK -> biota_pathways.id)
+- `depth` INTEGER - distance to the ancestor (1 for the parents)
 - UNIQUE(pathway_id, ancestor_id)
 
 **biota_go_ancestors** - GO term hierarchy
 - `go_id` INTEGER (FK -> biota_go.id)
 - `ancestor_id` INTEGER (FK -> biota_go.id)
+- `depth` INTEGER - distance to the ancestor (1 for the parents)
 - UNIQUE(go_id, ancestor_id)
 
 **biota_bto_ancestors** - BTO tissue hierarchy
 - `bto_id` INTEGER (FK -> biota_bto.id)
 - `ancestor_id` INTEGER (FK -> biota_bto.id)
+- `depth` INTEGER - distance to the ancestor (1 for the parents)
 - UNIQUE(bto_id, ancestor_id)
 
 **biota_sbo_ancestors** - SBO hierarchy
 - `sbo_id` INTEGER (FK -> biota_sbo.id)
 - `ancestor_id` INTEGER (FK -> biota_sbo.id)
+- `depth` INTEGER - distance to the ancestor (1 for the parents)
 
 **biota_eco_ancestors** - ECO hierarchy
 - `eco_id` INTEGER (FK -> biota_eco.id)
 - `ancestor_id` INTEGER (FK -> biota_eco.id)
+- `depth` INTEGER - distance to the ancestor (1 for the parents)
 
 ---
 
@@ -0,0 +1,152 @@
+
+
+from typing import Iterable
+
+from gws_core import Logger
+
+from ..ontology.ontology_closure import OntologyClosure
+from .protected_base_model import ProtectedBaseModel
+
+
+class NaturalKeyResolver:
+    """
+    Resolves natural keys (e.g. `chebi_id`, `bto_id`, `go_id`, `reactome_pathway_id`) to
+    primary keys without any per-row database round-trip.
+
+    The mapping is either built from the models already in memory (e.g. just after `create_all`),
+    or loaded from the database in one streamed query. Keys that cannot be resolved are collected
+    and can be reported at once with :meth:`log_unresolved`.
+    """
+
+    _name: str = None
+    _key_map: dict[str, str] = None
+    _unresolved: dict[str, None] = None
+
+    def __init__(self, key_map: dict[str, str], name: str = None):
+        self._name = name or "NaturalKeyResolver"
+        self._key_map = key_map
+        self._unresolved = {}
+
+    # -- F --
+
+    @classmethod
+    def from_models(cls, models: Iterable[ProtectedBaseModel], key_field: str) -> 'NaturalKeyResolver':
+        """
+        Build the resolver from models that are already in memory and saved (i.e. having an id)
+
+        :param models: The saved models
+        :type models: Iterable[ProtectedBaseModel]
+        :param key_field: Name of the natural key field (e.g. `chebi_id`)
+        :type key_field: str
+        :returns: The resolver
+        :rtype: NaturalKeyResolver
+        """
+        key_map = {}
+        model_type = None
+        for model in models:
+            key = getattr(model, key_field)
+            if key is not None and key not in key_map:
+                key_map[key] = model.id
+            model_type = type(model)
+        name = f"{model_type.__name__}.{key_field}" if model_type else key_field
+        return cls(key_map, name=name)
+
+    @classmethod
+    def from_db(cls, model_type: type[ProtectedBaseModel], key_field: str) -> 'NaturalKeyResolver':
+        """
+        Build the resolver by streaming the `(key_field, id)` pairs of a table in one query
+
+        :param model_type: The model class
+        :type model_type: type[ProtectedBaseModel]
+        :param key_field: Name of the natural key field (e.g. `chebi_id`)
+        :type key_field: str
+        :returns: The resolver
+        :rtype: NaturalKeyResolver
+        """
+        field = getattr(model_type, key_field)
+        query = model_type.select(field, model_type.id).where(field.is_null(False)).tuples()
+        key_map = {}
+        for key, id_ in query.iterator():
+            if key not in key_map:
+                key_map[key] = id_
+        Logger.info(f"{model_type.__name__}.{key_field}: {len(key_map)} keys loaded")
+        return cls(key_map, name=f"{model_type.__name__}.{key_field}")
+
+    # -- L --
+
+    def __len__(self):
+        return len(self._key_map)
+
+    def log_unresolved(self, max_items: int = 10) -> None:
+        """ Log all the unresolved keys at once """
+        if not self._unresolved:
+            Logger.info(f"{self._name}: ✓ All keys resolved")
+            return
+        unresolved = self.unresolved
+        preview = ", ".join(unresolved[:max_items])
+        if len(unresolved) > max_items:
+            preview += f", ... and {len(unresolved) - max_items} more"
+        Logger.warning(f"{self._name}: ⚠ {len(unresolved)} unresolved keys: {preview}")
+
+    # -- R --
+
+    def resolve(self, key: str) -> str | None:
+        """
+        Returns the primary key matching with a natural key, or None if not found.
+        Unresolved keys are recorded.
+        """
+        id_ = self._key_map.get(key)
+        if id_ is None and key is not None:
+            self._unresolved[key] = None
+        return id_
+
+    def resolve_ancestors(self, term_id: str, term_key: str, ancestor_keys: Iterable[str],
+                          term_field: str, ancestor_field: str = "ancestor") -> list[dict]:
+        """
+        Resolves the ancestors of a term and returns the ancestor relations in a list
+
+        :param term_id: Primary key of the term
+        :param term_key: Natural key of the term (ignored if present in `ancestor_keys`)
+        :param ancestor_keys: Natural keys of the ancestors
+        :param term_field: Name of the term column in the ancestor table (e.g. `compound`)
+        :param ancestor_field: Name of the ancestor column in the ancestor table
+        :returns: a list of dictionnaries in the format {term_field: term_id, ancestor_field: ancestor_id}
+        :rtype: list
+        """
+        vals = []
+        for ancestor_key in ancestor_keys:
+            if ancestor_key == term_key:
+                continue
+            ancestor_id = self.resolve(ancestor_key)
+            if ancestor_id is not None:
+                vals.append({term_field: term_id, ancestor_field: ancestor_id})
+        return vals
+
+    def resolve_closure(self, closure: OntologyClosure, term_field: str, ancestor_field: str = "ancestor",
+                        depth_field: str = "depth") -> list[dict]:
+        """
+        Resolves the transitive closure of an ontology and returns all the ancestor relations in a list
+
+        :param closure: The closure, on the natural keys of the terms
+        :param term_field: Name of the term column in the ancestor table (e.g. `compound`)
+        :param ancestor_field: Name of the ancestor column in the ancestor table
+        :param depth_field: Name of the depth column in the ancestor table
+        :returns: a list of dictionnaries in the format {term_field: term_id, ancestor_field: ancestor_id,
+        depth_field: depth}
+        :rtype: list
+        """
+        vals = []
+        for term_key, ancestor_key, depth in closure.iter_rows():
+            term_id = self.resolve(term_key)
+            ancestor_id = self.resolve(ancestor_key)
+            if term_id is not None and ancestor_id is not None:
+                vals.append({term_field: term_id, ancestor_field: ancestor_id, depth_field: depth})
+        if closure.cyclic_terms:
+            Logger.warning(f"{self._name}: ⚠ {len(closure.cyclic_terms)} terms in a cycle of the hierarchy: "
+                           f"{', '.join(closure.cyclic_terms[:10])}")
+        return vals
+
+    @property
+    def unresolved(self) -> list[str]:
+        """ Returns the list of unresolved keys, in the order they were first met """
+        return list(self._unresolved.keys())
@@ -1,14 +1,14 @@
 
 
 from gws_core.model.typing_register_decorator import typing_registrator
-from peewee import CharField, ForeignKeyField
+from peewee import CharField, ForeignKeyField, IntegerField
 
 from ..base.protected_base_model import ProtectedBaseModel
-from ..ontology.ontology import Ontology
+from ..ontology.ontology import Ontology, OntologyHierarchy
 
 
 @typing_registrator(unique_name="BTO", object_type="MODEL", hide=True)
-class BTO(Ontology):
+class BTO(OntologyHierarchy, Ontology):
     """
     This class represents BTO terms.
 
@@ -25,19 +25,6 @@ class BTO(Ontology):
     """
     bto_id = CharField(null=True, index=True)
 
-    _ancestors = None
-
-    # -- A --
-    @property
-    def ancestors(self):
-        if self._ancestors is not None:
-            return self._ancestors
-        self._ancestors = []
-        query = BTOAncestor.select().where(BTOAncestor.bto == self.id)
-        for elt in query:
-            self._ancestors.append(elt.ancestor)
-        return self._ancestors
-
     # -- C --
     @classmethod
     def create_table(cls, *args, **kwargs):
@@ -60,6 +47,11 @@ class BTO(Ontology):
         BTOAncestor.drop_table()
         super().drop_table(*arg, **kwargs)
 
+    # -- G --
+    @classmethod
+    def get_ancestor_model(cls):
+        return BTOAncestor
+
     # -- S --
     def set_bto_id(self, bto_id):
         """
@@ -77,18 +69,23 @@ class BTO(Ontology):
 class BTOAncestor(ProtectedBaseModel):
     """
     This class defines the many-to-many relationship between the bto terms and their ancestors
+    (transitive closure of the hierarchy)
 
     :property bto: id of the concerned bto term
     :type bto: CharField
     :property ancestor: ancestor of the concerned bto term
     :type ancestor: CharField
+    :property depth: distance between the term and its ancestor (1 for the parents)
+    :type depth: int
     """
     bto = ForeignKeyField(BTO)
     ancestor = ForeignKeyField(BTO)
+    depth = IntegerField(default=1)
 
     class Meta:
         table_name = 'biota_bto_ancestors'
         is_table = True
         indexes = (
             (('bto', 'ancestor'), True),
+            (('ancestor', 'bto'), False),
         )
@@ -4,6 +4,8 @@ from gws_biota.db.biota_db_manager import BiotaDbManager
 
 from .._helper.ontology import Onto as OntoHelper
 from ..base.base_service import BaseService
+from ..base.natural_key_resolver import NaturalKeyResolver
+from ..ontology.ontology_closure import OntologyClosure
 from .bto import BTO, BTOAncestor
 
 
@@ -63,13 +65,12 @@ class BTOService(BaseService):
         Logger.info("STEP 2: Inserting BTO ancestor relationships")
         Logger.info("-" * 80)
 
-        vals = []
-        for bto in btos:
-            val = cls._get_ancestors_query(bto)
-            for v in val:
-                vals.append(v)
+        resolver = NaturalKeyResolver.from_models(btos, "bto_id")
+        closure = OntologyClosure({bto.bto_id: bto.data.get("parents") for bto in btos})
+        vals = resolver.resolve_closure(closure, term_field="bto")
 
         Logger.info(f"Generated {len(vals)} ancestor relationship records")
+        resolver.log_unresolved()
 
         # Deduplicate before insertion
         vals = cls._deduplicate_ancestor_vals(vals, 'bto', 'ancestor')
@@ -99,25 +100,6 @@ class BTOService(BaseService):
         Logger.info("=" * 80)
         message_dispatcher.notify_info_message("✓ BTO database completed!")
 
-    @classmethod
-    def _get_ancestors_query(cls, bto: BTO) -> list[dict]:
-        """
-        Look for the bto term ancestors and returns all bto-bto_ancetors relations in a list.
-
-        :returns: a list of dictionnaries inf the following format: {'bto': self.id, 'ancestor': ancestor.id}
-        :rtype: list
-        """
-        vals: list[dict] = []
-        if "ancestors" not in bto.data:
-            return vals
-        for ancestor in bto.data["ancestors"]:
-            if ancestor != bto.bto_id:
-                ancestors: list[BTO] = list(BTO.select(BTO.id).where(BTO.bto_id == ancestor))
-                if len(ancestors) > 0:
-                    val = {"bto": bto.id, "ancestor": ancestors[0].id}
-                    vals.append(val)
-        return vals
-
     @classmethod
     def _deduplicate_ancestor_vals(cls, vals: list[dict], key1: str, key2: str) -> list[dict]:
         """Remove duplicate ancestor relationships"""
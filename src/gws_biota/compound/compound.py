@@ -21,15 +21,16 @@
 import re
 
 from gws_core.model.typing_register_decorator import typing_registrator
-from peewee import CharField, DoubleField, FloatField, ForeignKeyField
+from peewee import CharField, DoubleField, FloatField, ForeignKeyField, IntegerField
 
 from ..base.base_ft import BaseFT
 from ..base.protected_base_model import ProtectedBaseModel
+from ..ontology.ontology import OntologyHierarchy
 from .compound_layout import CompoundLayout, CompoundLayoutDict
 
 
 @typing_registrator(unique_name="Compound", object_type="MODEL", hide=True)
-class Compound(BaseFT):
+class Compound(OntologyHierarchy, BaseFT):
     """
     This class represents ChEBI Ontology terms.
 
@@ -55,21 +56,8 @@ class Compound(BaseFT):
     smiles = CharField(null=True, index=True)
     chebi_star = CharField(null=True, index=True)
 
-    _ancestors = None
-
     # -- A --
 
-    @property
-    def ancestors(self):
-        """ Returns ancestors """
-        if self._ancestors is not None:
-            return self._ancestors
-        self._ancestors = []
-        query = CompoundAncestor.select().where(CompoundAncestor.compound == self.id)
-        for elt in query:
-            self._ancestors.append(elt.ancestor)
-        return self._ancestors
-
     @property
     def alt_chebi_ids(self) -> list:
         """ Returns alternative chebi ids """
@@ -99,6 +87,10 @@ class Compound(BaseFT):
 
     # -- G --
 
+    @classmethod
+    def get_ancestor_model(cls):
+        return CompoundAncestor
+
     @classmethod
     def search_by_chebi_ids(cls, chebi_ids: list | str):
         """ Search compounds using CheBI IDs """
@@ -155,17 +147,24 @@ class Compound(BaseFT):
 class CompoundAncestor(ProtectedBaseModel):
     """
     This class defines the many-to-many relationship between the compound terms and theirs ancestors
+    (transitive closure of the hierarchy)
 
     :type compound: CharField
     :property compound: id of the concerned compound term
     :type ancestor: CharField
     :property ancestor: ancestor of the concerned compound term
+    :type depth: int
+    :property depth: distance between the term and its ancestor (1 for the parents)
     """
 
     compound = ForeignKeyField(Compound)
     ancestor = ForeignKeyField(Compound)
+    depth = IntegerField(default=1)
 
     class Meta:
         table_name = "biota_compound_ancestors"
         is_table = True
-        indexes = ((("compound", "ancestor"), True),)
+        indexes = (
+            (("compound", "ancestor"), True),
+            (("ancestor", "compound"), False),
+        )
@@ -56,8 +56,11 @@ class CompoundCluster:
         self._data = data
         self._centroid = centroid
 
+        # the centroid is loaded once for all the compounds of the cluster
+        if centroid is None:
+            centroid = self.load_centroid_data_from_cluster_name(self._name)
         for c in self._data.values():
-            x, y = self.convert_position_from_db_to_view(self._name, c["x"], c["y"])
+            x, y = self._convert_position_from_db_to_view_with_centroid(centroid, c["x"], c["y"])
             c["x"] = x
             c["y"] = y
 
@@ -96,6 +99,10 @@ class CompoundCluster:
         """ Convert the position of a cluster compound from the DB to the View """
 
         centroid = cls.load_centroid_data_from_cluster_name(cluster_name)
+        return cls._convert_position_from_db_to_view_with_centroid(centroid, x, y)
+
+    @classmethod
+    def _convert_position_from_db_to_view_with_centroid(cls, centroid, x, y):
         try:
             x = float(x)
             y = float(y)
@@ -110,8 +117,15 @@ class CompoundCluster:
     # -- F --
 
     @ classmethod
-    def from_file(cls, file_path) -> 'CompoundCluster':
-        """ Create a CompoundCluster using a json data file """
+    def from_file(cls, file_path, centroid: dict = None) -> 'CompoundCluster':
+        """
+        Create a CompoundCluster using a json data file
+
+        :param file_path: The path of the json file of the cluster
+        :param centroid: The centroid of the cluster. It is read from the `__centroid__.json` file of the
+        folder if not given.
+        :type centroid: dict
+        """
         with open(file_path, encoding="utf-8") as fp:
             try:
                 cdata = json.load(fp)
@@ -119,9 +133,12 @@ class CompoundCluster:
                 raise BadRequestException(f'Cannot load the json file "{file_path}"') from err
 
             # load centroid
-            p = Path(file_path)
-            parent_folder = p.parent  # (file_path.split("/"))[-2]
-            centroid_data = cls.load_centroid_data_from_folder(str(parent_folder))
+            if centroid is None:
+                p = Path(file_path)
+                parent_folder = p.parent  # (file_path.split("/"))[-2]
+                centroid_data = cls.load_centroid_data_from_folder(str(parent_folder))
+            else:
+                centroid_data = centroid
 
             return CompoundCluster(
                 id=cdata["id"],
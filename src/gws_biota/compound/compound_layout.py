@@ -1,11 +1,13 @@
 
 
+import hashlib
 import json
 import os
 from pathlib import Path
+from types import MappingProxyType
 from typing import TypedDict
 
-from gws_core import BadRequestException
+from gws_core import BadRequestException, Logger, Settings
 
 from .compound_cluster import CompoundCluster, CompoundClusterDict
 
@@ -23,6 +25,9 @@ class CompoundLayout:
     Y_LIMIT = 4000
     BIOMASS_CLUSTER_CENTER = {"x": 1000, "y": 200}
 
+    INDEX_FORMAT_VERSION = 1
+
+    # clusters added with `add_cluster`, in addition to the clusters of the layout directory
     _clusters: list[CompoundCluster] = []
 
     _data: dict = {}
@@ -30,6 +35,7 @@ class CompoundLayout:
     _is_flattened = False
     _is_generated = False
     _master_ids_map = {}
+    _alt_ids_map = {}
 
     @ classmethod
     def add_cluster(cls, cluster):
@@ -37,6 +43,7 @@ class CompoundLayout:
         if not isinstance(cluster, CompoundCluster):
             raise BadRequestException("The cluster must be CompoundCluster")
         cls._clusters.append(cluster)
+        cls.invalidate()
 
     @classmethod
     def get_db_path(cls):
@@ -47,28 +54,189 @@ class CompoundLayout:
         return os.path.join(cls.get_db_path(), cluster_id)
 
     @ classmethod
-    def generate(cls, db_path: str = None, force: bool = False):
-        """ Generate positions """
+    def generate(cls, db_path: str = None, force: bool = False) -> dict:
+        """
+        Generate positions
+
+        The positions are read from the layout index (see `load_index`), that is rebuilt from the cluster
+        files only when they change. The returned data is a copy: it can be modified by the caller.
+        """
+        data = cls._generate(db_path, force=force)
+        return {comp_id: cls._copy_clusters(comp_id, cluster_data) for comp_id, cluster_data in data.items()}
+
+    @classmethod
+    def _generate(cls, db_path: str = None, force: bool = False) -> dict:
+        """
+        Returns the layout data. The records are read-only, as they are shared by all the layouts, and their
+        alternative chebi ids are stored apart (see `get_alt_chebi_ids`).
+        """
         if cls._is_generated:
             if not force:
                 return cls._data
 
-        if not db_path:
-            db_path = cls.get_db_path()
+        index = cls.load_index(db_path, force=force)
+        data = index["data"]
+        master_ids = index["master_ids"]
 
-        data = {}
+        # clusters added with `add_cluster`
+        if cls._clusters:
+            data = {comp_id: dict(cluster_data) for comp_id, cluster_data in data.items()}
+            cls._add_clusters_data(data, cls._clusters)
+            master_ids = cls._get_master_ids(data)
+
+        cls._data, cls._alt_ids_map = cls._freeze_data(data)
+        cls._master_ids_map = master_ids
+        cls._is_generated = True
+        cls._is_flattened = False
+        return cls._data
+
+    @classmethod
+    def get_flat_data(cls, force: bool = False) -> dict:
+        """ Get layout data (a copy, that can be modified by the caller) """
+        flat_data = cls._get_flat_data(force=force)
+        return {chebi_id: cls._copy_clusters(cls._master_ids_map[chebi_id], clusters)
+                for chebi_id, clusters in flat_data.items()}
+
+    @classmethod
+    def _get_flat_data(cls, force: bool = False) -> dict:
+        """ Returns the read-only records of the layout data of each chebi id (and alternative chebi id) """
+        if cls._is_flattened:
+            if not force:
+                return cls._flat_data
+
+        data = CompoundLayout._generate()
+        cls._flat_data = {chebi_id: data[master_id] for chebi_id, master_id in cls._master_ids_map.items()}
+        cls._is_flattened = True
+        return cls._flat_data
+
+    @classmethod
+    def _copy_clusters(cls, master_id: str, clusters: dict) -> dict:
+        """ Returns a copy of the read-only records of a compound, with their alternative chebi ids """
+        alt_ids = cls._alt_ids_map.get(master_id, {})
+        return {cluster_id: {**record, "alt": list(alt_ids.get(cluster_id, ()))}
+                for cluster_id, record in clusters.items()}
+
+    @classmethod
+    def get_alt_chebi_ids(cls, chebi_id: str) -> dict[str, tuple[str, ...]]:
+        """
+        Returns the alternative chebi ids of a compound in each of its clusters
+
+        :param chebi_id: The chebi id (or an alternative chebi id) of the compound
+        :type chebi_id: str
+        :returns: The alternative chebi ids of the compound in each cluster (empty if the compound is not found)
+        :rtype: dict[str, tuple[str, ...]]
+        """
+        master_id = cls.retreive_master_chebi_id(chebi_id)
+        return dict(cls._alt_ids_map.get(master_id, {}))
+
+    @classmethod
+    def get_index_dir(cls) -> str:
+        """ Returns the directory of the layout indexes """
+        return os.path.join(Settings.get_instance().get_data_dir(), "gws_biota", "layout_index")
+
+    @classmethod
+    def get_index_path(cls, db_path: str = None) -> str:
+        """ Returns the path of the index of a layout directory """
+        db_path = os.path.abspath(db_path or cls.get_db_path())
+        path_hash = hashlib.sha256(db_path.encode()).hexdigest()[:16]
+        return os.path.join(cls.get_index_dir(), f"compound_layout_{path_hash}_v{cls.INDEX_FORMAT_VERSION}.json")
+
+    @classmethod
+    def _freeze_data(cls, data: dict) -> tuple[dict, dict]:
+        """
+        Returns the read-only records of the layout data (with `alt` set to None), and the alternative chebi ids of
+        each compound in each cluster
+        """
+        frozen_data = {}
+        alt_ids = {}
+        for comp_id, cluster_data in data.items():
+            frozen_data[comp_id] = MappingProxyType({
+                cluster_id: MappingProxyType({**record, "alt": None})
+                for cluster_id, record in cluster_data.items()
+            })
+            alt_ids[comp_id] = MappingProxyType({
+                cluster_id: tuple(record.get("alt") or [])
+                for cluster_id, record in cluster_data.items()
+            })
+        return frozen_data, alt_ids
+
+    @classmethod
+    def _get_master_ids(cls, data: dict) -> dict[str, str]:
+        """ Returns the master chebi id of each chebi id and alternative chebi id of the layout data """
+        master_ids = {}
+        for comp_id, cluster_data in data.items():
+            master_ids[comp_id] = comp_id
+            # parse current cluster and gather all comp data
+            for current_cluster_data in cluster_data.values():
+                for alt_comp_id in current_cluster_data.get("alt") or []:
+                    master_ids[alt_comp_id] = comp_id
+        return master_ids
+
+    @classmethod
+    def _get_source_mtimes(cls, db_path: str) -> dict[str, int]:
+        """ Returns the modification time of each json file (clusters and centroids) of a layout directory """
+        mtimes = {}
+        for root, _, files in os.walk(db_path):
+            for file in files:
+                if file.endswith(".json"):
+                    file_path = os.path.join(root, file)
+                    mtimes[os.path.relpath(file_path, db_path)] = os.stat(file_path).st_mtime_ns
+        return mtimes
 
+    @classmethod
+    def invalidate(cls):
+        """ Clears the layout data loaded in memory. The index is checked again on the next use. """
+        cls._data = {}
+        cls._flat_data = {}
+        cls._master_ids_map = {}
+        cls._alt_ids_map = {}
+        cls._is_generated = False
+        cls._is_flattened = False
+
+    @classmethod
+    def load_index(cls, db_path: str = None, force: bool = False) -> dict:
+        """
+        Loads the layout index of a layout directory, or builds it if the json files of the directory changed.
+
+        The index is a json file that contains the positions of the compounds in each cluster (converted to the
+        view) and the master chebi id of each chebi id and alternative chebi id. The cluster files are only
+        parsed when the index is built, and the centroid of each cluster is read once.
+
+        :param db_path: The layout directory (defaults to the `_layout` directory of the brick)
+        :type db_path: str
+        :param force: If True, the index is rebuilt
+        :type force: bool
+        :returns: The index, with the keys `data` and `master_ids`
+        :rtype: dict
+        """
+        if not db_path:
+            db_path = cls.get_db_path()
+        mtimes = cls._get_source_mtimes(db_path)
+        index_path = cls.get_index_path(db_path)
+
+        if not force and os.path.exists(index_path):
+            try:
+                with open(index_path, encoding="utf-8") as fp:
+                    index = json.load(fp)
+                if index["mtimes"] == mtimes:
+                    return index
+            except Exception as err:
+                Logger.warning(f"Could not read the compound layout index, rebuilding: {err}")
+
+        index = cls._build_index(db_path)
+        index["mtimes"] = mtimes
         try:
-            # loads for all .json files
-            for root, _, files in os.walk(db_path):
-                for file in files:
-                    if file.endswith(".json") and file != "__centroid__.json":
-                        cluster = CompoundCluster.from_file(os.path.join(root, file))
-                        cls._clusters.append(cluster)
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            with open(index_path + ".tmp", "w", encoding="utf-8") as fp:
+                json.dump(index, fp)
+            os.replace(index_path + ".tmp", index_path)
         except Exception as err:
-            raise BadRequestException(f"An error occur when parsing layout files. Message {err}") from err
+            Logger.warning(f"Could not save the compound layout index: {err}")
+        return index
 
-        for cluster in cls._clusters:
+    @classmethod
+    def _add_clusters_data(cls, data: dict, clusters: list[CompoundCluster]):
+        for cluster in clusters:
             cluster_data = cluster.generate()
             for comp_id in cluster_data:
                 if comp_id not in data:
@@ -77,36 +245,34 @@ class CompoundLayout:
                 cluster_id = cluster_data[comp_id]["id"]
                 data[comp_id][cluster_id] = cluster_data[comp_id]
 
-        cls._is_generated = True
-        cls._data = data
-        return data
-
     @classmethod
-    def get_flat_data(cls, force: bool = False):
-        """ Get layout data """
-        if cls._is_flattened:
-            if not force:
-                return cls._flat_data
-
-        cls._flat_data = {}
-        data = CompoundLayout.generate()
-        for comp_id, cluster_data in data.items():
-            cls._flat_data[comp_id] = cluster_data
-            cls._master_ids_map[comp_id] = comp_id
-
-            # parse current cluster and gather all comp data
-            for current_cluster_data in cluster_data.values():
-                for alt_comp_id in current_cluster_data.get("alt", []):
-                    cls._flat_data[alt_comp_id] = cluster_data
-                    cls._master_ids_map[alt_comp_id] = comp_id
+    def _build_index(cls, db_path: str) -> dict:
+        clusters = []
+        centroids = {}
+        try:
+            # loads for all .json files
+            for root, _, files in os.walk(db_path):
+                for file in files:
+                    if file.endswith(".json") and file != "__centroid__.json":
+                        if root not in centroids:
+                            centroids[root] = CompoundCluster.load_centroid_data_from_folder(root)
+                        cluster = CompoundCluster.from_file(os.path.join(root, file), centroid=centroids[root])
+                        clusters.append(cluster)
+        except Exception as err:
+            raise BadRequestException(f"An error occur when parsing layout files. Message {err}") from err
 
-            # cluster_data
-        cls._is_flattened = True
-        return cls._flat_data
+        data = {}
+        cls._add_clusters_data(data, clusters)
+        return {"data": data, "master_ids": cls._get_master_ids(data)}
 
     @classmethod
     def get_layout_by_chebi_id(cls, synonym_chebi_ids: str | list[str]) -> CompoundLayoutDict:
-        """ Get layout position matching with the CheBI id """
+        """
+        Get layout position matching with the CheBI id
+
+        The cluster records of the layout are shallow copies of the shared read-only records, without their
+        alternative chebi ids (`alt` is None): they can be modified by the caller.
+        """
 
         position = {"x": None, "y": None, "clusters": {}}
         if not synonym_chebi_ids:
@@ -115,11 +281,11 @@ class CompoundLayout:
         clusters: list[CompoundClusterDict] = {}
 
         if isinstance(synonym_chebi_ids, str):
-            clusters = cls.get_flat_data().get(synonym_chebi_ids, {})
+            clusters = cls._get_flat_data().get(synonym_chebi_ids, {})
         else:
             # look up and take the first one
             for chebi_id in synonym_chebi_ids:
-                clusters = cls.get_flat_data().get(chebi_id, {})
+                clusters = cls._get_flat_data().get(chebi_id, {})
                 if clusters:
                     break
 
@@ -131,12 +297,9 @@ class CompoundLayout:
             "x": None,
             "y": None,
             "level": default_position.get("level", 2),
-            "clusters": clusters  # copy.deepcopy(clusters),
+            "clusters": {c_name: dict(record) for c_name, record in clusters.items()},
         }
 
-        for c_name in position["clusters"]:
-            position["clusters"][c_name]["alt"] = None
-
         return position
 
     @classmethod
@@ -174,7 +337,7 @@ class CompoundLayout:
     @classmethod
     def retreive_master_chebi_id(cls, chebi_id) -> dict:
         """ Get layout position matching with the CheBI id """
-        cls.get_flat_data()
+        cls._get_flat_data()
         if chebi_id in cls._master_ids_map:
             return cls._master_ids_map[chebi_id]
         else:
@@ -194,6 +357,9 @@ class CompoundLayout:
                             chebi_id, cluster_id, level, x, y)
         except Exception as err:
             raise BadRequestException(f"An error occur when parsing layout files. Message {err}") from err
+        finally:
+            # the modified files are detected by their modification time when the index is loaded again
+            cls.invalidate()
 
     @classmethod
     def _update_compound_layout_in_file(cls, file_path, chebi_id, cluster_id, level, x, y):
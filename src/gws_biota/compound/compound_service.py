@@ -3,12 +3,14 @@
 import math
 
 from gws_core import Logger, MessageDispatcher
-from peewee import chunked
 
 from .._helper.chebi import Chebi as ChebiHelper
 from .._helper.ontology import Onto as OntoHelper
 from ..base.base_service import BaseService
+from ..base.natural_key_resolver import NaturalKeyResolver
 from ..compound.compound import Compound, CompoundAncestor
+from ..db.db_checkpoint import DbCheckpoint
+from ..ontology.ontology_closure import OntologyClosure
 
 
 class CompoundService(BaseService):
@@ -28,17 +30,23 @@ class CompoundService(BaseService):
         return val
 
     @classmethod
-    def create_compound_db(cls, path, compound_file, message_dispatcher: MessageDispatcher = None) -> None:
+    def create_compound_db(cls, path, compound_file, message_dispatcher: MessageDispatcher = None,
+                           checkpoint: DbCheckpoint = None) -> None:
         """
         Creates and fills the `chebi_ontology` database
 
         :type compound_file_path: file
         :param compound_file_path: path of chebi data
+        :param checkpoint: If given, the parsed ChEBI terms and the completed save phases are checkpointed,
+        and the phases completed by a previous build are skipped
+        :type checkpoint: DbCheckpoint
         :returns: None
         :rtype: None
         """
         if message_dispatcher is None:
             message_dispatcher = MessageDispatcher()
+        if checkpoint is None:
+            checkpoint = DbCheckpoint("compound", message_dispatcher=message_dispatcher)
 
         Logger.info("=" * 80)
         Logger.info("STARTING COMPOUND DATABASE CREATION")
@@ -59,119 +67,111 @@ class CompoundService(BaseService):
         except Exception as e:
             Logger.warning(f"Could not set max_allowed_packet: {e}")
 
-        data_dir, corrected_file_name = ChebiHelper.correction_of_chebi_file(
-            path, compound_file)
-        onto_chebi = OntoHelper.create_ontology_from_file(
-            data_dir, corrected_file_name)
+        def _parse_chebi():
+            data_dir, corrected_file_name = ChebiHelper.correction_of_chebi_file(
+                path, compound_file)
+            onto_chebi = OntoHelper.create_ontology_from_file(
+                data_dir, corrected_file_name)
+            return OntoHelper.parse_chebi_from_ontology(onto_chebi)
 
-        list_chebi = OntoHelper.parse_chebi_from_ontology(onto_chebi)
+        # the terms parsed before the `parents` key was added are parsed again
+        list_chebi = checkpoint.load_or_parse("chebi_terms_with_parents", _parse_chebi)
 
         comp_count = len(list_chebi)
         Logger.info(f"Saving {comp_count} compounds ...")
         compounds = [Compound(data=data) for data in list_chebi]
-        for compound_chunk in chunked(compounds, cls.COMPOUND_BATCH_SIZE):
-            for comp in compound_chunk:
-                comp.set_name(comp.data["name"])
-                comp.chebi_id = comp.data["id"]
-                comp.formula = comp.data["formula"]
-                comp.inchi = comp.data["inchi"]
-                comp.inchikey = comp.data["inchikey"]
-                comp.smiles = comp.data["smiles"]
-                if comp.data["mass"] is not None:
-                    comp.mass = cls._to_float(comp.data["mass"])
-                if comp.data["monoisotopic_mass"] is not None:
-                    comp.monoisotopic_mass = cls._to_float(
-                        comp.data["monoisotopic_mass"])
-                if comp.data["charge"] is not None:
-                    comp.charge = cls._to_float(comp.data["charge"])
-                comp.chebi_star = comp.data["subsets"]
-                if "kegg" in comp.data["xref"]:
-                    comp.kegg_id = comp.data["xref"]["kegg"]
-                    del comp.data["xref"]["kegg"]
-                elif "kegg.compound" in comp.data["xref"]:
-                    comp.kegg_id = comp.data["xref"]["kegg.compound"]
-                    del comp.data["xref"]["kegg.compound"]
-                if "metacyc" in comp.data["xref"]:
-                    comp.metacyc_id = comp.data["xref"]["metacyc"]
-                    del comp.data["xref"]["metacyc"]
-                elif "metacyc.compound" in comp.data["xref"]:
-                    comp.metacyc_id = comp.data["xref"]["metacyc.compound"]
-                    del comp.data["xref"]["metacyc.compound"]
-
-                all_ids = [comp.chebi_id, *comp.alt_chebi_ids]
-                if comp.kegg_id is not None:
-                    all_ids.append(comp.kegg_id)
-                all_ids_trimed = [elt.replace(":", "") for elt in all_ids]
-                ft_names = [comp.data["name"], *all_ids_trimed]
-                comp.ft_names = cls.format_ft_names(ft_names)
-
-                del comp.data["id"]
-                del comp.data["inchi"]
-                del comp.data["formula"]
-                del comp.data["inchikey"]
-                del comp.data["smiles"]
-                del comp.data["mass"]
-                del comp.data["monoisotopic_mass"]
-                del comp.data["charge"]
-                del comp.data["subsets"]
-            Compound.create_all(compound_chunk)
+        for comp in compounds:
+            comp.set_name(comp.data["name"])
+            comp.chebi_id = comp.data["id"]
+            comp.formula = comp.data["formula"]
+            comp.inchi = comp.data["inchi"]
+            comp.inchikey = comp.data["inchikey"]
+            comp.smiles = comp.data["smiles"]
+            if comp.data["mass"] is not None:
+                comp.mass = cls._to_float(comp.data["mass"])
+            if comp.data["monoisotopic_mass"] is not None:
+                comp.monoisotopic_mass = cls._to_float(
+                    comp.data["monoisotopic_mass"])
+            if comp.data["charge"] is not None:
+                comp.charge = cls._to_float(comp.data["charge"])
+            comp.chebi_star = comp.data["subsets"]
+            if "kegg" in comp.data["xref"]:
+                comp.kegg_id = comp.data["xref"]["kegg"]
+                del comp.data["xref"]["kegg"]
+            elif "kegg.compound" in comp.data["xref"]:
+                comp.kegg_id = comp.data["xref"]["kegg.compound"]
+                del comp.data["xref"]["kegg.compound"]
+            if "metacyc" in comp.data["xref"]:
+                comp.metacyc_id = comp.data["xref"]["metacyc"]
+                del comp.data["xref"]["metacyc"]
+            elif "metacyc.compound" in comp.data["xref"]:
+                comp.metacyc_id = comp.data["xref"]["metacyc.compound"]
+                del comp.data["xref"]["metacyc.compound"]
+
+            all_ids = [comp.chebi_id, *comp.alt_chebi_ids]
+            if comp.kegg_id is not None:
+                all_ids.append(comp.kegg_id)
+            all_ids_trimed = [elt.replace(":", "") for elt in all_ids]
+            ft_names = [comp.data["name"], *all_ids_trimed]
+            comp.ft_names = cls.format_ft_names(ft_names)
+
+            del comp.data["id"]
+            del comp.data["inchi"]
+            del comp.data["formula"]
+            del comp.data["inchikey"]
+            del comp.data["smiles"]
+            del comp.data["mass"]
+            del comp.data["monoisotopic_mass"]
+            del comp.data["charge"]
+            del comp.data["subsets"]
+
+        if not checkpoint.run_phase(
+                "compounds", lambda: Compound.bulk_load(compounds, batch_size=cls.COMPOUND_BATCH_SIZE),
+                tables=[CompoundAncestor, Compound]):
+            # the ancestors need the saved compounds (with their ids)
+            compounds = list(Compound.select())
 
         # save ancestors
         Logger.info("-" * 80)
         Logger.info("STEP 2: Inserting compound ancestor relationships")
         Logger.info("-" * 80)
 
-        vals = []
-        for compound in compounds:
-            val = cls._get_ancestors_query(compound)
-            for v in val:
-                vals.append(v)
-
-        Logger.info(f"Generated {len(vals)} ancestor relationship records")
-
-        # Deduplicate before insertion
-        vals = cls._deduplicate_ancestor_vals(vals, 'compound', 'ancestor')
-        Logger.info(f"After deduplication: {len(vals)} records to insert")
-
-        if vals:
-            expected_ancestor_count = len(vals)
-            Logger.info(f"Inserting {expected_ancestor_count} compound ancestor relationships...")
-            CompoundAncestor.insert_all(vals)
-
-            # Verify actual count in DB
-            actual_ancestor_count = CompoundAncestor.select().count()
-            if actual_ancestor_count != expected_ancestor_count:
-                Logger.warning(f"⚠ COUNT MISMATCH: Expected {expected_ancestor_count} ancestors, but DB has {actual_ancestor_count}")
-                message_dispatcher.notify_info_message(f"⚠ Warning: Expected {expected_ancestor_count} but inserted {actual_ancestor_count} compound ancestors")
+        def _save_ancestors():
+            resolver = NaturalKeyResolver.from_models(compounds, "chebi_id")
+            closure = OntologyClosure({compound.chebi_id: compound.data.get("parents") for compound in compounds})
+            vals = resolver.resolve_closure(closure, term_field="compound")
+
+            Logger.info(f"Generated {len(vals)} ancestor relationship records")
+            resolver.log_unresolved()
+
+            # Deduplicate before insertion
+            vals = cls._deduplicate_ancestor_vals(vals, 'compound', 'ancestor')
+            Logger.info(f"After deduplication: {len(vals)} records to insert")
+
+            if vals:
+                expected_ancestor_count = len(vals)
+                Logger.info(f"Inserting {expected_ancestor_count} compound ancestor relationships...")
+                CompoundAncestor.bulk_load(vals, batch_size=cls.BATCH_SIZE)
+
+                # Verify actual count in DB
+                actual_ancestor_count = CompoundAncestor.select().count()
+                if actual_ancestor_count != expected_ancestor_count:
+                    Logger.warning(f"⚠ COUNT MISMATCH: Expected {expected_ancestor_count} ancestors, but DB has {actual_ancestor_count}")
+                    message_dispatcher.notify_info_message(f"⚠ Warning: Expected {expected_ancestor_count} but inserted {actual_ancestor_count} compound ancestors")
+                else:
+                    Logger.info(f"✓ Successfully inserted {actual_ancestor_count} ancestor relationships")
+                    message_dispatcher.notify_info_message(f"✓ Inserted {actual_ancestor_count} compound ancestors")
             else:
-                Logger.info(f"✓ Successfully inserted {actual_ancestor_count} ancestor relationships")
-                message_dispatcher.notify_info_message(f"✓ Inserted {actual_ancestor_count} compound ancestors")
-        else:
-            Logger.warning("⚠ No ancestor relationships to insert")
+                Logger.warning("⚠ No ancestor relationships to insert")
+
+        checkpoint.run_phase("ancestors", _save_ancestors, tables=[CompoundAncestor])
+        checkpoint.complete()
 
         Logger.info("=" * 80)
         Logger.info("COMPOUND DATABASE CREATION COMPLETED SUCCESSFULLY")
         Logger.info("=" * 80)
         message_dispatcher.notify_info_message("✓ Compound database completed!")
 
-    @classmethod
-    def _get_ancestors_query(cls, compound):
-        """
-        Look for the compound term ancestors and returns all ancetors relations in a list
-
-        :returns: a list of dictionnaries inf the following format: {'compound': self.id, 'ancestor': ancestor.id}
-        :rtype: list
-        """
-        vals = []
-        if 'ancestors' not in compound.data:
-            return vals
-        for ancestor in compound.data['ancestors']:
-            if ancestor != compound.chebi_id:
-                val = {'compound': compound.id, 'ancestor': Compound.get(
-                    Compound.chebi_id == ancestor).id}
-                vals.append(val)
-        return vals
-
     @classmethod
     def _deduplicate_ancestor_vals(cls, vals: list[dict], key1: str, key2: str) -> list[dict]:
         """Remove duplicate ancestor relationships"""
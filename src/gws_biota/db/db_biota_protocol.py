@@ -23,6 +23,14 @@ from .db_taxonomy_creator import TaxonomyDBCreator
     style=TypingStyle.material_icon(material_icon_name="database", background_color="#2b6d57"),
 )
 class UpdateBiotaDB(Protocol):
+    """
+    Rebuilds all the BIOTA databases.
+
+    The compound, enzyme and reaction creators checkpoint their parsed source files and their completed
+    save phases (see `DbCheckpoint`): if the protocol fails, a rerun with the same source files skips
+    the parsing and resumes each of these creators at its first incomplete phase.
+    """
+
     # Create instances of various database creators and assign them to variables
     def configure_protocol(self) -> None:
         bto: ProcessSpec = self.add_process(BtoDBCreator, "bto")
@@ -0,0 +1,201 @@
+import gzip
+import json
+import os
+import pickle
+import shutil
+from typing import Any, Callable
+
+from gws_core import Logger, MessageDispatcher, Settings
+
+from .._helper.file_hash import compute_hash
+from ..base.protected_base_model import ProtectedBaseModel
+
+
+class DbCheckpoint:
+    """
+    Checkpoints of a database creator, so that a failed build can be resumed.
+
+    The checkpoint of a creator is keyed by a hash of its source files, and stores:
+
+    * the parsed intermediate outputs (e.g. the parsed BRENDA enzymes, Rhea reactions or ChEBI terms),
+      pickled and gzipped, so that a rerun skips the parsing
+    * the save phases that finished, so that a rerun resumes at the first incomplete phase
+
+    The phases are cleared when the build completes. The parsed outputs are kept and reused by the next builds
+    as long as the source files do not change.
+
+    A checkpoint created without source files is not persisted: it only runs the parsing and the phases.
+    """
+
+    PHASES_FILE = "phases.json"
+
+    _name: str = None
+    _key: str = None
+    _dir: str = None
+    _completed_phases: list[str] = None
+    _message_dispatcher: MessageDispatcher = None
+
+    def __init__(self, name: str, source_files: list[str] = None, checkpoint_dir: str = None,
+                 message_dispatcher: MessageDispatcher = None):
+        """
+        :param name: Name of the creator (e.g. `enzyme`)
+        :type name: str
+        :param source_files: Paths of the source files (or directories) of the build. If None, the checkpoint
+        is not persisted.
+        :type source_files: list[str]
+        :param checkpoint_dir: Root directory of the checkpoints (defaults to the `gws_biota` data directory)
+        :type checkpoint_dir: str
+        """
+        self._name = name
+        self._message_dispatcher = message_dispatcher or MessageDispatcher()
+        self._completed_phases = []
+        if source_files is None:
+            return
+
+        if checkpoint_dir is None:
+            checkpoint_dir = self.get_default_checkpoint_dir()
+        self._key = self.compute_hash([path for path in source_files if path])
+        self._dir = os.path.join(checkpoint_dir, name, self._key)
+        os.makedirs(self._dir, exist_ok=True)
+        self._completed_phases = self._read_phases()
+
+        # remove the checkpoints of older source files
+        for key in os.listdir(os.path.join(checkpoint_dir, name)):
+            if key != self._key:
+                shutil.rmtree(os.path.join(checkpoint_dir, name, key), ignore_errors=True)
+
+        if self._completed_phases:
+            self._notify(f"Resuming the {name} build: completed phases {', '.join(self._completed_phases)}")
+
+    # -- C --
+
+    def complete(self) -> None:
+        """ Marks the build as complete: the phases are cleared, the parsed outputs are kept """
+        self._completed_phases = []
+        if self._dir is None:
+            return
+        phases_path = os.path.join(self._dir, self.PHASES_FILE)
+        if os.path.exists(phases_path):
+            os.unlink(phases_path)
+
+    @classmethod
+    def compute_hash(cls, paths: list[str]) -> str:
+        """
+        Returns the sha256 of the content of files or directories
+
+        :param paths: Paths of the files or directories
+        :type paths: list[str]
+        :returns: The hexadecimal hash
+        :rtype: str
+        """
+        return compute_hash(paths)
+
+    # -- G --
+
+    @classmethod
+    def get_default_checkpoint_dir(cls) -> str:
+        return os.path.join(Settings.get_instance().get_data_dir(), "gws_biota", "db_checkpoints")
+
+    # -- I --
+
+    @property
+    def is_persistent(self) -> bool:
+        """ Returns True if the checkpoint is saved on disk (i.e. it was created with source files) """
+        return self._dir is not None
+
+    @property
+    def is_resuming(self) -> bool:
+        """ Returns True if a previous build stopped after completing some phases """
+        return len(self._completed_phases) > 0
+
+    def is_phase_done(self, phase: str) -> bool:
+        return phase in self._completed_phases
+
+    # -- L --
+
+    def load_or_parse(self, output_name: str, parse_fn: Callable[[], Any]) -> Any:
+        """
+        Returns a parsed output stored in the checkpoint, or calls `parse_fn` and stores its result
+
+        :param output_name: Name of the output (e.g. `brenda_enzymes`)
+        :type output_name: str
+        :param parse_fn: Function that parses the source files
+        :type parse_fn: Callable
+        :returns: The parsed output
+        """
+        if self._dir is None:
+            return parse_fn()
+
+        output_path = os.path.join(self._dir, output_name + ".pkl.gz")
+        if os.path.exists(output_path):
+            try:
+                with gzip.open(output_path, "rb") as fp:
+                    output = pickle.load(fp)
+                self._notify(f"✓ Parsed {output_name} loaded from checkpoint")
+                return output
+            except Exception as err:
+                Logger.warning(f"Could not load the {output_name} checkpoint, parsing again: {err}")
+
+        output = parse_fn()
+        tmp_path = output_path + ".tmp"
+        with gzip.open(tmp_path, "wb", compresslevel=1) as fp:
+            pickle.dump(output, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, output_path)
+        Logger.info(f"✓ Parsed {output_name} saved in checkpoint {output_path}")
+        return output
+
+    # -- M --
+
+    def mark_phase_done(self, phase: str) -> None:
+        if phase not in self._completed_phases:
+            self._completed_phases.append(phase)
+        if self._dir is not None:
+            self._write_phases()
+
+    # -- R --
+
+    def run_phase(self, phase: str, phase_fn: Callable[[], Any],
+                  tables: list[type[ProtectedBaseModel]] = None) -> bool:
+        """
+        Runs a save phase, unless it was completed by a previous build
+
+        :param phase: Name of the phase
+        :type phase: str
+        :param phase_fn: Function that runs the phase
+        :type phase_fn: Callable
+        :param tables: Tables filled by the phase. They are emptied before running the phase, to remove
+        the rows saved by an interrupted build.
+        :type tables: list[type[ProtectedBaseModel]]
+        :returns: True if the phase was run, False if it was skipped
+        :rtype: bool
+        """
+        if self.is_phase_done(phase):
+            self._notify(f"✓ Phase '{phase}' already completed, skipped")
+            return False
+        if self.is_resuming:
+            for table in tables or []:
+                table.delete().execute()
+        phase_fn()
+        self.mark_phase_done(phase)
+        return True
+
+    def _read_phases(self) -> list[str]:
+        phases_path = os.path.join(self._dir, self.PHASES_FILE)
+        if not os.path.exists(phases_path):
+            return []
+        try:
+            with open(phases_path, "r", encoding="utf-8") as fp:
+                return json.load(fp)
+        except Exception as err:
+            Logger.warning(f"Could not read the {self._name} checkpoint phases: {err}")
+            return []
+
+    def _write_phases(self) -> None:
+        phases_path = os.path.join(self._dir, self.PHASES_FILE)
+        with open(phases_path + ".tmp", "w", encoding="utf-8") as fp:
+            json.dump(self._completed_phases, fp)
+        os.replace(phases_path + ".tmp", phases_path)
+
+    def _notify(self, message: str) -> None:
+        Logger.info(message)
+        self._message_dispatcher.notify_info_message(message)
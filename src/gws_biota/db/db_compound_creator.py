@@ -23,6 +23,7 @@ from gws_biota import Compound
 from gws_biota.compound.compound import CompoundAncestor
 from gws_biota.compound.compound_service import CompoundService
 
+from .db_checkpoint import DbCheckpoint
 from .db_service import DbService
 
 
@@ -58,49 +59,6 @@ class CompoundDBCreator(Task):
         except:
             self.log_info_message("Current CompoundAncestor records: Table doesn't exist or is empty")
 
-        # Deleting the database...
-        self.log_info_message("-" * 60)
-        self.log_info_message("Deleting the CHEBI database...")
-        DbService.drop_biota_tables([Compound, CompoundAncestor], self.message_dispatcher)
-        self.log_info_message("✓ Tables dropped successfully")
-
-        # Verify tables are dropped
-        c_after_drop = 0
-        a_after_drop = 0
-        try:
-            c_after_drop = Compound.select().count()
-            a_after_drop = CompoundAncestor.select().count()
-        except:
-            self.log_info_message("✓ Tables don't exist (expected after drop)")
-        if c_after_drop > 0 or a_after_drop > 0:
-            raise Exception(f"ERROR: Tables not empty after drop! Compound:{c_after_drop}, Ancestor:{a_after_drop}. Drop table failed, aborting script.")
-        else:
-            self.log_info_message("✓ Verified: Tables empty after drop")
-
-        # ... to build it from 0
-        self.log_info_message("Creating the CHEBI database...")
-        DbService.create_biota_tables([Compound, CompoundAncestor], self.message_dispatcher)
-        self.log_info_message("✓ Tables created successfully")
-
-        # Verify tables are empty after creation
-        try:
-            c_after_create = Compound.select().count()
-            a_after_create = CompoundAncestor.select().count()
-            if c_after_create > 0 or a_after_create > 0:
-                self.log_info_message(f"⚠ WARNING: Tables not empty after create! Compound:{c_after_create}, Ancestor:{a_after_create}")
-            else:
-                self.log_info_message("✓ Verified: Tables empty and ready for data")
-        except Exception as e:
-            self.log_info_message(f"Could not verify tables: {e}")
-
-        # Verify tables are empty
-        try:
-            compound_count = Compound.select().count()
-            ancestor_count = CompoundAncestor.select().count()
-            self.log_info_message(f"Verification - Compound: {compound_count}, Ancestor: {ancestor_count}")
-        except Exception as e:
-            self.log_info_message(f"Could not verify: {e}")
-
         # Check that the url exists and works
         for key, url in params.items():
             try:
@@ -124,7 +82,57 @@ class CompoundDBCreator(Task):
             params["compound_file"], filename="chebi.obo")
         self.log_info_message("✓ chebi.obo downloaded")
 
-        CompoundService.create_compound_db(destination_dir, compound_file_path, self.message_dispatcher)
+        # Resume the previous build if it stopped before completion with the same source file
+        checkpoint = DbCheckpoint("compound", [compound_file_path], message_dispatcher=self.message_dispatcher)
+
+        if checkpoint.is_resuming:
+            self.log_info_message("Previous CHEBI build found, resuming it without deleting the tables")
+        else:
+            # Deleting the database...
+            self.log_info_message("-" * 60)
+            self.log_info_message("Deleting the CHEBI database...")
+            DbService.drop_biota_tables([Compound, CompoundAncestor], self.message_dispatcher)
+            self.log_info_message("✓ Tables dropped successfully")
+
+            # Verify tables are dropped
+            c_after_drop = 0
+            a_after_drop = 0
+            try:
+                c_after_drop = Compound.select().count()
+                a_after_drop = CompoundAncestor.select().count()
+            except:
+                self.log_info_message("✓ Tables don't exist (expected after drop)")
+            if c_after_drop > 0 or a_after_drop > 0:
+                raise Exception(f"ERROR: Tables not empty after drop! Compound:{c_after_drop}, Ancestor:{a_after_drop}. Drop table failed, aborting script.")
+            else:
+                self.log_info_message("✓ Verified: Tables empty after drop")
+
+            # ... to build it from 0
+            self.log_info_message("Creating the CHEBI database...")
+            DbService.create_biota_tables([Compound, CompoundAncestor], self.message_dispatcher)
+            self.log_info_message("✓ Tables created successfully")
+
+            # Verify tables are empty after creation
+            try:
+                c_after_create = Compound.select().count()
+                a_after_create = CompoundAncestor.select().count()
+                if c_after_create > 0 or a_after_create > 0:
+                    self.log_info_message(f"⚠ WARNING: Tables not empty after create! Compound:{c_after_create}, Ancestor:{a_after_create}")
+                else:
+                    self.log_info_message("✓ Verified: Tables empty and ready for data")
+            except Exception as e:
+                self.log_info_message(f"Could not verify tables: {e}")
+
+            # Verify tables are empty
+            try:
+                compound_count = Compound.select().count()
+                ancestor_count = CompoundAncestor.select().count()
+                self.log_info_message(f"Verification - Compound: {compound_count}, Ancestor: {ancestor_count}")
+            except Exception as e:
+                self.log_info_message(f"Could not verify: {e}")
+
+        CompoundService.create_compound_db(destination_dir, compound_file_path, self.message_dispatcher,
+                                           checkpoint=checkpoint)
 
         # Final verification
         self.log_info_message("-" * 60)
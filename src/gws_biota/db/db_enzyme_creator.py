@@ -10,6 +10,7 @@ from gws_core import (
     FileDownloader,
     InputSpec,
     InputSpecs,
+    IntParam,
     OutputSpec,
     OutputSpecs,
     Settings,
@@ -25,13 +26,16 @@ from gws_biota import Enzyme
 from gws_biota.enzyme.deprecated_enzyme import DeprecatedEnzyme
 from gws_biota.enzyme.enzyme import EnzymeBTO
 from gws_biota.enzyme.enzyme_class import EnzymeClass
+from gws_biota.enzyme.enzyme_kinetics import EnzymeKinetics
 from gws_biota.enzyme.enzyme_ortholog import EnzymeOrtholog
 from gws_biota.enzyme.enzyme_pathway import EnzymePathway
 from gws_biota.enzyme.enzyme_service import EnzymeService
 
 from ..bto.bto import BTO
 from ..pathway.pathway import Pathway
-from ..taxonomy.taxonomy import Taxonomy
+from ..taxonomy.taxonomy import Taxonomy, TaxonomyLineage
+from ..taxonomy.taxonomy_service import TaxonomyService
+from .db_checkpoint import DbCheckpoint
 from .db_service import DbService
 
 
@@ -49,7 +53,9 @@ class EnzymeDBCreator(Task):
         default_value="https://raw.githubusercontent.com/google-research/proteinfer/540773f988005cc5ed834210d1477e4db1f141e6/testdata/enzclass.txt"),
         "compound_file": StrParam(default_value="https://ftp.ebi.ac.uk/pub/databases/chebi/ontology/chebi.obo"),
         "bto_file": StrParam(default_value="https://raw.githubusercontent.com/BRENDA-Enzymes/BTO/master/bto.owl"),
-        "taxdump_files": StrParam(default_value="https://ftp.ncbi.nlm.nih.gov/pub/taxonomy/taxdump.tar.gz")})
+        "taxdump_files": StrParam(default_value="https://ftp.ncbi.nlm.nih.gov/pub/taxonomy/taxdump.tar.gz"),
+        "num_workers": IntParam(default_value=8, min_value=1, human_name="Number of workers",
+                                short_description="Number of processes used to parse the BRENDA file")})
 
     # only allow admin user to run this process
     def run(self, params: ConfigParams, inputs: TaskInputs) -> TaskOutputs:
@@ -70,47 +76,17 @@ class EnzymeDBCreator(Task):
             raise Exception(
                 "No data from the TAXONOMY, BTO or PATHWAY databases available in Biota. Please update these databases before the ENZYME database.")
 
-        # Deleting the enzyme database tables...
-        # Order: Drop child tables before parent tables (reverse FK dependencies)
-        self.log_info_message("Deleting the ENZYME database...")
-        enzyme_tables_to_drop = [
-            EnzymeBTO,           # Has FK to Enzyme and BTO
-            Enzyme,              # Has FK to EnzymeOrtholog
-            DeprecatedEnzyme,    # Independent
-            EnzymeOrtholog,      # Has FK to EnzymePathway
-            EnzymePathway,       # Has FK to Pathway (external)
-            EnzymeClass          # Independent
-        ]
-        DbService.drop_biota_tables(enzyme_tables_to_drop, message_dispatcher=self.message_dispatcher)
-
-        # Verify tables are dropped
-        ez_after_drop = 0
-        eo_after_drop = 0
-        try:
-            ez_after_drop = Enzyme.select().count()
-            eo_after_drop = EnzymeOrtholog.select().count()
-        except:
-            self.log_info_message("✓ Tables don't exist (expected after drop)")
-        if ez_after_drop > 0 or eo_after_drop > 0:
-            raise Exception(f"ERROR: Tables not empty after drop! Enzyme:{ez_after_drop}, EnzymeOrtholog:{eo_after_drop}. Drop table failed, aborting script.")
-        else:
-            self.log_info_message("✓ Verified: Tables empty after drop")
-
-        # Creating enzyme database tables from scratch...
-        # Order: Create parent tables before child tables (follow FK dependencies)
-        self.log_info_message("Creating the ENZYME database...")
-        enzyme_tables_to_create = [
-            EnzymeClass,         # Independent
-            EnzymePathway,       # Depends on Pathway (external)
-            EnzymeOrtholog,      # Depends on EnzymePathway
-            Enzyme,              # Depends on EnzymeOrtholog
-            DeprecatedEnzyme,    # Independent
-            EnzymeBTO            # Depends on Enzyme and BTO
-        ]
-        DbService.create_biota_tables(enzyme_tables_to_create, message_dispatcher=self.message_dispatcher)
+        # Taxonomy databases built before the lineage table existed: materialize it now
+        if not TaxonomyLineage.table_exists() or TaxonomyLineage.select().count() == 0:
+            self.log_info_message("Taxonomy lineages not found, computing them from the TAXONOMY database...")
+            DbService.drop_biota_tables([TaxonomyLineage], message_dispatcher=self.message_dispatcher)
+            DbService.create_biota_tables([TaxonomyLineage], message_dispatcher=self.message_dispatcher)
+            TaxonomyService.create_taxonomy_lineage_db(message_dispatcher=self.message_dispatcher)
 
         # Check that all url exist and work
         for key, url in params.items():
+            if key == "num_workers":
+                continue
             try:
                 response = requests.head(url)
                 response.raise_for_status()
@@ -222,10 +198,60 @@ class EnzymeDBCreator(Task):
         else:
             self.log_info_message("BRENDA file is not compressed, using as-is")
 
+        # Resume the previous build if it stopped before completion with the same source files
+        checkpoint = DbCheckpoint(
+            "enzyme", [brenda_file_path, bkms_file, expasy_file, taxdump_files, bto_file, compound_file],
+            message_dispatcher=self.message_dispatcher)
+
+        if checkpoint.is_resuming:
+            self.log_info_message("Previous ENZYME build found, resuming it without deleting the tables")
+        else:
+            # Deleting the enzyme database tables...
+            # Order: Drop child tables before parent tables (reverse FK dependencies)
+            self.log_info_message("Deleting the ENZYME database...")
+            enzyme_tables_to_drop = [
+                EnzymeBTO,           # Has FK to Enzyme and BTO
+                EnzymeKinetics,      # Has FK to Enzyme
+                Enzyme,              # Has FK to EnzymeOrtholog
+                DeprecatedEnzyme,    # Independent
+                EnzymeOrtholog,      # Has FK to EnzymePathway
+                EnzymePathway,       # Has FK to Pathway (external)
+                EnzymeClass          # Independent
+            ]
+            DbService.drop_biota_tables(enzyme_tables_to_drop, message_dispatcher=self.message_dispatcher)
+
+            # Verify tables are dropped
+            ez_after_drop = 0
+            eo_after_drop = 0
+            try:
+                ez_after_drop = Enzyme.select().count()
+                eo_after_drop = EnzymeOrtholog.select().count()
+            except:
+                self.log_info_message("✓ Tables don't exist (expected after drop)")
+            if ez_after_drop > 0 or eo_after_drop > 0:
+                raise Exception(f"ERROR: Tables not empty after drop! Enzyme:{ez_after_drop}, EnzymeOrtholog:{eo_after_drop}. Drop table failed, aborting script.")
+            else:
+                self.log_info_message("✓ Verified: Tables empty after drop")
+
+            # Creating enzyme database tables from scratch...
+            # Order: Create parent tables before child tables (follow FK dependencies)
+            self.log_info_message("Creating the ENZYME database...")
+            enzyme_tables_to_create = [
+                EnzymeClass,         # Independent
+                EnzymePathway,       # Depends on Pathway (external)
+                EnzymeOrtholog,      # Depends on EnzymePathway
+                Enzyme,              # Depends on EnzymeOrtholog
+                DeprecatedEnzyme,    # Independent
+                EnzymeBTO,           # Depends on Enzyme and BTO
+                EnzymeKinetics       # Depends on Enzyme
+            ]
+            DbService.create_biota_tables(enzyme_tables_to_create, message_dispatcher=self.message_dispatcher)
+
         self.log_info_message("Creating enzyme database from downloaded files...")
         EnzymeService.create_enzyme_db(
             brenda_file=brenda_file_path, bkms_file=bkms_file, expasy_file=expasy_file, taxonomy_file=taxdump_files,
-            bto_file=bto_file, compound_file=compound_file, message_dispatcher=self.message_dispatcher)
+            bto_file=bto_file, compound_file=compound_file, message_dispatcher=self.message_dispatcher,
+            checkpoint=checkpoint, num_workers=params["num_workers"])
 
         # Final verification
         self.log_info_message("-" * 60)
@@ -238,6 +264,7 @@ class EnzymeDBCreator(Task):
             final_ortholog = EnzymeOrtholog.select().count()
             final_deprecated = DeprecatedEnzyme.select().count()
             final_bto = EnzymeBTO.select().count()
+            final_kinetics = EnzymeKinetics.select().count()
             self.log_info_message(f"Final counts:")
             self.log_info_message(f"  - Enzymes: {final_enzyme}")
             self.log_info_message(f"  - EnzymeClasses: {final_class}")
@@ -245,7 +272,8 @@ class EnzymeDBCreator(Task):
             self.log_info_message(f"  - EnzymeOrthologs: {final_ortholog}")
             self.log_info_message(f"  - DeprecatedEnzymes: {final_deprecated}")
             self.log_info_message(f"  - EnzymeBTO: {final_bto}")
-            success_msg = f"✓ Enzyme database created successfully:\n  - Enzymes: {final_enzyme}\n  - Classes: {final_class}\n  - Pathways: {final_pathway}\n  - Orthologs: {final_ortholog}\n  - Deprecated: {final_deprecated}\n  - BTO: {final_bto}"
+            self.log_info_message(f"  - EnzymeKinetics: {final_kinetics}")
+            success_msg = f"✓ Enzyme database created successfully:\n  - Enzymes: {final_enzyme}\n  - Classes: {final_class}\n  - Pathways: {final_pathway}\n  - Orthologs: {final_ortholog}\n  - Deprecated: {final_deprecated}\n  - BTO: {final_bto}\n  - Kinetics: {final_kinetics}"
         except Exception as e:
             self.log_info_message(f"Could not get final counts: {e}")
             success_msg = f"✓ Enzyme database created (counts unavailable: {e})"
@@ -88,7 +88,7 @@ class ProteinDBCreator(Task):
         protein_file = file_downloader.download_file_if_missing(
             params["protein_file"], filename="uniprot_sprot.fasta.gz")
 
-        ProteinService.create_protein_db(destination_dir, protein_file)
+        ProteinService.create_protein_db(destination_dir, protein_file, message_dispatcher=self.message_dispatcher)
 
         # Clean Python cache after execution
         self.log_info_message("Cleaning cache after execution...")
@@ -26,6 +26,7 @@ from gws_biota.reaction.reaction_service import ReactionService
 from ..compound.compound_service import Compound
 from ..enzyme.enzyme_service import Enzyme
 from ..taxonomy.taxonomy import Taxonomy
+from .db_checkpoint import DbCheckpoint
 from .db_service import DbService
 
 
@@ -61,37 +62,6 @@ class ReactionDBCreator(Task):
             raise Exception(
                 "No data from the TAXONOMY, COMPOUND or ENZYME databases available in Biota. Please update these databases before the ENZYME database.")
 
-        # Deleting the database...
-        self.log_info_message("Deleting the RHEA database...")
-        DbService.drop_biota_tables([Reaction], message_dispatcher=self.message_dispatcher)
-        self.log_info_message("✓ Tables dropped (Reaction + related tables)")
-
-        # Verify tables are dropped (Reaction.drop_table() handles all related tables)
-        r_after_drop = 0
-        try:
-            r_after_drop = Reaction.select().count()
-        except:
-            self.log_info_message("✓ Tables don't exist (expected after drop)")
-        if r_after_drop > 0:
-            raise Exception(f"ERROR: Tables not empty after drop! Reaction:{r_after_drop}. Drop table failed, aborting script.")
-        else:
-            self.log_info_message("✓ Verified: All tables empty after drop")
-
-        # ... to build it from 0
-        self.log_info_message("Creating the RHEA database...")
-        DbService.create_biota_tables([Reaction], message_dispatcher=self.message_dispatcher)
-        self.log_info_message("✓ Tables created (Reaction + related tables)")
-
-        # Verify tables are empty after creation
-        try:
-            r_after_create = Reaction.select().count()
-            if r_after_create > 0:
-                self.log_info_message(f"⚠ WARNING: Tables not empty after create! Reaction:{r_after_create}")
-            else:
-                self.log_info_message("✓ Verified: All tables empty and ready for data")
-        except Exception as e:
-            self.log_info_message(f"Could not verify tables: {e}")
-
         # Check that all url exist and work
         for key, url in params.items():
             try:
@@ -181,9 +151,50 @@ class ReactionDBCreator(Task):
                             new_reactions_file.write(f"{enzyme}")
                     new_reactions_file.write("///\n")
 
+        # Resume the previous build if it stopped before completion with the same source files
+        checkpoint = DbCheckpoint("reaction", [
+            f"{destination_dir}/rhea_reactions.txt", rhea_direction_file, rhea2ecocyc_file, rhea2metacyc_file,
+            rhea2macie_file, rhea2kegg_reaction_file, rhea2ec_file, rhea2reactome_file],
+            message_dispatcher=self.message_dispatcher)
+
+        if checkpoint.is_resuming:
+            self.log_info_message("Previous RHEA build found, resuming it without deleting the tables")
+        else:
+            # Deleting the database...
+            self.log_info_message("Deleting the RHEA database...")
+            DbService.drop_biota_tables([Reaction], message_dispatcher=self.message_dispatcher)
+            self.log_info_message("✓ Tables dropped (Reaction + related tables)")
+
+            # Verify tables are dropped (Reaction.drop_table() handles all related tables)
+            r_after_drop = 0
+            try:
+                r_after_drop = Reaction.select().count()
+            except:
+                self.log_info_message("✓ Tables don't exist (expected after drop)")
+            if r_after_drop > 0:
+                raise Exception(f"ERROR: Tables not empty after drop! Reaction:{r_after_drop}. Drop table failed, aborting script.")
+            else:
+                self.log_info_message("✓ Verified: All tables empty after drop")
+
+            # ... to build it from 0
+            self.log_info_message("Creating the RHEA database...")
+            DbService.create_biota_tables([Reaction], message_dispatcher=self.message_dispatcher)
+            self.log_info_message("✓ Tables created (Reaction + related tables)")
+
+            # Verify tables are empty after creation
+            try:
+                r_after_create = Reaction.select().count()
+                if r_after_create > 0:
+                    self.log_info_message(f"⚠ WARNING: Tables not empty after create! Reaction:{r_after_create}")
+                else:
+                    self.log_info_message("✓ Verified: All tables empty and ready for data")
+            except Exception as e:
+                self.log_info_message(f"Could not verify tables: {e}")
+
         ReactionService.create_reaction_db(
             destination_dir, f"{destination_dir}/rhea_reactions.txt", rhea_direction_file, rhea2ecocyc_file,
-            rhea2metacyc_file, rhea2macie_file, rhea2kegg_reaction_file, rhea2ec_file, rhea2reactome_file)
+            rhea2metacyc_file, rhea2macie_file, rhea2kegg_reaction_file, rhea2ec_file, rhea2reactome_file,
+            checkpoint=checkpoint)
 
         # Clean Python cache after execution
         self.log_info_message("Cleaning cache after execution...")
@@ -1,14 +1,14 @@
 
 
 from gws_core.model.typing_register_decorator import typing_registrator
-from peewee import CharField, ForeignKeyField
+from peewee import CharField, ForeignKeyField, IntegerField
 
 from ..base.protected_base_model import ProtectedBaseModel
-from ..ontology.ontology import Ontology
+from ..ontology.ontology import Ontology, OntologyHierarchy
 
 
 @typing_registrator(unique_name="ECO", object_type="MODEL", hide=True)
-class ECO(Ontology):
+class ECO(OntologyHierarchy, Ontology):
     """
     This class represents Evidence ECO terms.
 
@@ -26,20 +26,6 @@ class ECO(Ontology):
 
     eco_id = CharField(null=True, index=True)
 
-    _ancestors = None
-
-    # -- A --
-
-    @property
-    def ancestors(self):
-        if self._ancestors is not None:
-            return self._ancestors
-        self._ancestors = []
-        query = ECOAncestor.select().where(ECOAncestor.eco == self.id)
-        for elt in query:
-            self._ancestors.append(elt.ancestor)
-        return self._ancestors
-
     # -- C --
 
     @classmethod
@@ -72,6 +58,12 @@ class ECO(Ontology):
         ECOAncestor.drop_table()
         super().drop_table(*arg, **kwargs)
 
+    # -- G --
+
+    @classmethod
+    def get_ancestor_model(cls):
+        return ECOAncestor
+
     # -- S --
 
     def set_eco_id(self, id):
@@ -88,19 +80,24 @@ class ECO(Ontology):
 class ECOAncestor(ProtectedBaseModel):
     """
     This class defines the many-to-many relationship between the eco terms and theirs ancestors
+    (transitive closure of the hierarchy)
 
     :type eco: CharField
     :property eco: id of the concerned eco term
     :type ancestor: CharField
     :property ancestor: ancestor of the concerned eco term
+    :type depth: int
+    :property depth: distance between the term and its ancestor (1 for the parents)
     """
 
     eco = ForeignKeyField(ECO)
     ancestor = ForeignKeyField(ECO)
+    depth = IntegerField(default=1)
 
     class Meta:
         table_name = 'biota_eco_ancestors'
         is_table = True
         indexes = (
             (('eco', 'ancestor'), True),
+            (('ancestor', 'eco'), False),
         )
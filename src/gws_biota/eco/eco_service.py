@@ -6,6 +6,8 @@ from gws_biota.db.biota_db_manager import BiotaDbManager
 
 from .._helper.ontology import Onto as OntoHelper
 from ..base.base_service import BaseService
+from ..base.natural_key_resolver import NaturalKeyResolver
+from ..ontology.ontology_closure import OntologyClosure
 from ..eco.eco import ECO, ECOAncestor
 
 
@@ -76,13 +78,12 @@ class ECOService(BaseService):
         Logger.info("STEP 2: Inserting ECO ancestor relationships")
         Logger.info("-" * 80)
 
-        vals = []
-        for eco in ecos:
-            val = cls._get_ancestors_query(eco)
-            for v in val:
-                vals.append(v)
+        resolver = NaturalKeyResolver.from_models(ecos, "eco_id")
+        closure = OntologyClosure({eco.eco_id: eco.data.get("ancestors") for eco in ecos})
+        vals = resolver.resolve_closure(closure, term_field="eco")
 
         Logger.info(f"Generated {len(vals)} ancestor relationship records")
+        resolver.log_unresolved()
 
         # Deduplicate before insertion
         vals = cls._deduplicate_ancestor_vals(vals, 'eco', 'ancestor')
@@ -111,24 +112,6 @@ class ECOService(BaseService):
         Logger.info("=" * 80)
         message_dispatcher.notify_info_message("✓ ECO database completed!")
 
-    @classmethod
-    def _get_ancestors_query(cls, eco):
-        """
-        Look for the eco term ancestors and returns all eco-eco_ancetors relations in a list
-
-        :returns: a list of dictionnaries inf the following format: {'eco': self.id, 'ancestor': ancestor.id}
-        :rtype: list
-        """
-        vals = []
-        if 'ancestors' not in eco.data:
-            return vals
-        for ancestor in eco.data['ancestors']:
-            if ancestor != eco.eco_id:
-                val = {'eco': eco.id, 'ancestor': ECO.get(
-                    ECO.eco_id == ancestor).id}
-                vals.append(val)
-        return (vals)
-
     @classmethod
     def _deduplicate_ancestor_vals(cls, vals: list[dict], key1: str, key2: str) -> list[dict]:
         """Remove duplicate ancestor relationships"""
@@ -70,6 +70,9 @@ class Enzyme(BaseFT):
     tax_id = CharField(null=True, index=True)
     bto = ManyToManyField(BTO, through_model=EnzymeBTODeffered)
 
+    _params_cache: dict[str, Params] = None
+    _params_cache_data: dict = None
+
 
     # -- A --
 
@@ -87,6 +90,7 @@ class Enzyme(BaseFT):
 
         Extra parameters are passed to :meth:`create_table`
         """
+        from .enzyme_kinetics import EnzymeKinetics
 
         EnzymeClass.create_table()
         DeprecatedEnzyme.create_table()
@@ -94,6 +98,7 @@ class Enzyme(BaseFT):
         EnzymeOrtholog.create_table()
         super().create_table(*args, **kwargs)
         EnzymeBTO.create_table()
+        EnzymeKinetics.create_table()
 
     @property
     def classification(self):
@@ -110,11 +115,13 @@ class Enzyme(BaseFT):
 
         Extra parameters are passed to :meth:`peewee.Model.drop_table`
         """
+        from .enzyme_kinetics import EnzymeKinetics
 
         EnzymeClass.drop_table()
         EnzymeOrtholog.drop_table()
         EnzymePathway.drop_table(*args, **kwargs)
         EnzymeBTO.drop_table(*args, **kwargs)
+        EnzymeKinetics.drop_table(*args, **kwargs)
         DeprecatedEnzyme.drop_table(*args, **kwargs)
         super().drop_table(*args, **kwargs)
 
@@ -159,7 +166,9 @@ class Enzyme(BaseFT):
 
     def get_params(self, name) -> Params:
         """
-        Returns the list of parameters associated with `name`
+        Returns the list of parameters associated with `name`.
+        The parameters are cached in the enzyme until its `data` is replaced, or the length of the list of
+        parameters changes.
 
         :param name: Name of the parameter
         :type name: str
@@ -167,7 +176,14 @@ class Enzyme(BaseFT):
         :rtype: ParamList
         """
 
-        return Params(name, self.data)
+        if self._params_cache is None or self._params_cache_data is not self.data:
+            self._params_cache = {}
+            self._params_cache_data = self.data
+        params = self._params_cache.get(name)
+        if params is None:
+            params = Params(name, self.data)
+            self._params_cache[name] = params
+        return params
 
     def get_params_as_json(self, name) -> Params:
         """
@@ -192,7 +208,7 @@ class Enzyme(BaseFT):
         :rtype: ParamList
         """
 
-        return Params(name, self.data)
+        return self.get_params(name)
 
     # -- R --
 
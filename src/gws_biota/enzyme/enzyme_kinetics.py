@@ -0,0 +1,164 @@
+
+
+import math
+
+from gws_core import BadRequestException, JSONField
+from peewee import CharField, DoubleField, ForeignKeyField, ModelSelect
+
+from ..base.protected_base_model import ProtectedBaseModel
+from ..taxonomy.taxonomy import Taxonomy
+from .enzyme import Enzyme
+from .enzyme_param import Param, Params
+
+
+class EnzymeKinetics(ProtectedBaseModel):
+    """
+    This class represents the numeric kinetic parameters of the BRENDA enzymes.
+
+    EnzymeKinetics entities are created by `EnzymeService.create_enzyme_db`, from the parameters of the `data`
+    of the enzymes. A range of values (e.g. `14-20`) gives the min and max values, a single value gives
+    the same min and max values.
+
+    :property enzyme: The enzyme
+    :type enzyme: Enzyme
+    :property ec_number: The ec number of the enzyme
+    :type ec_number: str
+    :property tax_id: The taxonomy id of the organism of the enzyme
+    :type tax_id: str
+    :property param: The code of the parameter (e.g. `KM`, `TN`)
+    :type param: str
+    :property min_value: The min value
+    :type min_value: float
+    :property max_value: The max value
+    :type max_value: float
+    :property units: The units of the values
+    :type units: str
+    :property substrate: The name of the substrate (or inhibitor) of the parameter
+    :type substrate: str
+    :property chebi_id: The ChEBI id of the substrate
+    :type chebi_id: str
+    :property refs: The BRENDA references numbers of the enzyme associated with the value
+    :type refs: list[int]
+    :property pubmed_ids: The pubmed ids of the references (if known)
+    :type pubmed_ids: list[int]
+    """
+
+    PARAMS = ("KM", "TN", "KI", "KKM", "IC50", "SA", "PHO", "TO")
+
+    # units of the BRENDA parameters, used if the parser did not set them
+    UNITS = dict(
+        KM="mM",
+        TN="1/s",
+        KI="mM",
+        KKM="1/mM/s",
+        IC50="mM",
+        SA="µmol/min/mg",
+        PHO=None,
+        TO="°C",
+    )
+
+    MAX_SUBSTRATE_LENGTH = 255
+
+    enzyme = ForeignKeyField(Enzyme)
+    ec_number = CharField(null=True, index=True)
+    tax_id = CharField(null=True, index=True)
+    param = CharField(max_length=8)
+    min_value = DoubleField(null=True)
+    max_value = DoubleField(null=True)
+    units = CharField(null=True)
+    substrate = CharField(null=True, max_length=MAX_SUBSTRATE_LENGTH)
+    chebi_id = CharField(null=True, index=True)
+    refs = JSONField(null=True)
+    pubmed_ids = JSONField(null=True)
+
+    # -- C --
+
+    @classmethod
+    def create_kinetics_values(cls, enzyme: Enzyme, params: tuple[str] = PARAMS) -> list[dict]:
+        """
+        Returns the kinetics rows of an enzyme, parsed from its `data`. The values that are not numeric
+        (e.g. `-999 {more}`) are ignored.
+
+        :param enzyme: The enzyme (with its id, ec number, tax_id and data)
+        :type enzyme: Enzyme
+        :param params: The codes of the parameters
+        :type params: tuple[str]
+        :returns: The rows of the `biota_enzyme_kinetics` table
+        :rtype: list[dict]
+        """
+        data = enzyme.data or {}
+        vals = []
+        for code in params:
+            # the params are not cached in the enzyme: the enzymes of a build are kept in memory
+            for param in Params(code, data):
+                if math.isnan(param.min_value):
+                    continue
+                refs = param.refs or []
+                references = param.full_refs or {}
+                # the reference numbers are str keys once the data is saved
+                pubmed_ids = [references.get(ref, references.get(str(ref))) for ref in refs]
+                substrate = param.substrate
+                vals.append({
+                    "enzyme": enzyme.id,
+                    "ec_number": enzyme.ec_number,
+                    "tax_id": enzyme.tax_id,
+                    "param": code,
+                    "min_value": param.min_value,
+                    "max_value": param.max_value,
+                    "units": param.units or cls.UNITS.get(code),
+                    "substrate": substrate[:cls.MAX_SUBSTRATE_LENGTH] if substrate else None,
+                    "chebi_id": param.chebi_id,
+                    "refs": refs,
+                    "pubmed_ids": [pubmed_id for pubmed_id in pubmed_ids if isinstance(pubmed_id, int)],
+                })
+        return vals
+
+    # -- P --
+
+    @classmethod
+    def parse_value(cls, text: str) -> tuple[float, float, str] | None:
+        """
+        Parses the value of a BRENDA parameter (e.g. `0.5 {D-glutamate}`, `14-20 {orotidine 5'-phosphate}`, `7.5`)
+
+        :param text: The value
+        :type text: str
+        :returns: The min value, the max value and the substrate (None if there is no substrate),
+        or None if the value is not numeric
+        :rtype: tuple[float, float, str] | None
+        """
+        return Param.parse_value(text)
+
+    # -- S --
+
+    @classmethod
+    def select_by_tax_id(cls, param: str, tax_id: str, rank: str = None, fields: list = None) -> ModelSelect:
+        """
+        Selects the values of a parameter for an organism, or for all the organisms of a taxon
+
+        :param param: The code of the parameter (e.g. `TN`)
+        :type param: str
+        :param tax_id: The taxonomy id
+        :type tax_id: str
+        :param rank: If given, the values of all the enzymes of which the taxon at this rank is `tax_id`
+        are selected (e.g. the enzymes of all the species of a genus). Otherwise, only the values of the enzymes
+        of the `tax_id` are selected.
+        :type rank: str
+        :param fields: The fields to select (all the fields if None)
+        :type fields: list
+        :returns: The query
+        :rtype: ModelSelect
+        """
+        query = cls.select(*(fields or [])).where(cls.param == param)
+        if rank is None:
+            return query.where(cls.tax_id == tax_id)
+        if rank not in Taxonomy.get_tax_tree():
+            raise BadRequestException(f"Invalid taxonomy rank '{rank}', expected one of {Taxonomy.get_tax_tree()}")
+        return query.join(Enzyme, on=(cls.enzyme == Enzyme.id)).where(getattr(Enzyme, "tax_" + rank) == tax_id)
+
+    class Meta:
+        table_name = 'biota_enzyme_kinetics'
+        is_table = True
+        indexes = (
+            (('param', 'ec_number', 'tax_id'), False),
+            (('param', 'chebi_id'), False),
+        )
@@ -0,0 +1,195 @@
+
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from gws_core import BadRequestException
+from peewee import chunked
+
+from ..base.base_service import BaseService
+from ..taxonomy.taxonomy import Taxonomy, TaxonomyLineage
+from .deprecated_enzyme import DeprecatedEnzyme
+from .enzyme import Enzyme
+from .enzyme_kinetics import EnzymeKinetics
+
+
+class EnzymeKineticsService(BaseService):
+    """
+    Looks up the kinetic parameters (e.g. kcat, KM) of many (ec number, substrate, organism) triples at once.
+
+    When there is no value for the organism of a triple, the value of the closest taxon is used: the species,
+    then the genus, the family, the order, ... up to the superkingdom. Each taxonomy level is looked up with
+    one query for all the triples that are still not found, using the `tax_*` columns of the enzymes.
+    The deprecated ec numbers are replaced by their new ec numbers.
+    """
+
+    # taxonomy ranks of the fallback, from the closest to the farthest from the organism
+    FALLBACK_RANKS = ("species", "genus", "family", "order", "class", "subphylum", "phylum",
+                      "subkingdom", "kingdom", "clade", "superkingdom")
+
+    # names of the levels of the organism itself and of all the organisms
+    ORGANISM_LEVEL = "organism"
+    ALL_ORGANISMS_LEVEL = "all"
+
+    # maximum number of values in the IN clauses of the queries
+    MAX_IN_SIZE = 10000
+
+    COLUMNS = ["ec_number", "chebi_id", "tax_id", "value", "min_value", "max_value", "count", "rank",
+               "matched_tax_id"]
+
+    # -- A --
+
+    @classmethod
+    def _aggregate(cls, values: dict, ec_numbers: list[str], chebi_id: str, tax_id: str) -> tuple | None:
+        """ Returns the (median, min, max, count) of the values of a request, or None if there is no value """
+        min_values, max_values = [], []
+        for ec_number in ec_numbers:
+            for value_chebi_id, min_value, max_value in values.get((ec_number, tax_id), []):
+                if chebi_id is None or value_chebi_id == chebi_id:
+                    min_values.append(min_value)
+                    max_values.append(max_value)
+        if not min_values:
+            return None
+        min_values = np.asarray(min_values, dtype=np.float64)
+        max_values = np.asarray(max_values, dtype=np.float64)
+        return (float(np.median((min_values + max_values) / 2)), float(min_values.min()),
+                float(max_values.max()), len(min_values))
+
+    # -- G --
+
+    @classmethod
+    def _get_ec_numbers(cls, ec_numbers: set[str]) -> dict[str, list[str]]:
+        """ Returns the ec numbers to look up for each ec number: itself, or its new ec numbers if it is deprecated """
+        existing_ec_numbers = set()
+        for chunk in chunked(list(ec_numbers), cls.MAX_IN_SIZE):
+            query = Enzyme.select(Enzyme.ec_number).where(Enzyme.ec_number << chunk).distinct().tuples()
+            existing_ec_numbers.update(ec_number for ec_number, in query)
+
+        new_ec_numbers = {}
+        for chunk in chunked(list(ec_numbers - existing_ec_numbers), cls.MAX_IN_SIZE):
+            query = DeprecatedEnzyme.select(DeprecatedEnzyme.ec_number, DeprecatedEnzyme.new_ec_number).where(
+                (DeprecatedEnzyme.ec_number << chunk) & DeprecatedEnzyme.new_ec_number.is_null(False)).tuples()
+            for ec_number, new_ec_number in query:
+                new_ec_numbers.setdefault(ec_number, []).append(new_ec_number)
+
+        return {ec_number: [ec_number] if ec_number in existing_ec_numbers else new_ec_numbers.get(ec_number, [])
+                for ec_number in ec_numbers}
+
+    # -- L --
+
+    @classmethod
+    def lookup_kinetics(cls, requests: Iterable[tuple[str, str, str]], param: str = "TN",
+                        ranks: tuple[str] = FALLBACK_RANKS, fallback_to_all_organisms: bool = False) -> pd.DataFrame:
+        """
+        Returns the value of a kinetic parameter for each (ec number, substrate, organism) triple, taken from the
+        closest taxon of the organism that has values.
+
+        :param requests: The (ec_number, chebi_id, tax_id) triples. If the chebi_id is None, the values of all the
+        substrates are used. If the tax_id is None, the triple is only looked up in all the organisms
+        (see `fallback_to_all_organisms`).
+        :type requests: Iterable[tuple[str, str, str]]
+        :param param: The code of the parameter (e.g. `TN` for kcat, `KM`)
+        :type param: str
+        :param ranks: The taxonomy ranks of the fallback, from the closest to the farthest from the organism
+        :type ranks: tuple[str]
+        :param fallback_to_all_organisms: If True, the triples that are not found at any rank are looked up in
+        all the organisms
+        :type fallback_to_all_organisms: bool
+        :returns: A table with one row per triple, in the order of the requests. `value` is the median of the
+        values found (the middle of the ranges), `min_value` and `max_value` their bounds and `count` their number.
+        `rank` is the level where the values were found (`organism`, a rank of `ranks`, `all` or None if no value
+        was found) and `matched_tax_id` the taxon of this level.
+        :rtype: pd.DataFrame
+        """
+        invalid_ranks = [rank for rank in ranks if rank not in Taxonomy.get_tax_tree()]
+        if invalid_ranks:
+            raise BadRequestException(
+                f"Invalid taxonomy ranks {invalid_ranks}, expected ranks of {Taxonomy.get_tax_tree()}")
+
+        requests = [(ec_number, chebi_id, str(tax_id) if tax_id else None)
+                    for ec_number, chebi_id, tax_id in requests]
+        ec_numbers = cls._get_ec_numbers({ec_number for ec_number, _, _ in requests if ec_number})
+        lineages = TaxonomyLineage.get_lineages([tax_id for _, _, tax_id in requests if tax_id])
+
+        levels = [(cls.ORGANISM_LEVEL, None), *[(rank, rank) for rank in ranks]]
+        if fallback_to_all_organisms:
+            levels.append((cls.ALL_ORGANISMS_LEVEL, None))
+
+        results = [None] * len(requests)
+        pending = [i for i, (ec_number, _, _) in enumerate(requests) if ec_number]
+        for level, rank in levels:
+            if not pending:
+                break
+
+            # taxon of each pending request at this level
+            taxa = {}
+            for i in pending:
+                tax_id = requests[i][2]
+                if level == cls.ALL_ORGANISMS_LEVEL:
+                    taxa[i] = None
+                elif tax_id is not None:
+                    taxa[i] = tax_id if level == cls.ORGANISM_LEVEL else lineages.get(tax_id, {}).get(rank)
+                    if taxa[i] is None:
+                        del taxa[i]
+            if not taxa:
+                continue
+
+            chebi_ids = {requests[i][1] for i in taxa}
+            values = cls._select_values(
+                param, rank,
+                ec_numbers={ec_number for i in taxa for ec_number in ec_numbers[requests[i][0]]},
+                tax_ids=None if level == cls.ALL_ORGANISMS_LEVEL else set(taxa.values()),
+                chebi_ids=None if None in chebi_ids else chebi_ids)
+
+            next_pending = []
+            for i in pending:
+                result = None
+                if i in taxa:
+                    result = cls._aggregate(values, ec_numbers[requests[i][0]], requests[i][1], taxa[i])
+                if result is None:
+                    next_pending.append(i)
+                else:
+                    results[i] = (*result, level, taxa[i])
+            pending = next_pending
+
+        rows = []
+        for (ec_number, chebi_id, tax_id), result in zip(requests, results):
+            if result is None:
+                result = (np.nan, np.nan, np.nan, 0, None, None)
+            rows.append((ec_number, chebi_id, tax_id, *result))
+        return pd.DataFrame(rows, columns=cls.COLUMNS)
+
+    # -- S --
+
+    @classmethod
+    def _select_values(cls, param: str, rank: str, ec_numbers: set[str], tax_ids: set[str] | None,
+                       chebi_ids: set[str] | None) -> dict[tuple[str, str], list[tuple[str, float, float]]]:
+        """
+        Selects the values of a parameter for ec numbers and taxa, with one query (per chunk of ec numbers)
+
+        :returns: The (chebi_id, min_value, max_value) of each (ec_number, taxon). The taxon is the tax_id of the
+        enzyme if `rank` is None, its taxon at this rank otherwise, and None if `tax_ids` is None.
+        """
+        if rank is None:
+            tax_field = EnzymeKinetics.tax_id
+        else:
+            tax_field = getattr(Enzyme, "tax_" + rank)
+
+        values = {}
+        for chunk in chunked(list(ec_numbers), cls.MAX_IN_SIZE):
+            query = EnzymeKinetics.select(
+                EnzymeKinetics.ec_number, EnzymeKinetics.chebi_id, EnzymeKinetics.min_value,
+                EnzymeKinetics.max_value, tax_field)
+            if rank is not None:
+                query = query.join(Enzyme, on=(EnzymeKinetics.enzyme == Enzyme.id))
+            query = query.where((EnzymeKinetics.param == param) & (EnzymeKinetics.ec_number << chunk))
+            if tax_ids is not None:
+                query = query.where(tax_field << list(tax_ids))
+            if chebi_ids is not None:
+                query = query.where(EnzymeKinetics.chebi_id << list(chebi_ids))
+
+            for ec_number, chebi_id, min_value, max_value, tax_id in query.tuples():
+                key = (ec_number, tax_id if tax_ids is not None else None)
+                values.setdefault(key, []).append((chebi_id, min_value, max_value))
+        return values
@@ -1,12 +1,29 @@
 
 
+import math
+import re
 from pprint import pformat
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+# a number or a range of numbers (e.g. `0.5`, `1.2e-3`, `14-20`), followed by an optional substrate in braces
+VALUE_PATTERN = re.compile(
+    r"^\s*(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)(?:\s*-\s*(\d+(?:\.\d*)?(?:[eE][-+]?\d+)?))?\s*(?:\{(.*)\})?")
+SUBSTRATE_PATTERN = re.compile(r"\{(.*)\}")
+
+# value of the unknown parameters in BRENDA
+UNKNOWN_VALUE = -999
 
 
 class Param:
     """
     Adpater class that represents a BRENDA parameter
 
+    The numeric values of the kinetic parameters (e.g. `0.5 {D-glutamate}`, `14-20 {orotidine 5'-phosphate}`)
+    are parsed once, on first access to `min_value`, `max_value` or `substrate`.
+
     :property name: Description of the parameter
     :type name: str
     :property value: Value of the parameter
@@ -19,11 +36,7 @@ class Param:
     :type comments: str
     """
 
-    name: str = None
-    data: dict = None
-    refs: list = []
-    full_refs: list = []
-    comments: str = None
+    __slots__ = ("name", "data", "refs", "full_refs", "comments", "_parsed_value")
 
     def __init__(self, data=None, refs=None, full_refs=None, comments=None, name=None):
         self.data = data
@@ -31,6 +44,7 @@ class Param:
         self.full_refs = full_refs
         self.comments = comments
         self.name = name
+        self._parsed_value = None
 
     @property
     def value(self):
@@ -49,8 +63,78 @@ class Param:
         return self.value is not None
 
     def get(self, key):
+        if self.data is None:
+            return None
         return self.data.get(key, None)
 
+    # -- C --
+
+    @property
+    def chebi_id(self) -> str:
+        """ The ChEBI id of the substrate (or inhibitor) of the parameter """
+        return self.get("chebi")
+
+    # -- M --
+
+    @property
+    def max_value(self) -> float:
+        """ The max value of a numeric parameter (NaN if the value is not numeric) """
+        return self._get_parsed_value()[1]
+
+    @property
+    def min_value(self) -> float:
+        """ The min value of a numeric parameter (NaN if the value is not numeric) """
+        return self._get_parsed_value()[0]
+
+    # -- P --
+
+    @staticmethod
+    def parse_value(text: str) -> tuple[float, float, str] | None:
+        """
+        Parses the value of a BRENDA parameter (e.g. `0.5 {D-glutamate}`, `14-20 {orotidine 5'-phosphate}`, `7.5`)
+
+        :param text: The value
+        :type text: str
+        :returns: The min value, the max value and the substrate (None if there is no substrate),
+        or None if the value is not numeric
+        :rtype: tuple[float, float, str] | None
+        """
+        if not isinstance(text, str):
+            return None
+        match = VALUE_PATTERN.match(text)
+        if match is None:
+            return None
+        min_value = float(match.group(1))
+        if min_value == UNKNOWN_VALUE:
+            return None
+        max_value = float(match.group(2)) if match.group(2) else min_value
+        substrate = match.group(3).strip() if match.group(3) else None
+        return min_value, max_value, substrate
+
+    def _get_parsed_value(self) -> tuple[float, float, str]:
+        if self._parsed_value is None:
+            parsed = self.parse_value(self.get("value") or self.value)
+            if parsed is None:
+                parsed = (math.nan, math.nan, self._parse_substrate(self.value))
+            min_value, max_value, substrate = parsed
+            substrate = self.get("substrate") or substrate
+            self._parsed_value = (min_value, max_value, None if substrate == "more" else substrate)
+        return self._parsed_value
+
+    @staticmethod
+    def _parse_substrate(text: str) -> str:
+        match = SUBSTRATE_PATTERN.search(text) if isinstance(text, str) else None
+        return match.group(1).strip() if match else None
+
+    # -- S --
+
+    @property
+    def substrate(self) -> str:
+        """ The name of the substrate (or inhibitor) of the parameter (None if it is not given or `more`) """
+        return self._get_parsed_value()[2]
+
+    # -- T --
+
     def to_json(self):
         return {
             "name": self.name,
@@ -58,15 +142,26 @@ class Param:
             "refs": self.refs
         }
 
+    # -- U --
+
+    @property
+    def units(self) -> str:
+        """ The units of the parameter """
+        return self.get("units")
+
 
 class Params:
     """
     Adpater class that represents a list of BRENDA parameters
+
+    The `Param` objects are created once, on first access, and reused until the length of the list of
+    parameters changes (e.g. a parameter is appended to the `data` of the enzyme).
     """
 
-    _name = None
-    _data = None
-    _full_refs = None
+    __slots__ = ("_name", "_data", "_full_refs", "_params")
+
+    # columns of `to_arrays` and `from_enzymes`
+    COLUMNS = ("value", "min_value", "max_value", "units", "substrate", "chebi_id", "refs", "comments")
 
     _names = dict(
         AC="activating compound",
@@ -119,6 +214,37 @@ class Params:
         self._name = name
         self._data = data.get(name, None)
         self._full_refs = data.get("references", None)
+        self._params = None
+
+    # -- F --
+
+    @classmethod
+    def from_enzymes(cls, enzymes: Iterable, name: str) -> pd.DataFrame:
+        """
+        Returns the parameters of many enzymes in a flat table
+
+        :param enzymes: The enzymes
+        :type enzymes: Iterable[Enzyme]
+        :param name: Name of the parameter (e.g. `KM`)
+        :type name: str
+        :returns: A table with one row per parameter, with the columns `enzyme_id`, `ec_number`, `tax_id`
+        and the columns of `to_arrays`
+        :rtype: pd.DataFrame
+        """
+        enzyme_ids, ec_numbers, tax_ids = [], [], []
+        columns = {column: [] for column in cls.COLUMNS}
+        for enzyme in enzymes:
+            params = enzyme.get_params(name)
+            for param in params:
+                enzyme_ids.append(enzyme.id)
+                ec_numbers.append(enzyme.ec_number)
+                tax_ids.append(enzyme.tax_id)
+                for column, value in zip(cls.COLUMNS, cls._get_param_row(param)):
+                    columns[column].append(value)
+        return pd.DataFrame({
+            "enzyme_id": enzyme_ids, "ec_number": ec_numbers, "tax_id": tax_ids,
+            **{column: cls._to_array(column, values) for column, values in columns.items()}
+        })
 
     # -- G --
 
@@ -129,28 +255,52 @@ class Params:
             return 0
 
     def __getitem__(self, index=0):
-        if isinstance(self._data, list):
-            if index < len(self):
-                if isinstance(self._data[index], str):
-                    return Param(
-                        data={'data': self._data[index]},
-                        name=self._names[self._name]
-                    )
-                elif isinstance(self._data[index], dict):
-                    return Param(
-                        data=self._data[index],
-                        refs=self._data[index].get("refs", None),
-                        full_refs=self._full_refs,
-                        comments=self._data[index].get("comment", None),
-                        name=self._names[self._name]
-                    )
-                else:
-                    return Param()
-            else:
-                return Param()
+        params = self._get_params()
+        if index < len(params):
+            return params[index]
         else:
             return Param()
 
+    def __iter__(self) -> Iterator[Param]:
+        return iter(self._get_params())
+
+    def _get_params(self) -> list[Param]:
+        if self._params is None or len(self._params) != len(self):
+            self._params = [self._create_param(data) for data in self._data] if isinstance(self._data, list) else []
+        return self._params
+
+    def _create_param(self, data) -> Param:
+        name = self._names.get(self._name, self._name)
+        if isinstance(data, str):
+            return Param(
+                data={'data': data},
+                name=name
+            )
+        elif isinstance(data, dict):
+            return Param(
+                data=data,
+                refs=data.get("refs", None),
+                full_refs=self._full_refs,
+                comments=data.get("comment", None),
+                name=name
+            )
+        else:
+            return Param()
+
+    @classmethod
+    def _get_param_row(cls, param: Param) -> tuple:
+        return (param.value, param.min_value, param.max_value, param.units, param.substrate, param.chebi_id,
+                param.refs, param.comments)
+
+    @classmethod
+    def _to_array(cls, column: str, values: list) -> np.ndarray:
+        if column in ("min_value", "max_value"):
+            return np.asarray(values, dtype=np.float64)
+        array = np.empty(len(values), dtype=object)
+        for i, value in enumerate(values):
+            array[i] = value
+        return array
+
     def __str__(self):
         """
         String representation.
@@ -162,6 +312,19 @@ class Params:
             "full_refs": self._full_refs
         })
 
+    # -- T --
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """
+        Returns the parameters in columns
+
+        :returns: The columns `value`, `min_value`, `max_value` (float, NaN if the value is not numeric), `units`,
+        `substrate`, `chebi_id`, `refs` and `comments`
+        :rtype: dict[str, np.ndarray]
+        """
+        rows = [self._get_param_row(param) for param in self]
+        return {column: self._to_array(column, [row[i] for row in rows]) for i, column in enumerate(self.COLUMNS)}
+
     def to_json(self):
         data = []
         for param in self:
@@ -1,16 +1,22 @@
+import os
+import time
+
 from gws_core import Logger, MessageDispatcher, Settings
 from peewee import chunked
 
 from gws_biota.db.biota_db_manager import BiotaDbManager
+from gws_biota.db.db_checkpoint import DbCheckpoint
 
 from .._helper.bkms import BKMS
 from .._helper.brenda import Brenda
 from ..base.base_service import BaseService
+from ..base.natural_key_resolver import NaturalKeyResolver
 from ..bto.bto import BTO
-from ..taxonomy.taxonomy import Taxonomy
+from ..taxonomy.taxonomy import Taxonomy, TaxonomyLineage
 from .deprecated_enzyme import DeprecatedEnzyme
 from .enzyme import Enzyme, EnzymeBTO
 from .enzyme_class import EnzymeClass
+from .enzyme_kinetics import EnzymeKinetics
 from .enzyme_ortholog import EnzymeOrtholog
 from .enzyme_pathway import EnzymePathway
 
@@ -18,7 +24,8 @@ from .enzyme_pathway import EnzymePathway
 class EnzymeService(BaseService):
     @classmethod
     def create_enzyme_db(
-        cls, brenda_file, bkms_file, expasy_file, taxonomy_file, bto_file, compound_file, message_dispatcher=None
+        cls, brenda_file, bkms_file, expasy_file, taxonomy_file, bto_file, compound_file, message_dispatcher=None,
+        checkpoint: DbCheckpoint = None, num_workers: int = 1
     ):
         """
         Creates and fills the `enzyme` database
@@ -27,12 +34,19 @@ class EnzymeService(BaseService):
         :type files: file
         :param message_dispatcher: Message dispatcher for UI logging
         :type message_dispatcher: MessageDispatcher
+        :param checkpoint: If given, the completed save phases are checkpointed, and the phases completed by
+        a previous build are skipped
+        :type checkpoint: DbCheckpoint
+        :param num_workers: Number of processes used to parse the BRENDA file
+        :type num_workers: int
         :returns: None
         :rtype: None
         """
 
         if message_dispatcher is None:
             message_dispatcher = MessageDispatcher()
+        if checkpoint is None:
+            checkpoint = DbCheckpoint("enzyme", message_dispatcher=message_dispatcher)
 
         base_biodata_dir = Settings.get_instance().get_variable("gws_biota", "biodata_dir")
 
@@ -57,7 +71,9 @@ class EnzymeService(BaseService):
             # ==================================================================
             message_dispatcher.notify_info_message("Loading enzyme classes...")
             Logger.info("Loading enzyme classes...")
-            EnzymeClass.create_enzyme_class_db(base_biodata_dir, expasy_file)
+            checkpoint.run_phase(
+                "enzyme_classes", lambda: EnzymeClass.create_enzyme_class_db(base_biodata_dir, expasy_file),
+                tables=[EnzymeClass])
 
             # CRITICAL: Close DB connection to prevent timeout during long parsing
             message_dispatcher.notify_info_message("✓ Enzyme classes loaded")
@@ -77,17 +93,20 @@ class EnzymeService(BaseService):
             # PHASE 2: PARSING (NO DB CONNECTION - AVOID TIMEOUT)
             # ==================================================================
             message_dispatcher.notify_info_message("=" * 80)
-            message_dispatcher.notify_info_message("PARSING BRENDA FILE (this may take 30-60 minutes)...")
+            message_dispatcher.notify_info_message(
+                "PARSING BRENDA FILE (this may take 30-60 minutes, a few seconds if the parse result is cached)...")
             message_dispatcher.notify_info_message("=" * 80)
-            Logger.info("Starting BRENDA parsing...")
+            Logger.info(f"Starting BRENDA parsing ({num_workers} workers)...")
             brenda = Brenda(
                 brenda_file=brenda_file,
                 taxonomy_dir=taxonomy_file,
                 bto_file=bto_file,
                 chebi_file=compound_file,
+                cache_dir=cls.get_brenda_cache_dir(),
             )
 
-            list_of_enzymes, list_deprecated_ec = brenda.parse_all_enzyme_to_dict()
+            list_of_enzymes, list_deprecated_ec = brenda.parse_all_enzyme_to_dict(
+                num_workers=num_workers, progress_callback=message_dispatcher.notify_info_message)
             message_dispatcher.notify_info_message("=" * 80)
             message_dispatcher.notify_info_message(f"✓ BRENDA PARSING COMPLETED - {len(list_of_enzymes)} enzymes parsed")
             message_dispatcher.notify_info_message("=" * 80)
@@ -236,82 +255,100 @@ class EnzymeService(BaseService):
                 Logger.info("✓ Database connection verified (retry)")
 
             # Save core enzyme data
-            message_dispatcher.notify_info_message("Saving enzyme pathways...")
-            EnzymePathway.create_all(list(pathways.values()))
-            message_dispatcher.notify_info_message(f"✓ Saved {len(pathways)} enzyme pathways")
+            def _save_pathways_and_orthologs():
+                message_dispatcher.notify_info_message("Saving enzyme pathways...")
+                EnzymePathway.create_all(list(pathways.values()))
+                message_dispatcher.notify_info_message(f"✓ Saved {len(pathways)} enzyme pathways")
+
+                message_dispatcher.notify_info_message("Saving enzyme orthologs...")
+                EnzymeOrtholog.create_all(list(enzos.values()))
+                message_dispatcher.notify_info_message(f"✓ Saved {len(enzos)} enzyme orthologs")
 
-            message_dispatcher.notify_info_message("Saving enzyme orthologs...")
-            EnzymeOrtholog.create_all(list(enzos.values()))
-            message_dispatcher.notify_info_message(f"✓ Saved {len(enzos)} enzyme orthologs")
+            checkpoint.run_phase("pathways_and_orthologs", _save_pathways_and_orthologs,
+                                 tables=[EnzymeOrtholog, EnzymePathway])
 
             # Save enzymes in SMALL chunks to avoid MariaDB timeout
             # Each chunk = 1 transaction. 10K was still too big, use 1K instead.
             # MariaDB timeouts after ~60 sec of transaction, so keep each transaction < 5 sec
-            # Force fresh DB connection before starting saves
-            db = Enzyme.get_db()
-            db.close()
-            db.connect()
-            message_dispatcher.notify_info_message("Reconnected to database for saves")
-
-            message_dispatcher.notify_info_message(f"Saving {len(enzymes)} enzymes in small chunks...")
             chunk_size = 1000  # Small chunks to keep each transaction under 5 seconds
-            num_chunks = (len(enzymes) + chunk_size - 1) // chunk_size
-
-            saved_count = 0
-            for chunk in chunked(enzymes, chunk_size):
-                chunk_list = list(chunk)
-
-                # Ping DB before each chunk to keep connection alive
-                try:
-                    db.execute_sql('SELECT 1')
-                except Exception:
-                    # Connection lost, reconnect
-                    db.close()
-                    db.connect()
-                    message_dispatcher.notify_info_message("  ⚠ Reconnected to database (connection was lost)")
-
-                # batch_size=100: smaller INSERTs to avoid "MySQL server has gone away"
-                Enzyme.create_all(chunk_list, batch_size=100, use_transaction=False)
-                saved_count += len(chunk_list)
-                if saved_count % (chunk_size * 10) == 0:  # Log every 10 chunks (10K enzymes)
-                    message_dispatcher.notify_info_message(f"  Progress: {saved_count}/{len(enzymes)} enzymes saved...")
-
-            message_dispatcher.notify_info_message(f"✓ Saved {len(enzymes)} enzymes")
-
-            if deprecated_enzymes:
-                message_dispatcher.notify_info_message("Saving deprecated enzymes...")
-                DeprecatedEnzyme.create_all(deprecated_enzymes)
-                message_dispatcher.notify_info_message(f"✓ Saved {len(deprecated_enzymes)} deprecated enzymes")
+
+            def _save_enzymes():
+                # Force fresh DB connection before starting saves
+                db = Enzyme.get_db()
+                db.close()
+                db.connect()
+                message_dispatcher.notify_info_message("Reconnected to database for saves")
+
+                message_dispatcher.notify_info_message(f"Saving {len(enzymes)} enzymes in small chunks...")
+                saved_count = 0
+                for chunk in chunked(enzymes, chunk_size):
+                    chunk_list = list(chunk)
+
+                    # Ping DB before each chunk to keep connection alive
+                    try:
+                        db.execute_sql('SELECT 1')
+                    except Exception:
+                        # Connection lost, reconnect
+                        db.close()
+                        db.connect()
+                        message_dispatcher.notify_info_message("  ⚠ Reconnected to database (connection was lost)")
+
+                    # batch_size=100: smaller INSERTs to avoid "MySQL server has gone away" (INSERT fallback only)
+                    Enzyme.bulk_load(chunk_list, batch_size=100)
+                    saved_count += len(chunk_list)
+                    if saved_count % (chunk_size * 10) == 0:  # Log every 10 chunks (10K enzymes)
+                        message_dispatcher.notify_info_message(f"  Progress: {saved_count}/{len(enzymes)} enzymes saved...")
+
+                message_dispatcher.notify_info_message(f"✓ Saved {len(enzymes)} enzymes")
+
+                if deprecated_enzymes:
+                    message_dispatcher.notify_info_message("Saving deprecated enzymes...")
+                    DeprecatedEnzyme.create_all(deprecated_enzymes)
+                    message_dispatcher.notify_info_message(f"✓ Saved {len(deprecated_enzymes)} deprecated enzymes")
+
+            if not checkpoint.run_phase("enzymes", _save_enzymes, tables=[EnzymeBTO, Enzyme, DeprecatedEnzyme]):
+                # the next phases need the saved enzymes (with their ids)
+                enzymes = list(Enzyme.select())
 
             # Update taxonomy in chunks to avoid single long transaction
-            message_dispatcher.notify_info_message(f"Updating taxonomy for {len(enzymes)} enzymes in chunks...")
-            updated_count = 0
-            for chunk in chunked(enzymes, chunk_size):
-                chunk_list = list(chunk)
-                cls.__update_taxonomy(chunk_list)
-                updated_count += len(chunk_list)
-                if updated_count % (chunk_size * 10) == 0:  # Log every 10 chunks (10K enzymes)
-                    message_dispatcher.notify_info_message(f"  Progress: {updated_count}/{len(enzymes)} taxonomy updated...")
-            message_dispatcher.notify_info_message("✓ Taxonomy updated")
-
-            # Update BTO in chunks to avoid single long transaction
-            message_dispatcher.notify_info_message(f"Updating BTO for {len(enzymes)} enzymes in chunks...")
-            updated_count = 0
-            for chunk in chunked(enzymes, chunk_size):
-                chunk_list = list(chunk)
-                cls.__update_bto(chunk_list)
-                updated_count += len(chunk_list)
-                if updated_count % (chunk_size * 10) == 0:  # Log every 10 chunks (10K enzymes)
-                    message_dispatcher.notify_info_message(f"  Progress: {updated_count}/{len(enzymes)} BTO updated...")
-            message_dispatcher.notify_info_message("✓ BTO updated")
+            def _update_taxonomy():
+                message_dispatcher.notify_info_message(f"Updating taxonomy for {len(enzymes)} enzymes in chunks...")
+                updated_count = 0
+                for chunk in chunked(enzymes, chunk_size):
+                    chunk_list = list(chunk)
+                    cls.__update_taxonomy(chunk_list)
+                    updated_count += len(chunk_list)
+                    if updated_count % (chunk_size * 10) == 0:  # Log every 10 chunks (10K enzymes)
+                        message_dispatcher.notify_info_message(f"  Progress: {updated_count}/{len(enzymes)} taxonomy updated...")
+                message_dispatcher.notify_info_message("✓ Taxonomy updated")
+
+            checkpoint.run_phase("taxonomy", _update_taxonomy)
+
+            # Extract the numeric kinetic parameters (needs the tax_id of the enzymes)
+            def _update_kinetics():
+                message_dispatcher.notify_info_message(f"Extracting kinetic parameters of {len(enzymes)} enzymes...")
+                cls.__update_kinetics(enzymes, message_dispatcher)
+                message_dispatcher.notify_info_message("✓ Kinetic parameters extracted")
+
+            checkpoint.run_phase("kinetics", _update_kinetics, tables=[EnzymeKinetics])
+
+            # Link enzymes to BTO tissues in one bulk stage
+            def _update_bto():
+                message_dispatcher.notify_info_message(f"Updating BTO for {len(enzymes)} enzymes...")
+                cls.__update_bto(enzymes, message_dispatcher)
+                message_dispatcher.notify_info_message("✓ BTO updated")
+
+            checkpoint.run_phase("bto", _update_bto, tables=[EnzymeBTO])
 
             if list_of_bkms:
                 message_dispatcher.notify_info_message("Updating enzyme pathways with BKMS data...")
-                cls.__update_pathway_from_bkms(list_of_bkms)
+                checkpoint.run_phase("bkms", lambda: cls.__update_pathway_from_bkms(list_of_bkms))
                 message_dispatcher.notify_info_message("✓ BKMS data integrated")
             else:
                 message_dispatcher.notify_info_message("⚠ BKMS pathway enrichment skipped (no data)")
 
+            checkpoint.complete()
+
             message_dispatcher.notify_info_message("=" * 80)
             message_dispatcher.notify_info_message("✓ ALL ENZYME DATA SAVED SUCCESSFULLY")
             message_dispatcher.notify_info_message("=" * 80)
@@ -322,59 +359,109 @@ class EnzymeService(BaseService):
             pronto_io.decompress = original_decompress
             pronto_ontology.decompress = original_decompress
 
+    # -- G --
+
+    @classmethod
+    def get_brenda_cache_dir(cls) -> str:
+        """ Returns the directory of the BRENDA parse cache """
+        return os.path.join(Settings.get_instance().get_data_dir(), "gws_biota", "brenda_cache")
+
     # -- U --
 
     @classmethod
     def __update_taxonomy(cls, enzymes):
+        tax_ids = [str(enz.data["taxonomy"]) for enz in enzymes if "taxonomy" in enz.data]
+        lineages = TaxonomyLineage.get_lineages(tax_ids)
         for enz in enzymes:
-            cls.__set_taxonomy_data(enz)
+            cls.__set_taxonomy_data(enz, lineages)
         fields = ["tax_" + t for t in Taxonomy.get_tax_tree()]
         Enzyme.update_all(enzymes, fields=["tax_id", *fields])
 
     @classmethod
-    def __update_bto(cls, enzymes):
-        vals = []
-        for enz in enzymes:
-            vals.extend(cls.__create_bto_values(enz))
-        EnzymeBTO.insert_all(vals)
+    def __update_bto(cls, enzymes, message_dispatcher: MessageDispatcher):
+        """
+        Connects enzymes and tissues by adding enzyme-tissues relations in the enzyme_btos table.
+        The BTO map is loaded once and the relations are streamed in chunks.
+        """
+
+        start_time = time.perf_counter()
+        bto_resolver = NaturalKeyResolver.from_db(BTO, "bto_id")
+        load_time = time.perf_counter() - start_time
+
+        build_time = 0
+        insert_time = 0
+        total_count = 0
+        for chunk in chunked(enzymes, cls.BATCH_SIZE):
+            chunk_start_time = time.perf_counter()
+            vals = []
+            for enz in chunk:
+                vals.extend(cls.__create_bto_values(enz, bto_resolver))
+            build_time += time.perf_counter() - chunk_start_time
+
+            chunk_start_time = time.perf_counter()
+            if vals:
+                EnzymeBTO.bulk_load(vals, batch_size=cls.BATCH_SIZE)
+            insert_time += time.perf_counter() - chunk_start_time
+            total_count += len(vals)
+
+        bto_resolver.log_unresolved()
+        message_dispatcher.notify_info_message(
+            f"  {total_count} enzyme-BTO relations saved, {len(bto_resolver.unresolved)} unmatched BTO ids "
+            f"(load: {load_time:.1f}s, build: {build_time:.1f}s, insert: {insert_time:.1f}s)")
 
     @classmethod
-    def __set_taxonomy_data(cls, enzyme):
+    def __update_kinetics(cls, enzymes, message_dispatcher: MessageDispatcher):
+        """
+        Fills the enzyme_kinetics table with the numeric kinetic parameters (KM, TN, ...) parsed from the data of
+        the enzymes, streamed in chunks.
+        """
+
+        start_time = time.perf_counter()
+        total_count = 0
+        for chunk in chunked(enzymes, cls.BATCH_SIZE):
+            vals = []
+            for enz in chunk:
+                vals.extend(EnzymeKinetics.create_kinetics_values(enz))
+            if vals:
+                EnzymeKinetics.bulk_load(vals, batch_size=cls.BATCH_SIZE)
+            total_count += len(vals)
+
+        message_dispatcher.notify_info_message(
+            f"  {total_count} kinetic parameters saved ({time.perf_counter() - start_time:.1f}s)")
+
+    @classmethod
+    def __set_taxonomy_data(cls, enzyme, lineages: dict[str, dict[str, str]]):
         """
         See if there is any information about the enzyme taxonomy and if so, connects
         the enzyme and its taxonomy by adding the related tax_id from the taxonomy
-        table to the taxonomy property of the enzyme
+        lineages to the taxonomy properties of the enzyme
         """
 
         if "taxonomy" in enzyme.data:
-            try:
-                enzyme.tax_id = str(enzyme.data["taxonomy"])
-                tax = Taxonomy.get(Taxonomy.tax_id == enzyme.tax_id)
-                setattr(enzyme, "tax_" + tax.rank, tax.tax_id)
-                for t in tax.ancestors:
-                    if t.rank in Taxonomy.get_tax_tree():
-                        setattr(enzyme, "tax_" + t.rank, t.tax_id)
-                del enzyme.data["taxonomy"]
-            except Exception as _:
-                pass
+            enzyme.tax_id = str(enzyme.data["taxonomy"])
+            lineage = lineages.get(enzyme.tax_id)
+            if lineage is None:
+                return
+            for rank, tax_id in lineage.items():
+                setattr(enzyme, "tax_" + rank, tax_id)
+            del enzyme.data["taxonomy"]
 
     @classmethod
-    def __create_bto_values(cls, enzyme):
+    def __create_bto_values(cls, enzyme, bto_resolver: NaturalKeyResolver):
         """
         See if there is any information about the enzyme tissue locations and if so,
-        connects the enzyme and tissues by adding an enzyme-tissues relation
-        in the enzyme_btos table
+        returns the (deduplicated) enzyme-tissues relations of the enzyme_btos table
         """
 
-        n = len(enzyme.get_params("ST"))
-        bto_ids = []
-        for i in range(0, n):
-            bto_ids.append(enzyme.get_params("ST")[i].get("bto"))
-        Q = BTO.select().where(BTO.bto_id << bto_ids)
-
         vals = []
-        for bto in Q:
-            vals.append({"bto": bto.id, "enzyme": enzyme.id})
+        bto_ids = set()
+        for st in enzyme.data.get("ST") or []:
+            if not isinstance(st, dict) or not st.get("bto"):
+                continue
+            bto_id = bto_resolver.resolve(st["bto"])
+            if bto_id is not None and bto_id not in bto_ids:
+                bto_ids.add(bto_id)
+                vals.append({"bto": bto_id, "enzyme": enzyme.id})
         return vals
 
     @classmethod
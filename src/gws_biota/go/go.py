@@ -1,14 +1,14 @@
 
 
 from gws_core.model.typing_register_decorator import typing_registrator
-from peewee import CharField, ForeignKeyField
+from peewee import CharField, ForeignKeyField, IntegerField
 
 from ..base.protected_base_model import ProtectedBaseModel
-from ..ontology.ontology import Ontology
+from ..ontology.ontology import Ontology, OntologyHierarchy
 
 
 @typing_registrator(unique_name="GO", object_type="MODEL", hide=True)
-class GO(Ontology):
+class GO(OntologyHierarchy, Ontology):
     """
     This class represents GO terms.
 
@@ -61,6 +61,12 @@ class GO(Ontology):
         """
         return self.data["definition"]
 
+    # -- G --
+
+    @classmethod
+    def get_ancestor_model(cls):
+        return GOAncestor
+
     # -- S --
 
     def set_definition(self, definition):
@@ -98,19 +104,24 @@ class GO(Ontology):
 class GOAncestor(ProtectedBaseModel):
     """
     This class defines the many-to-many relationship between the go terms and theirs ancestors
+    (transitive closure of the hierarchy)
 
     :property go: id of the go term
     :type go: GO
     :property ancestor: ancestor of the go term
     :type ancestor: GO
+    :property depth: distance between the go term and its ancestor (1 for the parents)
+    :type depth: int
     """
 
     go = ForeignKeyField(GO)
     ancestor = ForeignKeyField(GO)
+    depth = IntegerField(default=1)
 
     class Meta:
         table_name = 'biota_go_ancestors'
         is_table = True
         indexes = (
             (('go', 'ancestor'), True),
+            (('ancestor', 'go'), False),
         )
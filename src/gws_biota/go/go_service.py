@@ -6,6 +6,8 @@ from gws_biota.db.biota_db_manager import BiotaDbManager
 
 from .._helper.ontology import Onto as OntoHelper
 from ..base.base_service import BaseService
+from ..base.natural_key_resolver import NaturalKeyResolver
+from ..ontology.ontology_closure import OntologyClosure
 from .go import GO, GOAncestor
 
 
@@ -75,13 +77,12 @@ class GOService(BaseService):
         Logger.info("STEP 2: Inserting GO ancestor relationships")
         Logger.info("-" * 80)
         Logger.info("Saving GO ancestors ...")
-        vals = []
-        for go in gos:
-            val = cls._get_ancestors_query(go)
-            for v in val:
-                vals.append(v)
+        resolver = NaturalKeyResolver.from_models(gos, "go_id")
+        closure = OntologyClosure({go.go_id: go.data.get("ancestors") for go in gos})
+        vals = resolver.resolve_closure(closure, term_field="go")
 
         Logger.info(f"Generated {len(vals)} ancestor relationship records")
+        resolver.log_unresolved()
 
         # Deduplicate before insertion
         vals = cls._deduplicate_ancestor_vals(vals, 'go', 'ancestor')
@@ -110,24 +111,6 @@ class GOService(BaseService):
         Logger.info("=" * 80)
         message_dispatcher.notify_info_message("✓ GO database completed!")
 
-    @classmethod
-    def _get_ancestors_query(cls, go):
-        """
-        Look for the go term ancestors and returns all go-go_ancestors relations in a list
-
-        :returns: A list of dictionnaries in the following format: {'go': self.id, 'ancestor': ancestor.id}
-        :rtype: list
-        """
-        vals = []
-        if 'ancestors' not in go.data:
-            return vals
-        for ancestor in go.data['ancestors']:
-            if ancestor != go.go_id:
-                val = {'go': go.id, 'ancestor': GO.get(
-                    GO.go_id == ancestor).id}
-                vals.append(val)
-        return (vals)
-
     @classmethod
     def _deduplicate_ancestor_vals(cls, vals: list[dict], key1: str, key2: str) -> list[dict]:
         """Remove duplicate ancestor relationships"""
@@ -1,7 +1,122 @@
+from peewee import ForeignKeyField, ModelSelect
 
+from ..base.base_ft import BaseFT
 
 
-from ..base.base_ft import BaseFT
+class OntologyHierarchy:
+    """
+    Queries on the hierarchy of the terms of an ontology.
+
+    The ancestor table of the ontology stores the transitive closure of the hierarchy: one (term, ancestor, depth)
+    row for each ancestor of each term, the depth being 1 for the parents. The ancestors, the descendants and the
+    `is_a` relation are therefore read with a single indexed query.
+
+    The ontologies that have an ancestor table (e.g. `GO`, `Compound`) inherit this class and return their
+    ancestor model with the classmethod `get_ancestor_model()`.
+
+    The `ancestors` of a term are all its ancestors, as for `BTO` and `Compound` before. For `GO`, `SBO`,
+    `ECO` and `Pathway`, whose ancestor tables only stored the parents, the parents are now returned by `parents`.
+    """
+
+    _ancestors = None
+    _parents = None
+
+    # -- A --
+
+    @property
+    def ancestors(self) -> list:
+        """
+        Returns the ancestors of the term, the closest first
+
+        :returns: The ancestors
+        :rtype: list
+        """
+        if self._ancestors is None:
+            self._ancestors = list(self.select_ancestors(self))
+        return self._ancestors
+
+    # -- G --
+
+    @classmethod
+    def _get_closure_fields(cls) -> tuple:
+        """ Returns the ancestor model, and its term and ancestor fields """
+        model = cls.get_ancestor_model()
+        term_field = next(field for field in model._meta.sorted_fields
+                          if isinstance(field, ForeignKeyField) and field.name != "ancestor")
+        return model, term_field, model.ancestor
+
+    @classmethod
+    def _get_term_id(cls, term) -> str:
+        return term.id if isinstance(term, cls) else term
+
+    # -- I --
+
+    @classmethod
+    def is_a(cls, term, ancestor) -> bool:
+        """
+        Returns True if a term is a descendant of another term (or is this term)
+
+        :param term: The term (or its id)
+        :param ancestor: The ancestor term (or its id)
+        :returns: True if `ancestor` is an ancestor of `term`
+        :rtype: bool
+        """
+        term_id = cls._get_term_id(term)
+        ancestor_id = cls._get_term_id(ancestor)
+        if term_id == ancestor_id:
+            return True
+        model, term_field, ancestor_field = cls._get_closure_fields()
+        return model.select().where((term_field == term_id) & (ancestor_field == ancestor_id)).exists()
+
+    # -- P --
+
+    @property
+    def parents(self) -> list:
+        """
+        Returns the parents of the term (i.e. its ancestors at depth 1)
+
+        :returns: The parents
+        :rtype: list
+        """
+        if self._parents is None:
+            self._parents = list(self.select_ancestors(self, max_depth=1))
+        return self._parents
+
+    # -- S --
+
+    @classmethod
+    def select_ancestors(cls, term, max_depth: int = None) -> ModelSelect:
+        """
+        Selects the ancestors of a term, the closest first
+
+        :param term: The term (or its id)
+        :param max_depth: If given, only the ancestors up to this depth are selected (1 for the parents)
+        :type max_depth: int
+        :returns: The query
+        :rtype: ModelSelect
+        """
+        model, term_field, ancestor_field = cls._get_closure_fields()
+        query = cls.select().join(model, on=(ancestor_field == cls.id)).where(term_field == cls._get_term_id(term))
+        if max_depth is not None:
+            query = query.where(model.depth <= max_depth)
+        return query.order_by(model.depth)
+
+    @classmethod
+    def select_descendants(cls, term, max_depth: int = None) -> ModelSelect:
+        """
+        Selects the descendants of a term, the closest first
+
+        :param term: The term (or its id)
+        :param max_depth: If given, only the descendants up to this depth are selected (1 for the children)
+        :type max_depth: int
+        :returns: The query
+        :rtype: ModelSelect
+        """
+        model, term_field, ancestor_field = cls._get_closure_fields()
+        query = cls.select().join(model, on=(term_field == cls.id)).where(ancestor_field == cls._get_term_id(term))
+        if max_depth is not None:
+            query = query.where(model.depth <= max_depth)
+        return query.order_by(model.depth)
 
 
 class Ontology(BaseFT):
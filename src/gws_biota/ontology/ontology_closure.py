@@ -0,0 +1,104 @@
+
+
+from collections import deque
+from typing import Iterable, Iterator
+
+
+class OntologyClosure:
+    """
+    Transitive closure of the hierarchy of an ontology (e.g. the `is_a` relations of the GO terms).
+
+    The closure is computed once, in memory, by dynamic programming over the terms in topological order
+    (the parents before their children): the ancestors of a term are its parents (depth 1) and the ancestors
+    of its parents (depth + 1). The depth of an ancestor is the length of the shortest path to it.
+    The terms in a cycle of the hierarchy (or below a cycle), which are not expected in an ontology,
+    are resolved by a breadth-first search on their parents.
+
+    :property parents: The direct parents of each term. The parents that are not terms of the ontology
+    are added as terms without parents.
+    :type parents: dict[str, list[str]]
+    :property cyclic_terms: The terms in (or below) a cycle of the hierarchy, once the closure is computed
+    :type cyclic_terms: list[str]
+    """
+
+    parents: dict[str, list[str]] = None
+    cyclic_terms: list[str] = None
+    _ancestors: dict[str, dict[str, int]] = None
+
+    def __init__(self, parents: dict[str, Iterable[str]]):
+        self.parents = {}
+        for term, term_parents in parents.items():
+            self.parents[term] = list(dict.fromkeys(parent for parent in term_parents or [] if parent != term))
+        for term_parents in list(self.parents.values()):
+            for parent in term_parents:
+                if parent not in self.parents:
+                    self.parents[parent] = []
+        self.cyclic_terms = []
+
+    # -- G --
+
+    def get_ancestors(self) -> dict[str, dict[str, int]]:
+        """
+        Returns the ancestors of each term (the closure is computed at the first call)
+
+        :returns: The depth of each ancestor of each term
+        :rtype: dict[str, dict[str, int]]
+        """
+        if self._ancestors is not None:
+            return self._ancestors
+
+        children = {term: [] for term in self.parents}
+        nb_pending_parents = {}
+        for term, parents in self.parents.items():
+            nb_pending_parents[term] = len(parents)
+            for parent in parents:
+                children[parent].append(term)
+
+        ancestors = {}
+        queue = deque(term for term, nb_parents in nb_pending_parents.items() if nb_parents == 0)
+        while queue:
+            term = queue.popleft()
+            parents = self.parents[term]
+            term_ancestors = dict.fromkeys(parents, 1)
+            for parent in parents:
+                for ancestor, depth in ancestors[parent].items():
+                    if term_ancestors.get(ancestor, depth + 2) > depth + 1:
+                        term_ancestors[ancestor] = depth + 1
+            ancestors[term] = term_ancestors
+            for child in children[term]:
+                nb_pending_parents[child] -= 1
+                if nb_pending_parents[child] == 0:
+                    queue.append(child)
+
+        self.cyclic_terms = [term for term in self.parents if term not in ancestors]
+        for term in self.cyclic_terms:
+            ancestors[term] = self._search_ancestors(term)
+
+        self._ancestors = ancestors
+        return self._ancestors
+
+    # -- I --
+
+    def iter_rows(self) -> Iterator[tuple[str, str, int]]:
+        """ Yields the (term, ancestor, depth) rows of the closure """
+        for term, term_ancestors in self.get_ancestors().items():
+            for ancestor, depth in term_ancestors.items():
+                yield term, ancestor, depth
+
+    # -- S --
+
+    def _search_ancestors(self, term: str) -> dict[str, int]:
+        """ Returns the ancestors of a term by a breadth-first search on the parents """
+        term_ancestors = {}
+        level = [term]
+        depth = 0
+        while level:
+            depth += 1
+            next_level = []
+            for current in level:
+                for parent in self.parents[current]:
+                    if parent != term and parent not in term_ancestors:
+                        term_ancestors[parent] = depth
+                        next_level.append(parent)
+            level = next_level
+        return term_ancestors
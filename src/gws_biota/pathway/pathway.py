@@ -1,33 +1,20 @@
 
 from gws_core.model.typing_register_decorator import typing_registrator
-from peewee import CharField, ForeignKeyField
+from peewee import CharField, ForeignKeyField, IntegerField
 
 from ..base.protected_base_model import ProtectedBaseModel
 from ..compound.compound import Compound
-from ..ontology.ontology import Ontology
+from ..ontology.ontology import Ontology, OntologyHierarchy
 from .pathway_compound import PathwayCompound
 
 
 @typing_registrator(unique_name="Pathway", object_type="MODEL", hide=True)
-class Pathway(Ontology):
+class Pathway(OntologyHierarchy, Ontology):
     """
     This class represents reactome Pathways
     """
 
     reactome_pathway_id = CharField(null=True, index=True)
-    _ancestors = None
-
-    # -- A --
-
-    @property
-    def ancestors(self):
-        if self._ancestors is not None:
-            return self._ancestors
-        self._ancestors = []
-        Q = PathwayAncestor.select().where(PathwayAncestor.pathway == self.id)
-        for q in Q:
-            self._ancestors.append(q.ancestor)
-        return self._ancestors
 
     # -- C --
 
@@ -58,6 +45,12 @@ class Pathway(Ontology):
         PathwayCompound.drop_table()
         super().drop_table(*arg, **kwargs)
 
+    # -- G --
+
+    @classmethod
+    def get_ancestor_model(cls):
+        return PathwayAncestor
+
     class Meta:
         table_name = 'biota_pathways'
         is_table = True
@@ -66,19 +59,24 @@ class Pathway(Ontology):
 class PathwayAncestor(ProtectedBaseModel):
     """
     This class defines the many-to-many relationship between the pathway and theirs ancestors
+    (transitive closure of the hierarchy)
 
     :type pathway: CharField
     :property pathway: id of the concerned pathway
     :type ancestor: CharField
     :property ancestor: ancestor of the concerned pathway term
+    :type depth: int
+    :property depth: distance between the term and its ancestor (1 for the parents)
     """
 
     pathway = ForeignKeyField(Pathway)
     ancestor = ForeignKeyField(Pathway)
+    depth = IntegerField(default=1)
 
     class Meta:
         table_name = 'biota_pathway_ancestors'
         is_table = True
         indexes = (
             (('pathway', 'ancestor'), True),
+            (('ancestor', 'pathway'), False),
         )
@@ -6,6 +6,8 @@ from gws_biota.db.biota_db_manager import BiotaDbManager
 
 from .._helper.reactome import Reactome as ReactomeHelper
 from ..base.base_service import BaseService
+from ..base.natural_key_resolver import NaturalKeyResolver
+from ..ontology.ontology_closure import OntologyClosure
 from .pathway import Pathway, PathwayAncestor
 from .pathway_compound import PathwayCompound
 
@@ -82,7 +84,8 @@ class PathwayService(BaseService):
             path, reactome_pathway_relations_file)
         Logger.info(f"Parsed {len(pathway_rels)} pathway relations from file")
 
-        vals = cls.__query_vals_of_ancestors(pathway_rels)
+        resolver = NaturalKeyResolver.from_models(pathways, "reactome_pathway_id")
+        vals = cls.__query_vals_of_ancestors(pathway_rels, resolver)
         Logger.info(f"Generated {len(vals)} ancestor relationship records")
 
         # Check and remove duplicates
@@ -148,29 +151,17 @@ class PathwayService(BaseService):
         message_dispatcher.notify_info_message("✓ Pathway database creation completed successfully!")
 
     @classmethod
-    def __query_vals_of_ancestors(cls, pathway_rels):
-        Logger.info("Building ancestor relationship queries...")
-        vals = []
-        missing_count = 0
-
-        for idx, _pw in enumerate(pathway_rels):
-            try:
-                pathway_id = Pathway.get(
-                    Pathway.reactome_pathway_id == _pw["reactome_pathway_id"]).id
-                ancestor_id = Pathway.get(
-                    Pathway.reactome_pathway_id == _pw["ancestor"]).id
-                val = {'pathway': pathway_id, 'ancestor': ancestor_id}
-                vals.append(val)
-
-                if (idx + 1) % 100 == 0:
-                    Logger.info(f"  Processed {idx + 1}/{len(pathway_rels)} relations...")
-            except Exception as e:
-                missing_count += 1
-                if missing_count <= 5:  # Log first 5 missing relations
-                    Logger.debug(f"  Skipping relation (pathway not found): {_pw.get('reactome_pathway_id')} -> {_pw.get('ancestor')}")
-
-        if missing_count > 0:
-            Logger.info(f"  Skipped {missing_count} relations (referenced pathways not found in database)")
+    def __query_vals_of_ancestors(cls, pathway_rels, resolver: NaturalKeyResolver):
+        Logger.info("Building the transitive closure of the pathway relations...")
+        parents = {}
+        for _pw in pathway_rels:
+            parents.setdefault(_pw["reactome_pathway_id"], []).append(_pw["ancestor"])
+        closure = OntologyClosure(parents)
+        vals = resolver.resolve_closure(closure, term_field="pathway")
+
+        if resolver.unresolved:
+            Logger.info("  Skipped the relations of the referenced pathways not found in database")
+            resolver.log_unresolved()
 
         return vals
 
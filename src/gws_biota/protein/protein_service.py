@@ -1,55 +1,134 @@
 
 
-import gzip
-import re
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-from Bio import SeqIO
-from gws_core import Logger
-
-from gws_biota.db.biota_db_manager import BiotaDbManager
+from gws_core import Logger, MessageDispatcher
 
+from .._helper.uniprot import Uniprot
 from ..base.base_service import BaseService
 from .protein import Protein
 
 
 class ProteinService(BaseService):
 
+    # Number of parsed chunks waiting to be saved: bounds the memory used by the pipeline
+    QUEUE_SIZE = 4
+
     @classmethod
-    @BiotaDbManager.transaction()
-    def create_protein_db(cls, path, protein_file):
+    def create_protein_db(cls, path, protein_file, num_workers: int = None, chunk_size: int = None,
+                          message_dispatcher: MessageDispatcher = None):
         """
-        Creates and fills the `protein` database
+        Creates and fills the `protein` database.
+
+        The file is streamed through a three-stage pipeline, so that the memory stays flat whatever the input size:
+
+        1. the FASTA file is decompressed block by block and split in chunks of raw records
+        2. the chunks are parsed in a process pool into plain tuples
+        3. the parsed chunks are passed through a bounded queue to a writer thread that bulk loads
+           and commits each chunk
 
         :param path: path of the file
         :type path: str
         :param protein_file: file that contains data file name
         :type protein_file: file
+        :param num_workers: number of parsing processes (defaults to the number of CPUs)
+        :type num_workers: int
+        :param chunk_size: number of records per chunk (defaults to `BATCH_SIZE`)
+        :type chunk_size: int
         :returns: None
         :rtype: None
         """
+        if message_dispatcher is None:
+            message_dispatcher = MessageDispatcher()
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        if chunk_size is None:
+            chunk_size = cls.BATCH_SIZE
+
+        Logger.info(f"Loading and saving uniprot data ({num_workers} workers) ...")
+        message_dispatcher.notify_info_message("Loading and saving uniprot data ...")
+
+        chunk_queue = queue.Queue(maxsize=cls.QUEUE_SIZE)
+        writer = _ProteinWriter(chunk_queue, message_dispatcher)
+        writer.start()
+        try:
+            chunks = Uniprot.read_fasta_chunks(protein_file, chunk_size=chunk_size)
+            # the workers are started on demand, after the writer thread: they must not be forked
+            # while this thread holds locks (e.g. of the logging or of the database driver)
+            with ProcessPoolExecutor(max_workers=num_workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                # keep a bounded number of chunks in flight, and save them in the file order
+                futures = deque()
+                for chunk in chunks:
+                    futures.append(executor.submit(Uniprot.parse_fasta_records, chunk))
+                    if len(futures) >= 2 * num_workers:
+                        writer.put(futures.popleft().result())
+                while futures:
+                    writer.put(futures.popleft().result())
+        finally:
+            writer.close()
+
+        Logger.info(f"✓ {writer.count} proteins saved")
+        message_dispatcher.notify_info_message(f"✓ {writer.count} proteins saved")
+
+    @classmethod
+    def _create_protein_rows(cls, tuples: list[tuple]) -> list[dict]:
+        """ Converts the tuples of the uniprot parser to rows of the protein table """
+        return [{
+            "uniprot_id": uniprot_id,
+            "uniprot_db": uniprot_db,
+            "uniprot_gene": uniprot_gene,
+            "evidence_score": evidence_score,
+            "tax_id": tax_id,
+            "data": {"sequence": sequence, "description": description},
+        } for uniprot_id, uniprot_db, uniprot_gene, evidence_score, tax_id, description, sequence in tuples]
+
+
+class _ProteinWriter(threading.Thread):
+    """ Writer stage of the protein pipeline: saves the parsed chunks of the queue, one commit per chunk """
+
+    _STOP = None
+
+    def __init__(self, chunk_queue: queue.Queue, message_dispatcher: MessageDispatcher):
+        super().__init__(name="ProteinWriter", daemon=True)
+        self.chunk_queue = chunk_queue
+        self.message_dispatcher = message_dispatcher
+        self.count = 0
+        self.error = None
+
+    def run(self):
+        db = Protein.get_db()
+        try:
+            db.connect(reuse_if_open=True)
+            while True:
+                tuples = self.chunk_queue.get()
+                if tuples is self._STOP:
+                    break
+                if self.error is not None:
+                    continue  # drain the queue so that the producer is never blocked
+                try:
+                    self.count += Protein.bulk_load(ProteinService._create_protein_rows(tuples))
+                    self.message_dispatcher.notify_info_message(f"  Progress: {self.count} proteins saved...")
+                except Exception as err:
+                    self.error = err
+        finally:
+            if not db.is_closed():
+                db.close()
+
+    def put(self, tuples: list[tuple]):
+        """ Adds a parsed chunk to the queue (blocks if the queue is full) """
+        if self.error is not None:
+            raise self.error
+        self.chunk_queue.put(tuples)
 
-        Logger.info("Loading and saving uniprot data ...")
-        with gzip.open(protein_file, "rt") as handle:
-            proteins = []
-            count = 0
-            batch = 0
-            for record in SeqIO.parse(handle, "fasta"):
-                m = re.match(r".*OX=([0-9]+).*PE=(\d).*", record.description)
-                tax = m.group(1) if m else ""
-                evidence = int(m.group(2)) if m else 0
-                prot = Protein(
-                    uniprot_id=record.id.split("|")[1],
-                    uniprot_db=record[1:2],
-                    uniprot_gene=record.id.split("|")[2],
-                    evidence_score=evidence,
-                    tax_id=tax
-                )
-                prot.set_sequence(str(record.seq))
-                prot.set_description(record.description)
-                proteins.append(prot)
-                count += 1
-                if count >= cls.BATCH_SIZE:
-                    batch += 1
-                    Protein.create_all(proteins)
-                    proteins = []
-                    count = 0
+    def close(self):
+        """ Waits for all the chunks to be saved and raises the writer error, if any """
+        self.chunk_queue.put(self._STOP)
+        self.join()
+        if self.error is not None:
+            raise self.error
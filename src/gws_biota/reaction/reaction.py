@@ -1,5 +1,7 @@
 
 
+import numpy as np
+from gws_core import BadRequestException
 from gws_core.model.typing_register_decorator import typing_registrator
 from peewee import (
     CharField,
@@ -8,6 +10,7 @@ from peewee import (
     ManyToManyField,
     ModelSelect,
     TextField,
+    chunked,
 )
 from playhouse.mysql_ext import Match
 
@@ -16,6 +19,7 @@ from ..base.protected_base_model import ProtectedBaseModel
 from ..compound.compound import Compound
 from ..enzyme.enzyme import Enzyme
 from .reaction_layout import ReactionLayout, ReactionLayoutDict
+from .reaction_stoichiometry import ReactionStoichiometry
 
 ####################################################################################
 #
@@ -70,6 +74,11 @@ class Reaction(BaseFT):
     ft_tax_ids = TextField(null=True)  # fulltext indexation of (tax_ids) for fast search of reactions
     ft_ec_numbers = TextField(null=True)  # fulltext indexation of (ec_numbers) for fast search of reactions
 
+    RELATIONS = ("substrates", "products", "enzymes")
+    CHARGE_TOLERANCE = 1e-6
+    MASS_TOLERANCE = 1e-3
+    _prefetched_relations: dict[str, list] = None
+
     # -- A --
 
     def append_biocyc_id(self, id):
@@ -129,31 +138,59 @@ class Reaction(BaseFT):
 
     # -- G --
 
+    def get_enzymes(self) -> list[Enzyme]:
+        """ Returns the enzymes, prefetched by :meth:`prefetch_relations` or queried """
+        return self._get_relation("enzymes")
+
+    def get_products(self) -> list[Compound]:
+        """ Returns the products, prefetched by :meth:`prefetch_relations` or queried """
+        return self._get_relation("products")
+
+    def get_substrates(self) -> list[Compound]:
+        """ Returns the substrates, prefetched by :meth:`prefetch_relations` or queried """
+        return self._get_relation("substrates")
+
     def get_title(self):
         return self.definition
 
+    def _get_relation(self, name: str) -> list:
+        if self._prefetched_relations is not None and name in self._prefetched_relations:
+            return self._prefetched_relations[name]
+        return list(getattr(self, name))
+
     def has_enzymes(self):
+        if self._prefetched_relations is not None and "enzymes" in self._prefetched_relations:
+            return len(self._prefetched_relations["enzymes"]) > 0
         return self.enzymes.count() > 0
 
     # -- I --
 
-    def is_charge_balanced(self):
-        total_substrate_charge = 0
-        total_product_charge = 0
-        for s in self.substrates:
-            total_substrate_charge = total_substrate_charge + s.charge
-        for p in self.products:
-            total_product_charge = total_product_charge + p.charge
-        return total_substrate_charge == total_product_charge
-
-    def is_mass_balanced(self):
-        total_substrate_mass = 0
-        total_product_mass = 0
-        for s in self.substrates:
-            total_substrate_mass = total_substrate_mass + s.mass
-        for p in self.products:
-            total_product_mass = total_product_mass + p.mass
-        return total_substrate_mass == total_product_mass
+    def is_charge_balanced(self) -> bool:
+        """
+        Returns True if the charges of the substrates and products, weighted by their stoichiometric
+        coefficients, are equal. Returns False if a charge or a coefficient is unknown.
+        """
+        return self._is_balanced("charge", self.CHARGE_TOLERANCE)
+
+    def is_mass_balanced(self) -> bool:
+        """
+        Returns True if the masses of the substrates and products, weighted by their stoichiometric
+        coefficients, are equal. Returns False if a mass or a coefficient is unknown.
+        """
+        return self._is_balanced("mass", self.MASS_TOLERANCE)
+
+    def _is_balanced(self, field_name: str, tolerance: float) -> bool:
+        compounds = {c.chebi_id: c for c in [*self.get_substrates(), *self.get_products()]}
+        equation = self.data.get("equation") or {
+            "substrates": {c.chebi_id: 1 for c in self.get_substrates()},
+            "products": {c.chebi_id: 1 for c in self.get_products()},
+        }
+        stoichiometry = ReactionStoichiometry.from_equations([(self.rhea_id, equation)])
+        values = [getattr(compounds[chebi_id], field_name) if chebi_id in compounds else None
+                  for chebi_id in stoichiometry.compound_ids]
+        values = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        delta = stoichiometry.dot(values)[0]
+        return bool(abs(delta) <= tolerance)
 
     # -- L --
 
@@ -164,6 +201,54 @@ class Reaction(BaseFT):
             return ReactionLayout.get_layout_by_rhea_id(rhea_id=self.rhea_id)
         except Exception as _:
             return None
+
+    # -- P --
+
+    @classmethod
+    def prefetch_relations(cls, reactions: list['Reaction'],
+                           include: tuple[str, ...] = RELATIONS) -> list['Reaction']:
+        """
+        Loads the substrates, products and/or enzymes of many reactions with one join per relation, instead of
+        one query per reaction and relation, and attaches them to the reactions. They are then returned by
+        :meth:`get_substrates`, :meth:`get_products` and :meth:`get_enzymes` without query.
+
+        :param reactions: The reactions
+        :type reactions: list[Reaction]
+        :param include: The relations to load, among `substrates`, `products` and `enzymes`
+        :type include: tuple[str, ...]
+        :returns: The reactions
+        :rtype: list[Reaction]
+        """
+        unknown = [name for name in include if name not in cls.RELATIONS]
+        if unknown:
+            raise BadRequestException(f"Unknown reaction relations: {', '.join(unknown)}")
+        relations = {
+            "substrates": (ReactionSubstrate, ReactionSubstrate.compound, Compound),
+            "products": (ReactionProduct, ReactionProduct.compound, Compound),
+            "enzymes": (ReactionEnzyme, ReactionEnzyme.enzyme, Enzyme),
+        }
+
+        reactions_by_id = {}
+        for reaction in reactions:
+            if reaction._prefetched_relations is None:
+                reaction._prefetched_relations = {}
+            for name in include:
+                reaction._prefetched_relations[name] = []
+            # the same reaction can be given as several instances
+            reactions_by_id.setdefault(reaction.id, []).append(reaction)
+
+        for name in include:
+            through_model, target_field, target_model = relations[name]
+            for chunk in chunked(list(reactions_by_id), cls.BATCH_SIZE):
+                query = target_model.select(target_model, through_model.reaction.alias("prefetch_reaction_id")) \
+                    .join(through_model, on=(target_field == target_model.id)) \
+                    .where(through_model.reaction << chunk) \
+                    .objects()
+                for item in query:
+                    for reaction in reactions_by_id[item.prefetch_reaction_id]:
+                        reaction._prefetched_relations[name].append(item)
+        return reactions
+
     # -- S --
 
     def set_direction(self, direction):
@@ -204,11 +289,9 @@ class Reaction(BaseFT):
 
     @classmethod
     def search_by_tax_ids(cls, tax_ids: list | str) -> ModelSelect:
-        tax_ids = [tax.replace("TAX", "") for tax in tax_ids]  # clean taxa
         if isinstance(tax_ids, str):
-            tax_ids = ["TAX" + tax_ids]
-        if isinstance(tax_ids, list):
-            tax_ids = ["TAX" + tax for tax in tax_ids]
+            tax_ids = [tax_ids]
+        tax_ids = ["TAX" + tax.replace("TAX", "") for tax in tax_ids]  # clean taxa
 
         tax_ids = " ".join(tax_ids)
         return cls.select().where(Match((cls.ft_tax_ids), tax_ids))
@@ -1,44 +1,155 @@
 
 
+import numpy as np
+import pandas as pd
 from gws_core import Logger
 from peewee import chunked
 
 from gws_biota.db.biota_db_manager import BiotaDbManager
+from gws_biota.db.db_checkpoint import DbCheckpoint
 
 from .._helper.rhea import Rhea
 from ..base.base_service import BaseService
+from ..base.natural_key_resolver import NaturalKeyResolver
+from ..compound.cofactor import Cofactor
 from ..compound.compound import Compound
 from ..enzyme.enzyme import Enzyme
 from ..taxonomy.taxonomy import Taxonomy
 from .reaction import Reaction, ReactionEnzyme, ReactionProduct, ReactionSubstrate
+from .reaction_stoichiometry import ReactionStoichiometry
 
 
 class ReactionService(BaseService):
 
+    # -- A --
+
+    @classmethod
+    def audit_balances(cls, tax_id: str = None, where=None, charge_tolerance: float = Reaction.CHARGE_TOLERANCE,
+                       mass_tolerance: float = Reaction.MASS_TOLERANCE, only_unbalanced: bool = True) -> pd.DataFrame:
+        """
+        Checks the charge and mass balances of many reactions at once.
+
+        The equations of the reactions and the charges and masses of their compounds are loaded in arrays, with a
+        few column-projected queries. The charge and mass created by each reaction are then computed by two
+        products of the stoichiometric matrix by the charge and mass vectors.
+
+        :param tax_id: If given, only the reactions of this taxon are checked
+        :type tax_id: str
+        :param where: Filter of the reactions
+        :param charge_tolerance: Maximum absolute charge delta of a balanced reaction
+        :type charge_tolerance: float
+        :param mass_tolerance: Maximum absolute mass delta of a balanced reaction
+        :type mass_tolerance: float
+        :param only_unbalanced: If True, only returns the reactions that are not both charge and mass balanced
+        :type only_unbalanced: bool
+        :returns: A table with the columns `rhea_id`, `charge_delta`, `mass_delta`, `is_charge_balanced`,
+        `is_mass_balanced` and `is_undetermined` (a charge, a mass or a coefficient is unknown: the deltas are NaN)
+        :rtype: pd.DataFrame
+        """
+        query = Reaction.search_by_tax_ids(tax_id) if tax_id else None
+        stoichiometry = ReactionStoichiometry.from_db(where=where, query=query)
+        values = stoichiometry.get_compound_values(["charge", "mass"])
+        charge_delta = stoichiometry.dot(values["charge"])
+        mass_delta = stoichiometry.dot(values["mass"])
+        table = pd.DataFrame({
+            "rhea_id": stoichiometry.reaction_ids,
+            "charge_delta": charge_delta,
+            "mass_delta": mass_delta,
+            "is_charge_balanced": np.abs(charge_delta) <= charge_tolerance,
+            "is_mass_balanced": np.abs(mass_delta) <= mass_tolerance,
+            "is_undetermined": np.isnan(charge_delta) | np.isnan(mass_delta),
+        })
+        Logger.info(f"Balance audit of {len(table)} reactions: "
+                    f"{int((~table['is_charge_balanced']).sum())} not charge balanced, "
+                    f"{int((~table['is_mass_balanced']).sum())} not mass balanced, "
+                    f"{int(table['is_undetermined'].sum())} undetermined")
+        if only_unbalanced:
+            table = table[~(table["is_charge_balanced"] & table["is_mass_balanced"])].reset_index(drop=True)
+        return table
+
+    # -- B --
+
+    @classmethod
+    def build_stoichiometric_matrix(cls, tax_id: str = None, exclude_cofactors: bool = True,
+                                    path: str = None) -> tuple:
+        """
+        Builds the sparse stoichiometric matrix (compounds x reactions) of a taxon or of all the reactions.
+
+        The coefficients are read from the equations of the reactions, with a single column-projected query,
+        without loading the reactions nor their substrates and products. The matrix is returned as CSC arrays,
+        that can be wrapped without copy by `scipy.sparse.csc_matrix((data, indices, indptr), shape=...)`
+        (scipy is not required).
+
+        :param tax_id: If given, only the reactions of this taxon are used
+        :type tax_id: str
+        :param exclude_cofactors: If True, the cofactors are not included in the matrix
+        :type exclude_cofactors: bool
+        :param path: If given, the matrix is saved in this `.npz` file (see `ReactionStoichiometry.save_npz`)
+        :type path: str
+        :returns: The CSC arrays (data, indices, indptr) of the matrix (see `ReactionStoichiometry.to_csc_arrays`),
+        the ChEBI ids of its rows and the Rhea ids of its columns
+        :rtype: tuple[tuple[np.ndarray, np.ndarray, np.ndarray], np.ndarray, np.ndarray]
+        """
+        query = Reaction.search_by_tax_ids(tax_id) if tax_id else None
+        exclude_compounds = Cofactor.get_factors_as_list() if exclude_cofactors else None
+        stoichiometry = ReactionStoichiometry.from_db(query=query, exclude_compounds=exclude_compounds)
+        Logger.info(f"Stoichiometric matrix of {stoichiometry.nb_reactions} reactions "
+                    f"and {stoichiometry.nb_compounds} compounds built")
+        if path:
+            stoichiometry.save_npz(path)
+            Logger.info(f"✓ Stoichiometric matrix saved in {path}")
+        return (stoichiometry.to_csc_arrays(),
+                np.array(stoichiometry.compound_ids, dtype=str),
+                np.array(stoichiometry.reaction_ids, dtype=str))
+
+    # -- C --
+
     @classmethod
     # Removed @BiotaDbManager.transaction() to avoid MariaDB timeout
     # Each operation now has its own short transaction via use_transaction=False
     def create_reaction_db(cls, path, rhea_reaction_text_file, rhea_direction_file, rhea2ecocyc_file,
-                           rhea2metacyc_file, rhea2macie_file, rhea2kegg_reaction_file, rhea2ec_file, rhea2reactome_file):
+                           rhea2metacyc_file, rhea2macie_file, rhea2kegg_reaction_file, rhea2ec_file, rhea2reactome_file,
+                           checkpoint: DbCheckpoint = None):
         """
         Creates and fills the `reaction` database
 
         :param: path of each files
         :type path: str
+        :param checkpoint: If given, the parsed reactions and the completed save phases are checkpointed,
+        and the phases completed by a previous build are skipped
+        :type checkpoint: DbCheckpoint
         :returns: None
         :rtype: None
         """
 
-        list_of_reactions = Rhea.parse_reaction_from_file(
-            path, rhea_reaction_text_file)
-        cls._create_reactions(list_of_reactions)
+        if checkpoint is None:
+            checkpoint = DbCheckpoint("reaction")
+
+        if checkpoint.is_persistent:
+            list_of_reactions = checkpoint.load_or_parse(
+                "rhea_reactions", lambda: Rhea.parse_reaction_from_file(path, rhea_reaction_text_file))
+        else:
+            # the reactions are saved while the file is parsed
+            list_of_reactions = Rhea.iter_reactions_from_file(path, rhea_reaction_text_file)
+        checkpoint.run_phase("reactions", lambda: cls._create_reactions(list_of_reactions),
+                             tables=[ReactionEnzyme, ReactionProduct, ReactionSubstrate, Reaction])
+        checkpoint.run_phase("directions", lambda: cls._update_directions(rhea_direction_file))
+        checkpoint.run_phase("xrefs", lambda: cls._update_xrefs(
+            rhea2ecocyc_file, rhea2metacyc_file, rhea2macie_file, rhea2kegg_reaction_file, rhea2ec_file,
+            rhea2reactome_file))
+        checkpoint.complete()
 
+    @classmethod
+    def _update_directions(cls, rhea_direction_file):
         list_of_directions = Rhea.parse_csv_from_file(rhea_direction_file)
         cols = Rhea.get_columns_from_lines(list_of_directions)
 
         for k in ['UN', 'LR', 'RL', 'BI']:
             cls._update_direction_from_list(cols[k], k)
 
+    @classmethod
+    def _update_xrefs(cls, rhea2ecocyc_file, rhea2metacyc_file, rhea2macie_file, rhea2kegg_reaction_file,
+                      rhea2ec_file, rhea2reactome_file):
         xref_ids = Rhea.parse_csv_from_file(rhea2ecocyc_file)
         cls._update_master_and_biocyc_ids_from_rhea2biocyc(xref_ids)
 
@@ -65,15 +176,14 @@ class ReactionService(BaseService):
         reaction_subtrates and reations_products by calling
         _create_substrate_vals_from_data(), _create_product_vals_from_data()
 
-        : type list_reaction: list
-        : param list_reaction: list of dictionnaries where each element refers
-        to a rhea reaction
+        : type list_reaction: Iterable[dict]
+        : param list_reaction: list (or generator) of dictionnaries where each element refers
+        to a rhea reaction. The reactions are saved chunk by chunk while they are generated.
         : returns: list of reactions entities
         : rtype: list
         """
 
-        rxn_count = len(list_reaction)
-        Logger.info(f"Saving {rxn_count} reactions ...")
+        Logger.info("Saving reactions ...")
 
         # Force fresh DB connection before starting saves
         db = Reaction.get_db()
@@ -81,8 +191,9 @@ class ReactionService(BaseService):
         db.connect()
         Logger.info("Reconnected to database for saves")
 
-        reactions = [Reaction(data=data) for data in list_reaction]
-        for reaction_chunk in chunked(reactions, cls.BATCH_SIZE):
+        reactions = []
+        for data_chunk in chunked(list_reaction, cls.BATCH_SIZE):
+            reaction_chunk = [Reaction(data=data) for data in data_chunk]
             for react in reaction_chunk:
                 if 'entry' in react.data.keys():
                     react.rhea_id = react.data['entry']
@@ -97,8 +208,11 @@ class ReactionService(BaseService):
                 db.connect()
                 Logger.info("⚠ Reconnected to database (connection was lost)")
 
-            # batch_size=100: avoid 'max_allowed_packet' error with large JSON data fields
-            Reaction.create_all(reaction_chunk, batch_size=100, use_transaction=False)
+            # batch_size=100: avoid 'max_allowed_packet' error with large JSON data fields (INSERT fallback only)
+            Reaction.bulk_load(reaction_chunk, batch_size=100)
+            reactions.extend(reaction_chunk)
+
+        Logger.info(f"✓ {len(reactions)} reactions saved")
 
         # Ping DB before substrates insert
         try:
@@ -108,10 +222,23 @@ class ReactionService(BaseService):
             db.connect()
             Logger.info("⚠ Reconnected to database")
 
-        vals = []
+        # Bulk linking stage: load the compound and enzyme maps once, then build
+        # all the relation rows in memory (instead of 3 queries per reaction)
+        Logger.info("Loading compound and enzyme maps for reaction linking...")
+        compound_resolver = NaturalKeyResolver.from_db(Compound, "chebi_id")
+        ec_numbers = {ec for react in reactions for ec in react.data.get('enzymes', [])}
+        enzyme_map = cls._load_enzyme_map(ec_numbers)
+
+        substrate_vals = []
+        product_vals = []
+        enzyme_vals = []
         for react in reactions:
-            vals.extend(cls._create_substrate_vals_from_data(react))
-        ReactionSubstrate.insert_all(vals, batch_size=500, use_transaction=False)
+            substrate_vals.extend(cls._create_substrate_vals_from_data(react, compound_resolver))
+            product_vals.extend(cls._create_product_vals_from_data(react, compound_resolver))
+            enzyme_vals.extend(cls._create_enzymes_vals_and_set_ft_names_from_data(react, enzyme_map))
+        compound_resolver.log_unresolved()
+
+        ReactionSubstrate.bulk_load(substrate_vals, batch_size=500)
 
         # Ping DB before products insert
         try:
@@ -121,10 +248,7 @@ class ReactionService(BaseService):
             db.connect()
             Logger.info("⚠ Reconnected to database")
 
-        vals = []
-        for react in reactions:
-            vals.extend(cls._create_product_vals_from_data(react))
-        ReactionProduct.insert_all(vals, batch_size=500, use_transaction=False)
+        ReactionProduct.bulk_load(product_vals, batch_size=500)
 
         # Ping DB before enzymes insert
         try:
@@ -134,11 +258,7 @@ class ReactionService(BaseService):
             db.connect()
             Logger.info("⚠ Reconnected to database")
 
-        vals = []
-        for react in reactions:
-            vals.extend(
-                cls._create_enzymes_vals_and_set_ft_names_from_data(react))
-        ReactionEnzyme.insert_all(vals, batch_size=500, use_transaction=False)
+        ReactionEnzyme.bulk_load(enzyme_vals, batch_size=500)
 
         # Ping DB before ft_names update
         try:
@@ -155,41 +275,57 @@ class ReactionService(BaseService):
         return reactions
 
     @classmethod
-    def _create_substrate_vals_from_data(cls, react):
+    def _load_enzyme_map(cls, ec_numbers) -> dict[str, list[tuple]]:
         """
-        Set substrates from `data`
+        Load the enzymes of the given EC numbers in a few scans
+
+        :returns: a dictionnary in the format {ec_number: [(enzyme_id, ft_names, tax_ids), ...]}
+        where `tax_ids` are the non-null `tax_*` columns of the enzyme
+        :rtype: dict
         """
+        tax_fields = [getattr(Enzyme, "tax_" + tax_rank) for tax_rank in Taxonomy.get_tax_tree()]
+        enzyme_map = {}
+        for chunk in chunked(sorted(ec_numbers), cls.BATCH_SIZE):
+            query = Enzyme.select(Enzyme.id, Enzyme.ec_number, Enzyme.ft_names, *tax_fields) \
+                .where(Enzyme.ec_number << chunk).tuples()
+            for enz_id, ec_number, ft_names, *tax_ids in query.iterator():
+                tax_ids = [tax_id for tax_id in tax_ids if tax_id]
+                enzyme_map.setdefault(ec_number, []).append((enz_id, ft_names, tax_ids))
+        Logger.info(f"Loaded {sum(len(v) for v in enzyme_map.values())} enzymes for {len(enzyme_map)} EC numbers")
+        return enzyme_map
 
+    @classmethod
+    def _create_compound_vals(cls, react, chebi_ids, compound_resolver: NaturalKeyResolver):
         vals = []
-        Q = Compound.select().where(
-            Compound.chebi_id << react.data['substrates'])
-        for comp in Q:
-            # react.substrates.add(comp)
-            vals.append({
-                'reaction': react.id,
-                'compound': comp.id
-            })
+        seen = set()
+        for chebi_id in chebi_ids:
+            comp_id = compound_resolver.resolve(chebi_id)
+            if comp_id is not None and comp_id not in seen:
+                seen.add(comp_id)
+                vals.append({
+                    'reaction': react.id,
+                    'compound': comp_id
+                })
         return vals
 
     @classmethod
-    def _create_product_vals_from_data(cls, react):
+    def _create_substrate_vals_from_data(cls, react, compound_resolver: NaturalKeyResolver):
+        """
+        Set substrates from `data`
+        """
+
+        return cls._create_compound_vals(react, react.data['substrates'], compound_resolver)
+
+    @classmethod
+    def _create_product_vals_from_data(cls, react, compound_resolver: NaturalKeyResolver):
         """
         Set products from `data`
         """
 
-        vals = []
-        Q = Compound.select().where(
-            Compound.chebi_id << react.data['products'])
-        for comp in Q:
-            # react.products.add(comp)
-            vals.append({
-                'reaction': react.id,
-                'compound': comp.id
-            })
-        return vals
+        return cls._create_compound_vals(react, react.data['products'], compound_resolver)
 
     @classmethod
-    def _create_enzymes_vals_and_set_ft_names_from_data(cls, react):
+    def _create_enzymes_vals_and_set_ft_names_from_data(cls, react, enzyme_map: dict[str, list[tuple]]):
         """
         Set enzymes from `data`
         """
@@ -198,21 +334,17 @@ class ReactionService(BaseService):
         ft_tax_ids = []
         ft_ec_numbers = []
         if 'enzymes' in react.data:
-            Q = Enzyme.select().where(
-                Enzyme.ec_number << react.data['enzymes'])
             ft_names = []
-            for enz in Q:
-                ft_names.append(enz.ft_names)
-                # react.enzymes.add(enz)
-                vals.append({
-                    'reaction': react.id,
-                    'enzyme': enz.id
-                })
-
-                ft_ec_numbers.append("EC" + enz.ec_number.replace(".", ""))
-                for tax_rank in Taxonomy.get_tax_tree():
-                    tax_id = getattr(enz, "tax_"+tax_rank)
-                    if tax_id:
+            for ec_number in dict.fromkeys(react.data['enzymes']):
+                for enz_id, enz_ft_names, tax_ids in enzyme_map.get(ec_number, []):
+                    ft_names.append(enz_ft_names)
+                    vals.append({
+                        'reaction': react.id,
+                        'enzyme': enz_id
+                    })
+
+                    ft_ec_numbers.append("EC" + ec_number.replace(".", ""))
+                    for tax_id in tax_ids:
                         ft_tax_ids.append("TAX" + tax_id)
 
             # set fulltext index data
@@ -222,6 +354,20 @@ class ReactionService(BaseService):
             react.ft_ec_numbers = ";".join(list(set(ft_ec_numbers)))
 
         return vals
+
+    # -- I --
+
+    @classmethod
+    def _iter_reactions_by_rhea_ids(cls, rhea_ids: list[str], fields: list[str]):
+        """
+        Yields lightweight reactions with the given rhea ids, with only their `id`, `rhea_id` and `fields` loaded
+        (enough to update these fields with `update_all`)
+        """
+        fields = ['id', 'rhea_id', *fields]
+        for chunk in chunked(rhea_ids, cls.BATCH_SIZE):
+            for row in Reaction.iter_rows(fields, where=Reaction.rhea_id << chunk):
+                yield Reaction(**dict(zip(fields, row)))
+
     # -- U --
 
     @classmethod
@@ -243,13 +389,10 @@ class ReactionService(BaseService):
             biocyc_ids[rhea_id] = dict_['id']
 
         reaction_list = []
-        # for rhea_id in rhea_ids:
-        for chunk in chunked(rhea_ids, cls.BATCH_SIZE):
-            query = Reaction.select().where(Reaction.rhea_id << chunk)
-            for reaction in query:
-                if reaction.rhea_id in biocyc_ids:
-                    reaction.append_biocyc_id(biocyc_ids[reaction.rhea_id])
-                    reaction_list.append(reaction)
+        for reaction in cls._iter_reactions_by_rhea_ids(rhea_ids, ['biocyc_ids']):
+            if reaction.rhea_id in biocyc_ids:
+                reaction.append_biocyc_id(biocyc_ids[reaction.rhea_id])
+                reaction_list.append(reaction)
         Reaction.update_all(reaction_list, fields=['biocyc_ids'], batch_size=500, use_transaction=False)
 
     @classmethod
@@ -272,19 +415,16 @@ class ReactionService(BaseService):
             biocyc_ids[rhea_id] = dict_['id']
 
         reaction_list = []
-        # for rhea_id in rhea_ids:
-        for chunk in chunked(rhea_ids, cls.BATCH_SIZE):
-            query = Reaction.select().where(Reaction.rhea_id << chunk)
-            for reaction in query:
-                has_changed = False
-                if reaction.rhea_id in master_ids:
-                    reaction.set_master_id(master_ids[reaction.rhea_id])
-                    has_changed = True
-                if reaction.rhea_id in biocyc_ids:
-                    reaction.append_biocyc_id(biocyc_ids[reaction.rhea_id])
-                    has_changed = True
-                if has_changed:
-                    reaction_list.append(reaction)
+        for reaction in cls._iter_reactions_by_rhea_ids(rhea_ids, ['master_id', 'biocyc_ids']):
+            has_changed = False
+            if reaction.rhea_id in master_ids:
+                reaction.set_master_id(master_ids[reaction.rhea_id])
+                has_changed = True
+            if reaction.rhea_id in biocyc_ids:
+                reaction.append_biocyc_id(biocyc_ids[reaction.rhea_id])
+                has_changed = True
+            if has_changed:
+                reaction_list.append(reaction)
 
         Reaction.update_all(reaction_list, fields=['master_id', 'biocyc_ids'], batch_size=500, use_transaction=False)
 
@@ -307,19 +447,16 @@ class ReactionService(BaseService):
             kegg_ids[rhea_id] = dict_['id']
 
         reaction_list = []
-        # for rhea_id in rhea_ids:
-        for chunk in chunked(rhea_ids, cls.BATCH_SIZE):
-            query = Reaction.select().where(Reaction.rhea_id << chunk)
-            for reaction in query:
-                has_changed = False
-                if reaction.rhea_id in master_ids:
-                    reaction.set_master_id(master_ids[reaction.rhea_id])
-                    has_changed = True
-                if reaction.rhea_id in kegg_ids:
-                    reaction.set_kegg_id(kegg_ids[reaction.rhea_id])
-                    has_changed = True
-                if has_changed:
-                    reaction_list.append(reaction)
+        for reaction in cls._iter_reactions_by_rhea_ids(rhea_ids, ['master_id', 'kegg_id']):
+            has_changed = False
+            if reaction.rhea_id in master_ids:
+                reaction.set_master_id(master_ids[reaction.rhea_id])
+                has_changed = True
+            if reaction.rhea_id in kegg_ids:
+                reaction.set_kegg_id(kegg_ids[reaction.rhea_id])
+                has_changed = True
+            if has_changed:
+                reaction_list.append(reaction)
         Reaction.update_all(reaction_list, fields=['master_id', 'kegg_id'], batch_size=500, use_transaction=False)
 
     @classmethod
@@ -339,11 +476,8 @@ class ReactionService(BaseService):
             rhea_ids.append('RHEA:'+s)
 
         reaction_list = []
-        # for rhea_id in rhea_ids:
-        for chunk in chunked(rhea_ids, cls.BATCH_SIZE):
-            query = Reaction.select().where(Reaction.rhea_id << chunk)
-            for reaction in query:
-                reaction.set_direction(direction)
-                reaction_list.append(reaction)
+        for reaction in cls._iter_reactions_by_rhea_ids(rhea_ids, []):
+            reaction.set_direction(direction)
+            reaction_list.append(reaction)
 
         Reaction.update_all(reaction_list, fields=['direction'], batch_size=500, use_transaction=False)
@@ -0,0 +1,232 @@
+import math
+import os
+from typing import Iterable
+
+import numpy as np
+from peewee import ModelSelect, chunked
+
+
+class ReactionStoichiometry:
+    """
+    Stoichiometric coefficients of a set of reactions, in coordinate format: the compound `compound_indexes[k]`
+    has the coefficient `coefficients[k]` in the reaction `reaction_indexes[k]`, negative for the substrates and
+    positive for the products.
+
+    The coefficients are read from the equations of the reactions (`data["equation"]`). The non-numeric
+    coefficients of polymer reactions (e.g. `n`, `2n`, `n+1`) are NaN.
+
+    The stoichiometric matrix (compounds x reactions) can be exported in CSC format and saved in a `.npz` file
+    that can be read by `scipy.sparse.load_npz` or by `ReactionStoichiometry.load_npz`.
+    """
+
+    BATCH_SIZE = 10000
+    NPZ_FORMAT = "csc"
+
+    reaction_ids: list[str] = None
+    compound_ids: list[str] = None
+    reaction_indexes: np.ndarray = None
+    compound_indexes: np.ndarray = None
+    coefficients: np.ndarray = None
+
+    def __init__(self, reaction_ids: list[str], compound_ids: list[str], reaction_indexes: np.ndarray,
+                 compound_indexes: np.ndarray, coefficients: np.ndarray):
+        self.reaction_ids = reaction_ids
+        self.compound_ids = compound_ids
+        self.reaction_indexes = reaction_indexes
+        self.compound_indexes = compound_indexes
+        self.coefficients = coefficients
+
+    # -- D --
+
+    def dot(self, compound_values: np.ndarray) -> np.ndarray:
+        """
+        Returns, for each reaction, the sum of the values of its compounds weighted by their coefficients
+        (i.e. the product of the transposed stoichiometric matrix by the vector of values).
+        The sum is NaN if a value or a coefficient of the reaction is NaN.
+
+        :param compound_values: The value of each compound (e.g. the charges)
+        :type compound_values: np.ndarray
+        :returns: The sum of each reaction (e.g. the charge created by the reaction)
+        :rtype: np.ndarray
+        """
+        weights = self.coefficients * np.asarray(compound_values, dtype=np.float64)[self.compound_indexes]
+        return np.bincount(self.reaction_indexes, weights=weights, minlength=self.nb_reactions)
+
+    # -- F --
+
+    @classmethod
+    def from_db(cls, where=None, query: ModelSelect = None,
+                exclude_compounds: Iterable[str] = None) -> 'ReactionStoichiometry':
+        """
+        Reads the equations of the reactions from the database, without loading the other columns
+
+        :param where: Filter of the reactions
+        :param query: Base query of the reactions (e.g. `Reaction.search_by_tax_ids(...)`)
+        :type query: ModelSelect
+        :param exclude_compounds: Compounds to ignore (e.g. the cofactors)
+        :type exclude_compounds: Iterable[str]
+        :returns: The stoichiometry
+        :rtype: ReactionStoichiometry
+        """
+        from .reaction import Reaction
+        rows = Reaction.iter_rows([Reaction.rhea_id], where=where, query=query,
+                                  json_paths={"equation": "data.equation"})
+        return cls.from_equations(rows, exclude_compounds=exclude_compounds)
+
+    @classmethod
+    def from_equations(cls, equations: Iterable[tuple[str, dict]],
+                       exclude_compounds: Iterable[str] = None) -> 'ReactionStoichiometry':
+        """
+        Creates the stoichiometry from equations
+
+        :param equations: The (rhea_id, equation) of the reactions, the equations being in the format
+        {"substrates": {chebi_id: coefficient}, "products": {chebi_id: coefficient}}
+        :type equations: Iterable[tuple[str, dict]]
+        :param exclude_compounds: Compounds to ignore (e.g. the cofactors)
+        :type exclude_compounds: Iterable[str]
+        :returns: The stoichiometry
+        :rtype: ReactionStoichiometry
+        """
+        exclude_compounds = set(exclude_compounds or [])
+        compound_index: dict[str, int] = {}
+        reaction_ids = []
+        reaction_indexes, compound_indexes, coefficients = [], [], []
+        for rhea_id, equation in equations:
+            reaction = len(reaction_ids)
+            reaction_ids.append(rhea_id)
+            for side, sign in (("substrates", -1.0), ("products", 1.0)):
+                for chebi_id, coefficient in ((equation or {}).get(side) or {}).items():
+                    if chebi_id in exclude_compounds:
+                        continue
+                    reaction_indexes.append(reaction)
+                    compound_indexes.append(compound_index.setdefault(chebi_id, len(compound_index)))
+                    coefficients.append(sign * cls.parse_coefficient(coefficient))
+        return ReactionStoichiometry(
+            reaction_ids=reaction_ids,
+            compound_ids=list(compound_index),
+            reaction_indexes=np.asarray(reaction_indexes, dtype=np.int64),
+            compound_indexes=np.asarray(compound_indexes, dtype=np.int64),
+            coefficients=np.asarray(coefficients, dtype=np.float64),
+        )
+
+    # -- G --
+
+    def get_compound_values(self, field_names: list[str]) -> dict[str, np.ndarray]:
+        """
+        Reads properties of the compounds from the database, in one column projection per chunk of compounds
+
+        :param field_names: The names of the fields of the compounds (e.g. `charge`, `mass`)
+        :type field_names: list[str]
+        :returns: For each field, the value of each compound (NaN if the compound or its value is missing)
+        :rtype: dict[str, np.ndarray]
+        """
+        from ..compound.compound import Compound
+        values = {name: np.full(self.nb_compounds, np.nan) for name in field_names}
+        compound_index = {chebi_id: i for i, chebi_id in enumerate(self.compound_ids)}
+        for chunk in chunked(self.compound_ids, self.BATCH_SIZE):
+            for chebi_id, *row in Compound.iter_rows(["chebi_id", *field_names], where=Compound.chebi_id << chunk):
+                for name, value in zip(field_names, row):
+                    if value is not None:
+                        values[name][compound_index[chebi_id]] = value
+        return values
+
+    # -- L --
+
+    @classmethod
+    def load_npz(cls, path: str) -> 'ReactionStoichiometry':
+        """
+        Loads a stoichiometric matrix saved by `save_npz`
+
+        :param path: The path of the `.npz` file
+        :type path: str
+        :returns: The stoichiometry
+        :rtype: ReactionStoichiometry
+        """
+        with np.load(path) as npz:
+            indptr = npz["indptr"]
+            return ReactionStoichiometry(
+                reaction_ids=npz["reaction_ids"].tolist(),
+                compound_ids=npz["compound_ids"].tolist(),
+                reaction_indexes=np.repeat(np.arange(len(indptr) - 1, dtype=np.int64), np.diff(indptr)),
+                compound_indexes=npz["indices"].astype(np.int64),
+                coefficients=npz["data"].astype(np.float64),
+            )
+
+    # -- N --
+
+    @property
+    def nb_compounds(self) -> int:
+        return len(self.compound_ids)
+
+    @property
+    def nb_reactions(self) -> int:
+        return len(self.reaction_ids)
+
+    # -- P --
+
+    @staticmethod
+    def parse_coefficient(value) -> float:
+        """ Returns a stoichiometric coefficient as a float, NaN if it is not a number (e.g. `n`, `2n`) """
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return math.nan
+        return value if math.isfinite(value) else math.nan
+
+    # -- S --
+
+    def save_npz(self, path: str) -> None:
+        """
+        Saves the stoichiometric matrix in an uncompressed `.npz` file, in the layout of `scipy.sparse.save_npz`
+        (CSC arrays `data`, `indices`, `indptr`, `shape` and `format`), with the `compound_ids` (rows) and
+        `reaction_ids` (columns)
+
+        :param path: The path of the `.npz` file
+        :type path: str
+        """
+        data, indices, indptr = self.to_csc_arrays()
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path,
+                 format=np.array(self.NPZ_FORMAT),
+                 shape=np.array(self.shape, dtype=np.int64),
+                 data=data, indices=indices, indptr=indptr,
+                 compound_ids=np.array(self.compound_ids, dtype=str),
+                 reaction_ids=np.array(self.reaction_ids, dtype=str))
+        os.replace(tmp_path, path)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """ The shape (number of compounds, number of reactions) of the stoichiometric matrix """
+        return (self.nb_compounds, self.nb_reactions)
+
+    # -- T --
+
+    def to_csc_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the stoichiometric matrix (compounds x reactions) in CSC format. The coefficients of a compound
+        that appears several times in a reaction (e.g. on both sides) are summed.
+
+        :returns: The arrays (data, indices, indptr): the coefficients of the reaction `j` are
+        `data[indptr[j]:indptr[j+1]]`, for the compounds `indices[indptr[j]:indptr[j+1]]`
+        :rtype: tuple[np.ndarray, np.ndarray, np.ndarray]
+        """
+        keys = self.reaction_indexes * max(self.nb_compounds, 1) + self.compound_indexes
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        data = np.zeros(len(unique_keys), dtype=np.float64)
+        np.add.at(data, inverse, self.coefficients)
+        columns = unique_keys // max(self.nb_compounds, 1)
+        indices = (unique_keys % max(self.nb_compounds, 1)).astype(np.int32)
+        indptr = np.zeros(self.nb_reactions + 1, dtype=np.int64)
+        np.cumsum(np.bincount(columns, minlength=self.nb_reactions), out=indptr[1:])
+        return data, indices, indptr
+
+    def to_sparse(self):
+        """
+        Returns the stoichiometric matrix (compounds x reactions) as a `scipy.sparse.csc_matrix`.
+        Requires scipy.
+
+        :returns: The matrix
+        :rtype: scipy.sparse.csc_matrix
+        """
+        from scipy.sparse import csc_matrix
+        return csc_matrix(self.to_csc_arrays(), shape=self.shape)
@@ -1,14 +1,14 @@
 
 
 from gws_core.model.typing_register_decorator import typing_registrator
-from peewee import CharField, ForeignKeyField
+from peewee import CharField, ForeignKeyField, IntegerField
 
 from ..base.protected_base_model import ProtectedBaseModel
-from ..ontology.ontology import Ontology
+from ..ontology.ontology import Ontology, OntologyHierarchy
 
 
 @typing_registrator(unique_name="SBO", object_type="MODEL", hide=True)
-class SBO(Ontology):
+class SBO(OntologyHierarchy, Ontology):
     """
     This class represents SBO terms.
 
@@ -25,21 +25,6 @@ class SBO(Ontology):
     """
 
     sbo_id = CharField(null=True, index=True)
-    _ancestors = None
-
-    # -- A --
-
-    @property
-    def ancestors(self):
-        if self._ancestors is not None:
-            return self._ancestors
-
-        self._ancestors = []
-        Q = SBOAncestor.select().where(SBOAncestor.sbo == self.id)
-        for q in Q:
-            self._ancestors.append(q.ancestor)
-
-        return self._ancestors
 
     # -- C --
 
@@ -77,6 +62,12 @@ class SBO(Ontology):
         SBOAncestor.drop_table()
         super().drop_table(*arg, **kwargs)
 
+    # -- G --
+
+    @classmethod
+    def get_ancestor_model(cls):
+        return SBOAncestor
+
     # -- S --
 
     def set_sbo_id(self, sbo_id):
@@ -95,18 +86,23 @@ class SBO(Ontology):
 class SBOAncestor(ProtectedBaseModel):
     """
     This class defines the many-to-many relationship between the sbo terms and theirs ancestors
+    (transitive closure of the hierarchy)
 
     :property sbo: id of the concerned sbo term
     :type sbo: CharField
     :property ancestor: ancestor of the concerned sbo term
     :type ancestor: CharField
+    :property depth: distance between the term and its ancestor (1 for the parents)
+    :type depth: int
     """
     sbo = ForeignKeyField(SBO)
     ancestor = ForeignKeyField(SBO)
+    depth = IntegerField(default=1)
 
     class Meta:
         table_name = 'biota_sbo_ancestors'
         is_table = True
         indexes = (
             (('sbo', 'ancestor'), True),
+            (('ancestor', 'sbo'), False),
         )
@@ -6,6 +6,8 @@ from gws_biota.db.biota_db_manager import BiotaDbManager
 
 from .._helper.ontology import Onto as OntoHelper
 from ..base.base_service import BaseService
+from ..base.natural_key_resolver import NaturalKeyResolver
+from ..ontology.ontology_closure import OntologyClosure
 from .sbo import SBO, SBOAncestor
 
 
@@ -72,13 +74,12 @@ class SBOService(BaseService):
         Logger.info("STEP 2: Inserting SBO ancestor relationships")
         Logger.info("-" * 80)
 
-        vals = []
-        for sbo in sbos:
-            val = cls._get_ancestors_query(sbo)
-            for v in val:
-                vals.append(v)
+        resolver = NaturalKeyResolver.from_models(sbos, "sbo_id")
+        closure = OntologyClosure({sbo.sbo_id: sbo.data.get("ancestors") for sbo in sbos})
+        vals = resolver.resolve_closure(closure, term_field="sbo")
 
         Logger.info(f"Generated {len(vals)} ancestor relationship records")
+        resolver.log_unresolved()
 
         # Deduplicate before insertion
         vals = cls._deduplicate_ancestor_vals(vals, 'sbo', 'ancestor')
@@ -107,24 +108,6 @@ class SBOService(BaseService):
         Logger.info("=" * 80)
         message_dispatcher.notify_info_message("✓ SBO database completed!")
 
-    @classmethod
-    def _get_ancestors_query(cls, sbo):
-        """
-        Look for the sbo term ancestors and returns all sbo-sbo_ancestors relations in a list.
-
-        :returns: a list of dictionnaries inf the following format: {'sbo': self.id, 'ancestor': ancestor.id}
-        :rtype: list
-        """
-        vals = []
-        if 'ancestors' not in sbo.data:
-            return vals
-        for ancestor in sbo.data['ancestors']:
-            if (ancestor != sbo.sbo_id):
-                val = {'sbo': sbo.id, 'ancestor': SBO.get(
-                    SBO.sbo_id == ancestor).id}
-                vals.append(val)
-        return (vals)
-
     @classmethod
     def _deduplicate_ancestor_vals(cls, vals: list[dict], key1: str, key2: str) -> list[dict]:
         """Remove duplicate ancestor relationships"""
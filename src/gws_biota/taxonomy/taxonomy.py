@@ -1,8 +1,9 @@
 
 
 from gws_core.model.typing_register_decorator import typing_registrator
-from peewee import CharField
+from peewee import CharField, chunked
 
+from ..base.protected_base_model import ProtectedBaseModel
 from ..ontology.ontology import Ontology
 
 
@@ -66,6 +67,16 @@ class Taxonomy(Ontology):
 
     # -- C --
 
+    @classmethod
+    def create_table(cls, *args, **kwargs):
+        """
+        Creates `taxonomy` table and related tables.
+
+        Extra parameters are passed to :meth:`peewee.Model.create_table`
+        """
+        super().create_table(*args, **kwargs)
+        TaxonomyLineage.create_table()
+
     @property
     def children(self):
         if self._children is not None:
@@ -73,6 +84,18 @@ class Taxonomy(Ontology):
         self._children = Taxonomy.select().where(Taxonomy.ancestor_tax_id == self.tax_id)
         return self._children
 
+    # -- D --
+
+    @classmethod
+    def drop_table(cls, *arg, **kwargs):
+        """
+        Drops `taxonomy` table and related tables.
+
+        Extra parameters are passed to :meth:`peewee.Model.drop_table`
+        """
+        TaxonomyLineage.drop_table()
+        super().drop_table(*arg, **kwargs)
+
     # -- G --
 
     @classmethod
@@ -109,3 +132,51 @@ class Taxonomy(Ontology):
     class Meta:
         table_name = 'biota_taxonomy'
         is_table = True
+
+
+class TaxonomyLineage(ProtectedBaseModel):
+    """
+    This class stores the precomputed lineage of each taxonomy term, i.e. the tax_id of the
+    term or of its ancestors at each rank of the taxonomy tree (see `Taxonomy.get_tax_tree()`)
+
+    :property tax_id: taxonomy id in the ncbi taxonomy
+    :type tax_id: CharField
+    """
+
+    tax_id = CharField(null=False, unique=True)
+    tax_superkingdom = CharField(null=True)
+    tax_clade = CharField(null=True)
+    tax_kingdom = CharField(null=True)
+    tax_subkingdom = CharField(null=True)
+    tax_class = CharField(null=True)
+    tax_phylum = CharField(null=True)
+    tax_subphylum = CharField(null=True)
+    tax_order = CharField(null=True)
+    tax_genus = CharField(null=True)
+    tax_family = CharField(null=True)
+    tax_species = CharField(null=True)
+
+    # -- G --
+
+    @classmethod
+    def get_lineages(cls, tax_ids: list[str], batch_size: int = 5000) -> dict[str, dict[str, str]]:
+        """
+        Returns the lineages of a list of taxonomy ids, using one query per batch
+
+        :param tax_ids: The taxonomy ids
+        :type tax_ids: list[str]
+        :returns: a dictionnary in the format {tax_id: {rank: tax_id}}
+        :rtype: dict
+        """
+        ranks = Taxonomy.get_tax_tree()
+        fields = [getattr(cls, "tax_" + rank) for rank in ranks]
+        lineages = {}
+        for chunk in chunked(list(set(tax_ids)), batch_size):
+            query = cls.select(cls.tax_id, *fields).where(cls.tax_id << chunk).tuples()
+            for tax_id, *lineage in query:
+                lineages[tax_id] = {rank: val for rank, val in zip(ranks, lineage) if val}
+        return lineages
+
+    class Meta:
+        table_name = 'biota_taxonomy_lineage'
+        is_table = True
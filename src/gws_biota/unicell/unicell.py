@@ -2,8 +2,10 @@
 
 import hashlib
 import pickle
+from typing import Optional
 
 import networkx as nx
+import numpy as np
 from gws_core import BadRequestException
 from gws_core.model.typing_register_decorator import typing_registrator
 from peewee import BlobField
@@ -13,6 +15,7 @@ from gws_biota import Compound
 from ..base.base_ft import BaseFT
 from ..compound.compound import Compound
 from ..reaction.reaction import Reaction
+from .unicell_graph import UnicellGraph, UnicellGraphView
 
 
 @typing_registrator(unique_name="Unicell", object_type="MODEL", hide=True)
@@ -21,19 +24,14 @@ class Unicell(BaseFT):
     The unicell
     """
 
-    compound_id_list = BlobField()
-    reaction_id_list = BlobField()
-    compound_x_list = BlobField()
-    compound_y_list = BlobField()
-    rhea_edge_map = BlobField()
+    compound_id_list = BlobField(null=True)
+    reaction_id_list = BlobField(null=True)
+    compound_x_list = BlobField(null=True)
+    compound_y_list = BlobField(null=True)
+    rhea_edge_map = BlobField(null=True)
     graph = BlobField()
 
-    _compound_x_list: list[float] = None
-    _compound_y_list: list[float] = None
-    _compound_id_list: list[str] = None
-    _reaction_id_list: list[str] = None
-    _rhea_edge_map: dict[str, list[str]] = None
-    _graph = None
+    _unicell_graph: UnicellGraph = None
 
     @classmethod
     def retrieve(cls):
@@ -60,61 +58,92 @@ class Unicell(BaseFT):
         Reaction.create_table()
         Compound.create_table()
 
+    @classmethod
+    def from_unicell_graph(cls, unicell_graph: UnicellGraph) -> 'Unicell':
+        """
+        Creates a unicell storing the graph as raw numpy buffers. A graph loaded from a buffer (e.g. memory-mapped
+        with `UnicellGraph.load`) is not serialized again: the unicell keeps this buffer.
+        """
+        if unicell_graph.buffer is not None:
+            uni_cell = Unicell(graph=unicell_graph.buffer)
+        else:
+            uni_cell = Unicell(graph=unicell_graph.to_bytes())
+        uni_cell._unicell_graph = unicell_graph
+        return uni_cell
+
     @property
     def nb_compounds(self):
         """ Returns the number of compounds  """
-        return len(self.get_compound_id_list())
+        return self.get_unicell_graph().nb_compounds
 
     @property
     def nb_reactions(self):
         """ Returns the number of reactions  """
-        return len(self.get_reaction_id_list())
+        return self.get_unicell_graph().nb_reactions
 
-    def get_compound_id_list(self):
+    def get_unicell_graph(self) -> UnicellGraph:
+        """
+        Get the compact graph. The arrays are views on the `graph` blob (no copy).
+        The unicells saved with pickled networkx graphs are converted.
+        """
+        if self._unicell_graph is None:
+            if UnicellGraph.is_packed(self.graph):
+                self._unicell_graph = UnicellGraph.from_buffer(self.graph)
+            else:
+                compound_id_list = pickle.loads(self.compound_id_list) if self.compound_id_list else None
+                self._unicell_graph = UnicellGraph.from_legacy(
+                    pickle.loads(self.reaction_id_list), pickle.loads(self.rhea_edge_map), compound_id_list)
+        return self._unicell_graph
+
+    def get_compound_id_list(self) -> list[str]:
         """ Get compound_id_list matrix """
-        if self._compound_id_list is None:
-            self._compound_id_list = pickle.loads(self.compound_id_list)
-        return self._compound_id_list
+        return self.get_unicell_graph().compound_ids
 
-    def get_reaction_id_list(self):
+    def get_reaction_id_list(self) -> list[str]:
         """ Get reaction_id_list matrix """
-        if self._reaction_id_list is None:
-            self._reaction_id_list = pickle.loads(self.reaction_id_list)
-        return self._reaction_id_list
+        return self.get_unicell_graph().reaction_ids
 
-    def get_rhea_edge_map(self) -> dict[str, list[str]]:
+    def get_rhea_edge_map(self) -> dict[str, list[tuple[str, str]]]:
         """ Get rhea_edge mapping dictionnary """
-        if self._rhea_edge_map is None:
-            self._rhea_edge_map = pickle.loads(self.rhea_edge_map)
-        return self._rhea_edge_map
+        return self.get_unicell_graph().get_rhea_edge_map()
 
-    def get_subgraph(self, rhea_id_list: list[str]):
+    def get_subgraph(self, rhea_id_list: list[str]) -> nx.Graph:
         " Get subgraph "
+        unicell_graph = self.get_unicell_graph()
         edges = []
-        rhea_edge_map = self.get_rhea_edge_map()
         for rhea_id in rhea_id_list:
-            val = rhea_edge_map[rhea_id]
-            edges.extend(val)
-        return self.get_graph().edge_subgraph(edges)
+            reaction = unicell_graph.get_reaction_index(rhea_id)
+            if reaction < 0:
+                raise BadRequestException(f"The rhea id {rhea_id} is not found")
+            edges.extend(unicell_graph.get_reaction_edges(reaction).tolist())
+        return unicell_graph.to_networkx(dict.fromkeys(edges))
 
-    def get_graph(self):
-        """ Get graph """
-        if self._graph is None:
-            self._graph = pickle.loads(self.graph)
-        return self._graph
+    def get_graph(self) -> UnicellGraphView:
+        """ Get a read-only networkx-like view of the graph """
+        return UnicellGraphView(self.get_unicell_graph())
 
-    def get_compound_id_at(self, i) -> int:
-        """ Get index of a compound using its chebi_id """
+    def get_compound_id_at(self, i) -> str:
+        """ Get chebi_id at a given index """
         comp_list = self.get_compound_id_list()
         return comp_list[i]
 
-    def get_index_of_compound_id(self, chebi_id) -> str:
-        """ Get chebi_id at a given index """
-        comp_list = self.get_compound_id_list()
-        if chebi_id in comp_list:
-            return comp_list.index(chebi_id)
-        else:
+    def get_index_of_compound_id(self, chebi_id) -> int:
+        """ Get index of a compound using its chebi_id """
+        index = self.get_unicell_graph().get_compound_index(chebi_id)
+        if index < 0:
             raise BadRequestException(f"The chebi id {chebi_id} is not found")
+        return index
+
+    def get_indices_of_compound_ids(self, chebi_ids: list[str]) -> np.ndarray:
+        """
+        Get the indexes of many compounds using their chebi_ids
+
+        :param chebi_ids: The chebi_ids
+        :type chebi_ids: list[str]
+        :returns: The index of each compound, -1 if the compound is not found
+        :rtype: np.ndarray
+        """
+        return self.get_unicell_graph().get_compound_indexes(chebi_ids)
 
     def get_reaction_id_at(self, i) -> str:
         """ Get rhea_id at a given index """
@@ -123,11 +152,21 @@ class Unicell(BaseFT):
 
     def get_index_of_reaction_id(self, rhea_id) -> int:
         """ Get index of a reaction using its rhea_id """
-        rxn_list = self.get_reaction_id_list()
-        if rhea_id in rxn_list:
-            return rxn_list.index(rhea_id)
-        else:
+        index = self.get_unicell_graph().get_reaction_index(rhea_id)
+        if index < 0:
             raise BadRequestException(f"The rhea id {rhea_id} is not found")
+        return index
+
+    def get_indices_of_reaction_ids(self, rhea_ids: list[str]) -> np.ndarray:
+        """
+        Get the indexes of many reactions using their rhea_ids
+
+        :param rhea_ids: The rhea_ids
+        :type rhea_ids: list[str]
+        :returns: The index of each reaction, -1 if the reaction is not found
+        :rtype: np.ndarray
+        """
+        return self.get_unicell_graph().get_reaction_indexes(rhea_ids)
 
     def get_edge(self, chebi_id1, chebi_id2):
         """ Get an edge """
@@ -139,47 +178,93 @@ class Unicell(BaseFT):
 
     def are_connected(self, chebi_id1, chebi_id2) -> bool:
         """ Check if two compounds are connected """
-        graph = self.get_graph()
-        return nx.has_path(graph, chebi_id1, chebi_id2)
+        return self.batch_are_connected([(chebi_id1, chebi_id2)])[0]
+
+    def batch_are_connected(self, pairs: list[tuple[str, str]]) -> list[bool]:
+        """
+        Check if the compounds of each pair are connected
+
+        :param pairs: The (chebi_id1, chebi_id2) pairs
+        :type pairs: list[tuple[str, str]]
+        :returns: True for each pair of connected compounds
+        :rtype: list[bool]
+        """
+        indexes = [(self.get_index_of_compound_id(u), self.get_index_of_compound_id(v)) for u, v in pairs]
+        return self.get_unicell_graph().batch_are_connected(indexes).tolist()
+
+    def batch_shortest_paths(self, pairs: list[tuple[str, str]]) -> list[Optional[list[str]]]:
+        """
+        Get the shortest paths between the compounds of many pairs at once
+
+        :param pairs: The (chebi_id1, chebi_id2) pairs
+        :type pairs: list[tuple[str, str]]
+        :returns: The shortest path of each pair, or None if the compounds are not connected or not found
+        :rtype: list[Optional[list[str]]]
+        """
+        unicell_graph = self.get_unicell_graph()
+        indexes = [(unicell_graph.get_compound_index(u), unicell_graph.get_compound_index(v)) for u, v in pairs]
+        found = [i for i, (u, v) in enumerate(indexes) if u >= 0 and v >= 0]
+        paths = [None] * len(pairs)
+        compound_ids = unicell_graph.compound_ids
+        for i, path in zip(found, unicell_graph.batch_shortest_paths([indexes[i] for i in found])):
+            if path is not None:
+                paths[i] = [compound_ids[node] for node in path]
+        return paths
 
     def shortest_path(self, chebi_id1, chebi_id2) -> list:
         """ Get the shortest path between components """
-        graph = self.get_graph()
-        return nx.shortest_path(graph, chebi_id1, chebi_id2)
+        self.get_index_of_compound_id(chebi_id1)
+        self.get_index_of_compound_id(chebi_id2)
+        path = self.batch_shortest_paths([(chebi_id1, chebi_id2)])[0]
+        if path is None:
+            raise BadRequestException(f"No path between {chebi_id1} and {chebi_id2}")
+        return path
 
     def find_neigbors(self, nodes: list, radius: int = 1, exclude_nodes: list = None):
         """ Finds the neighbors of a list of nodes """
 
-        graph = self.get_graph()
-
         if not isinstance(nodes, list):
             raise BadRequestException("The nodes must be a list")
-        neigbors = []
-        for node in nodes:
-            subgraph = nx.ego_graph(graph, node, radius=radius)
-            neigbors.extend(list(subgraph.nodes()))
 
-        neigbors = list(set(neigbors))
+        unicell_graph = self.get_unicell_graph()
+        # the union of the ego graphs of the nodes is the ball of the given radius around all the nodes
+        sources = [self.get_index_of_compound_id(node) for node in nodes]
+        compound_ids = unicell_graph.compound_ids
+        neigbors = [compound_ids[i] for i in unicell_graph.neighbors_within(sources, radius=radius)]
         if exclude_nodes is not None:
+            exclude_nodes = set(exclude_nodes)
             neigbors = [n for n in neigbors if n not in exclude_nodes]
 
         return neigbors
 
+    def multi_source_neighbors(self, nodes: list, radius: int = 1) -> dict[str, list[str]]:
+        """
+        Finds the neighbors of each node of a list, all the searches being run at once
+
+        :param nodes: The chebi_ids of the nodes
+        :type nodes: list
+        :param radius: The maximum distance of the neighbors
+        :type radius: int
+        :returns: The neighbors of each node (including the node), an empty list if the node is not found
+        :rtype: dict[str, list[str]]
+        """
+        unicell_graph = self.get_unicell_graph()
+        compound_ids = unicell_graph.compound_ids
+        neigbors = {node: [] for node in nodes}
+        found = [node for node in neigbors if unicell_graph.get_compound_index(node) >= 0]
+        sources = [unicell_graph.get_compound_index(node) for node in found]
+        for node, indexes in zip(found, unicell_graph.multi_source_neighbors(sources, radius=radius)):
+            neigbors[node] = [compound_ids[i] for i in indexes]
+        return neigbors
+
     def neigbors_subgraph(self, nodes: list, radius: int = 1):
-        subgraph = nx.Graph()
-        unicell_graph = self.get_graph()
-
-        for node in nodes:
-            egograph = nx.ego_graph(unicell_graph, node, radius=radius)
-            for edge in egograph.edges:
-                if node in edge:
-                    subgraph.add_edges_from([edge])
-
-        for edge in subgraph.edges:
-            data = unicell_graph.get_edge_data(*edge)
-            for k, v in data.items():
-                subgraph[edge[0]][edge[1]][k] = v
-        return subgraph
+        """ Get the subgraph of the edges incident to the nodes """
+        unicell_graph = self.get_unicell_graph()
+        if radius < 1:
+            return unicell_graph.to_networkx([])
+        # the edges of an ego graph that contain its center are the edges incident to the center
+        edges = unicell_graph.incident_edges([self.get_index_of_compound_id(node) for node in nodes])
+        return unicell_graph.to_networkx(edges.tolist())
 
     class Meta:
         table_name = 'biota_unicell'
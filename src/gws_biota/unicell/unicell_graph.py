@@ -0,0 +1,775 @@
+import json
+import os
+from typing import Iterable, Iterator, Optional
+
+import networkx as nx
+import numpy as np
+from gws_core import BadRequestException
+
+MAGIC = b"GWSUCG01"
+ALIGNMENT = 64
+DEFAULT_DG_PRIME = 1.0
+# maximum number of (search, node) cells allocated by a batch of breadth-first searches
+MAX_BATCH_CELLS = 1 << 24
+
+
+class UnicellGraph:
+    """
+    Compact, read-only graph of the unicell.
+
+    The compounds (nodes), the reactions and the edges are indexed by integers:
+
+    * the adjacency is stored in CSR format: the neighbors of the node `i` are
+      `indices[indptr[i]:indptr[i+1]]` and the corresponding edges are `adj_edges[indptr[i]:indptr[i+1]]`
+    * an edge `e` links `edge_src[e]` and `edge_dst[e]` and is labelled by the reaction `edge_reaction[e]`
+    * the edges of the reaction `r` are `reaction_edges[reaction_indptr[r]:reaction_indptr[r+1]]`
+    * the CHEBI and RHEA ids are interned in string tables (utf-8 data and offsets)
+
+    The graph is serialized as raw numpy buffers (see `to_bytes`), so it is loaded without copy from a database blob
+    or memory-mapped from a file and shared by all the processes that read this file.
+    """
+
+    ARRAY_NAMES = (
+        "indptr", "indices", "adj_edges",
+        "edge_src", "edge_dst", "edge_reaction", "edge_dg_prime",
+        "reaction_indptr", "reaction_edges",
+        "compound_id_offsets", "compound_id_data",
+        "reaction_id_offsets", "reaction_id_data",
+    )
+
+    indptr: np.ndarray = None
+    indices: np.ndarray = None
+    adj_edges: np.ndarray = None
+    edge_src: np.ndarray = None
+    edge_dst: np.ndarray = None
+    edge_reaction: np.ndarray = None
+    edge_dg_prime: np.ndarray = None
+    reaction_indptr: np.ndarray = None
+    reaction_edges: np.ndarray = None
+    compound_id_offsets: np.ndarray = None
+    compound_id_data: np.ndarray = None
+    reaction_id_offsets: np.ndarray = None
+    reaction_id_data: np.ndarray = None
+
+    # the serialized graph of which the arrays are views, if the graph was loaded with `from_buffer`
+    buffer = None
+
+    _compound_ids: list[str] = None
+    _reaction_ids: list[str] = None
+    _compound_index: dict[str, int] = None
+    _reaction_index: dict[str, int] = None
+    _components: np.ndarray = None
+
+    def __init__(self, arrays: dict[str, np.ndarray]):
+        missing = [name for name in self.ARRAY_NAMES if name not in arrays]
+        if missing:
+            raise BadRequestException(f"Invalid unicell graph, missing arrays: {', '.join(missing)}")
+        for name in self.ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+
+    # -- B --
+
+    def batch_are_connected(self, pairs: list[tuple[int, int]]) -> np.ndarray:
+        """ Returns, for each pair of nodes, True if the nodes are connected """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        components = self.get_connected_components()
+        return components[pairs[:, 0]] == components[pairs[:, 1]]
+
+    def batch_shortest_paths(self, pairs: list[tuple[int, int]]) -> list[Optional[list[int]]]:
+        """
+        Returns a shortest path for each pair of nodes. The bidirectional searches of a batch of pairs are run
+        together, one vectorized frontier expansion per level.
+
+        :param pairs: The (source, target) pairs of nodes
+        :type pairs: list[tuple[int, int]]
+        :returns: The nodes of a shortest path of each pair, or None if the nodes are not connected
+        :rtype: list[Optional[list[int]]]
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        paths: list[Optional[list[int]]] = [None] * len(pairs)
+        # the disconnected pairs need no search, the duplicated pairs are searched once
+        connected = np.flatnonzero(self.batch_are_connected(pairs))
+        unique_pairs, pair_of_query = np.unique(pairs[connected], axis=0, return_inverse=True)
+        pair_of_query = pair_of_query.reshape(-1)
+        unique_paths = []
+        # each pair needs a forward and a backward search
+        chunk_size = max(1, self._get_batch_size() // 2)
+        for start in range(0, len(unique_pairs), chunk_size):
+            chunk = unique_pairs[start:start + chunk_size]
+            unique_paths.extend(self._bidirectional_bfs(chunk[:, 0], chunk[:, 1]))
+        for query, unique_pair in zip(connected.tolist(), pair_of_query.tolist()):
+            paths[query] = list(unique_paths[unique_pair])
+        return paths
+
+    @classmethod
+    def build(cls, reactions: Iterable[tuple[str, list[tuple[str, str]]]],
+              compound_ids: list[str] = None) -> 'UnicellGraph':
+        """
+        Builds the graph from the compound pairs of the reactions
+
+        :param reactions: Iterable of (rhea_id, [(substrate chebi_id, product chebi_id), ...])
+        :type reactions: Iterable[tuple[str, list[tuple[str, str]]]]
+        :param compound_ids: If given, the first nodes are these compounds, in this order (e.g. the order of the
+        coordinates of a former unicell). The other compounds of the reactions are added after them.
+        :type compound_ids: list[str]
+        :returns: The graph
+        :rtype: UnicellGraph
+        """
+        compound_index: dict[str, int] = {}
+        for chebi_id in compound_ids or []:
+            compound_index.setdefault(chebi_id, len(compound_index))
+        edge_index: dict[tuple[int, int], int] = {}
+        reaction_ids = []
+        edge_src, edge_dst, edge_reaction = [], [], []
+        reaction_indptr, reaction_edges = [0], []
+        for rhea_id, pairs in reactions:
+            reaction = len(reaction_ids)
+            reaction_ids.append(rhea_id)
+            for chebi_id_1, chebi_id_2 in pairs:
+                i = compound_index.setdefault(chebi_id_1, len(compound_index))
+                j = compound_index.setdefault(chebi_id_2, len(compound_index))
+                key = (i, j) if i <= j else (j, i)
+                edge = edge_index.get(key)
+                if edge is None:
+                    edge = len(edge_src)
+                    edge_index[key] = edge
+                    edge_src.append(i)
+                    edge_dst.append(j)
+                    edge_reaction.append(reaction)
+                else:
+                    # as in networkx, the last reaction overwrites the edge attributes
+                    edge_reaction[edge] = reaction
+                reaction_edges.append(edge)
+            reaction_indptr.append(len(reaction_edges))
+
+        edge_src = np.asarray(edge_src, dtype=np.int32)
+        edge_dst = np.asarray(edge_dst, dtype=np.int32)
+        indptr, indices, adj_edges = cls._create_adjacency(edge_src, edge_dst, len(compound_index))
+        compound_id_offsets, compound_id_data = cls._pack_strings(list(compound_index))
+        reaction_id_offsets, reaction_id_data = cls._pack_strings(reaction_ids)
+        graph = UnicellGraph({
+            "indptr": indptr,
+            "indices": indices,
+            "adj_edges": adj_edges,
+            "edge_src": edge_src,
+            "edge_dst": edge_dst,
+            "edge_reaction": np.asarray(edge_reaction, dtype=np.int32),
+            "edge_dg_prime": np.full(len(edge_src), DEFAULT_DG_PRIME, dtype=np.float64),
+            "reaction_indptr": np.asarray(reaction_indptr, dtype=np.int64),
+            "reaction_edges": np.asarray(reaction_edges, dtype=np.int32),
+            "compound_id_offsets": compound_id_offsets,
+            "compound_id_data": compound_id_data,
+            "reaction_id_offsets": reaction_id_offsets,
+            "reaction_id_data": reaction_id_data,
+        })
+        graph._compound_ids = list(compound_index)
+        graph._compound_index = compound_index
+        graph._reaction_ids = reaction_ids
+        return graph
+
+    # -- C --
+
+    @property
+    def compound_ids(self) -> list[str]:
+        """ Returns the CHEBI ids of the nodes """
+        if self._compound_ids is None:
+            self._compound_ids = self._unpack_strings(self.compound_id_offsets, self.compound_id_data)
+        return self._compound_ids
+
+    @classmethod
+    def _create_adjacency(cls, edge_src: np.ndarray, edge_dst: np.ndarray, nb_nodes: int):
+        edge_ids = np.arange(len(edge_src), dtype=np.int32)
+        # undirected graph: each edge is stored in both directions, self-loops once
+        not_loop = edge_src != edge_dst
+        rows = np.concatenate([edge_src, edge_dst[not_loop]])
+        cols = np.concatenate([edge_dst, edge_src[not_loop]])
+        edges = np.concatenate([edge_ids, edge_ids[not_loop]])
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(nb_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=nb_nodes), out=indptr[1:])
+        return indptr, cols[order].astype(np.int32), edges[order].astype(np.int32)
+
+    # -- E --
+
+    def get_edge_data(self, edge: int) -> dict:
+        """ Returns the attributes of an edge """
+        return {
+            "rhea_id": self.reaction_ids[self.edge_reaction[edge]],
+            "dg_prime": float(self.edge_dg_prime[edge]),
+        }
+
+    # -- F --
+
+    def find_edge(self, i: int, j: int) -> int:
+        """ Returns the index of the edge between the nodes `i` and `j`, or -1 """
+        start, end = self.indptr[i], self.indptr[i + 1]
+        pos = start + np.searchsorted(self.indices[start:end], j)
+        if pos < end and self.indices[pos] == j:
+            return int(self.adj_edges[pos])
+        return -1
+
+    @classmethod
+    def from_buffer(cls, buffer) -> 'UnicellGraph':
+        """
+        Loads a graph serialized with `to_bytes`. The arrays are views on the buffer (no copy).
+
+        :param buffer: The bytes, memoryview or memory-mapped array
+        :returns: The graph
+        :rtype: UnicellGraph
+        """
+        if not cls.is_packed(buffer):
+            raise BadRequestException("The buffer is not a packed unicell graph")
+        header_size = int(np.frombuffer(buffer, dtype="<u8", count=1, offset=len(MAGIC))[0])
+        header_offset = len(MAGIC) + 8
+        header = json.loads(bytes(buffer[header_offset:header_offset + header_size]).decode("utf-8"))
+        arrays = {}
+        for name, dtype, count, offset in header["arrays"]:
+            arrays[name] = np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=offset)
+        graph = UnicellGraph(arrays)
+        graph.buffer = buffer
+        return graph
+
+    @classmethod
+    def from_legacy(cls, reaction_id_list: list[str], rhea_edge_map: dict[str, list[tuple[str, str]]],
+                    compound_id_list: list[str] = None) -> 'UnicellGraph':
+        """
+        Builds the graph from the pickled lists of former unicells. The nodes are indexed in the order of
+        `compound_id_list`, so that they keep the positions of the compound coordinates of the unicell.
+        """
+        reactions = ((rhea_id, rhea_edge_map.get(rhea_id, [])) for rhea_id in reaction_id_list)
+        return cls.build(reactions, compound_ids=compound_id_list)
+
+    # -- G --
+
+    def get_connected_components(self) -> np.ndarray:
+        """
+        Returns the connected component of each node, labelled by its smallest node.
+        The labels are computed once by vectorized min-label propagation and pointer jumping.
+        """
+        if self._components is None:
+            labels = np.arange(self.nb_compounds, dtype=np.int64)
+            while True:
+                previous = labels.copy()
+                edge_labels = np.minimum(labels[self.edge_src], labels[self.edge_dst])
+                np.minimum.at(labels, self.edge_src, edge_labels)
+                np.minimum.at(labels, self.edge_dst, edge_labels)
+                while True:
+                    jumped = labels[labels]
+                    if np.array_equal(jumped, labels):
+                        break
+                    labels = jumped
+                if np.array_equal(labels, previous):
+                    break
+            self._components = labels
+        return self._components
+
+    def get_compound_index(self, chebi_id: str) -> int:
+        """ Returns the index of a node, or -1 """
+        return self._get_compound_index_map().get(chebi_id, -1)
+
+    def get_compound_indexes(self, chebi_ids: Iterable[str]) -> np.ndarray:
+        """ Returns the indexes of many nodes, -1 for the missing ones """
+        get = self._get_compound_index_map().get
+        return np.fromiter((get(chebi_id, -1) for chebi_id in chebi_ids), dtype=np.int64)
+
+    def get_reaction_index(self, rhea_id: str) -> int:
+        """ Returns the index of a reaction, or -1 """
+        return self._get_reaction_index_map().get(rhea_id, -1)
+
+    def get_reaction_indexes(self, rhea_ids: Iterable[str]) -> np.ndarray:
+        """ Returns the indexes of many reactions, -1 for the missing ones """
+        get = self._get_reaction_index_map().get
+        return np.fromiter((get(rhea_id, -1) for rhea_id in rhea_ids), dtype=np.int64)
+
+    def _get_compound_index_map(self) -> dict[str, int]:
+        """ Returns the reverse index of the nodes, built on first use """
+        if self._compound_index is None:
+            self._compound_index = {chebi_id: i for i, chebi_id in enumerate(self.compound_ids)}
+        return self._compound_index
+
+    def _get_reaction_index_map(self) -> dict[str, int]:
+        """ Returns the reverse index of the reactions, built on first use """
+        if self._reaction_index is None:
+            self._reaction_index = {rhea_id: i for i, rhea_id in enumerate(self.reaction_ids)}
+        return self._reaction_index
+
+    def get_reaction_edges(self, reaction: int) -> np.ndarray:
+        """ Returns the edges of a reaction """
+        return self.reaction_edges[self.reaction_indptr[reaction]:self.reaction_indptr[reaction + 1]]
+
+    def get_rhea_edge_map(self) -> dict[str, list[tuple[str, str]]]:
+        """ Returns the compound pairs of each reaction """
+        compound_ids = self.compound_ids
+        rhea_edge_map = {}
+        for reaction, rhea_id in enumerate(self.reaction_ids):
+            edges = self.get_reaction_edges(reaction)
+            if len(edges):
+                rhea_edge_map[rhea_id] = [(compound_ids[self.edge_src[e]], compound_ids[self.edge_dst[e]])
+                                          for e in edges]
+        return rhea_edge_map
+
+    # -- I --
+
+    @classmethod
+    def is_packed(cls, buffer) -> bool:
+        """ Returns True if the buffer contains a graph serialized with `to_bytes` """
+        return buffer is not None and bytes(buffer[:len(MAGIC)]) == MAGIC
+
+    def incident_edges(self, nodes: list[int]) -> np.ndarray:
+        """ Returns the edges incident to the nodes """
+        nodes = np.unique(np.asarray(nodes, dtype=np.int64))
+        _, _, positions = self._expand(nodes)
+        return np.unique(self.adj_edges[positions])
+
+    # -- L --
+
+    @classmethod
+    def load(cls, path: str) -> 'UnicellGraph':
+        """ Memory-maps a graph file written by `save` """
+        return cls.from_buffer(np.memmap(path, dtype=np.uint8, mode="r"))
+
+    # -- M --
+
+    def multi_source_neighbors(self, sources: list[int], radius: int = 1) -> list[np.ndarray]:
+        """
+        Returns, for each source, the nodes at a distance lower or equal to `radius`.
+        The searches of a batch of sources are run together.
+
+        :param sources: The source nodes
+        :type sources: list[int]
+        :param radius: The maximum distance
+        :type radius: int
+        :returns: The neighbors of each source (including the source)
+        :rtype: list[np.ndarray]
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        neighbors = []
+        chunk_size = self._get_batch_size()
+        for start in range(0, len(sources), chunk_size):
+            parents = self._batch_bfs(sources[start:start + chunk_size], radius=radius)
+            neighbors.extend(np.flatnonzero(row >= 0) for row in parents)
+        return neighbors
+
+    # -- N --
+
+    @property
+    def nb_compounds(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def nb_edges(self) -> int:
+        return len(self.edge_src)
+
+    @property
+    def nb_reactions(self) -> int:
+        return len(self.reaction_indptr) - 1
+
+    def neighbors(self, i: int) -> np.ndarray:
+        """ Returns the neighbors of the node `i` """
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def neighbors_within(self, sources: list[int], radius: int = 1) -> np.ndarray:
+        """ Returns the nodes at a distance lower or equal to `radius` of any of the sources """
+        parents = self._bfs(np.asarray(sources, dtype=np.int64), radius=radius)
+        return np.flatnonzero(parents >= 0)
+
+    # -- P --
+
+    @classmethod
+    def _pack_strings(cls, strings: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in encoded], out=offsets[1:])
+        return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    # -- R --
+
+    @property
+    def reaction_ids(self) -> list[str]:
+        """ Returns the RHEA ids of the reactions """
+        if self._reaction_ids is None:
+            self._reaction_ids = self._unpack_strings(self.reaction_id_offsets, self.reaction_id_data)
+        return self._reaction_ids
+
+    # -- S --
+
+    def save(self, path: str) -> None:
+        """ Writes the graph in a file that can be memory-mapped with `load` """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    def shortest_path(self, source: int, target: int) -> Optional[list[int]]:
+        """ Returns the nodes of a shortest path between two nodes, or None if they are not connected """
+        return self.batch_shortest_paths([(source, target)])[0]
+
+    # -- T --
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the graph: a magic number, the size of a json header describing the arrays, the header and
+        the raw arrays aligned on 64 bytes
+        """
+        header_offset = len(MAGIC) + 8
+        entries = []
+        for name in self.ARRAY_NAMES:
+            array = np.ascontiguousarray(getattr(self, name))
+            entries.append([name, array.dtype.newbyteorder("<").str, len(array), 0])
+        # the offsets change the header size: iterate until stable
+        while True:
+            header = json.dumps({"arrays": entries}).encode("utf-8")
+            offset = self._align(header_offset + len(header))
+            changed = False
+            for entry in entries:
+                if entry[3] != offset:
+                    entry[3] = offset
+                    changed = True
+                offset = self._align(offset + entry[2] * np.dtype(entry[1]).itemsize)
+            if not changed:
+                break
+        buffer = bytearray(offset)
+        buffer[:len(MAGIC)] = MAGIC
+        buffer[len(MAGIC):header_offset] = np.uint64(len(header)).astype("<u8").tobytes()
+        buffer[header_offset:header_offset + len(header)] = header
+        for name, dtype, count, start in entries:
+            data = np.ascontiguousarray(getattr(self, name), dtype=np.dtype(dtype)).tobytes()
+            buffer[start:start + len(data)] = data
+        return bytes(buffer)
+
+    def to_networkx(self, edges: Iterable[int] = None) -> nx.Graph:
+        """
+        Converts the graph, or some of its edges, to a networkx graph
+
+        :param edges: Indexes of the edges to convert. All the edges if None.
+        :type edges: Iterable[int]
+        :returns: The networkx graph
+        :rtype: nx.Graph
+        """
+        compound_ids = self.compound_ids
+        if edges is None:
+            edges = range(self.nb_edges)
+        graph = nx.Graph()
+        for edge in edges:
+            graph.add_edge(compound_ids[self.edge_src[edge]], compound_ids[self.edge_dst[edge]],
+                           **self.get_edge_data(edge))
+        return graph
+
+    # -- U --
+
+    @classmethod
+    def _unpack_strings(cls, offsets: np.ndarray, data: np.ndarray) -> list[str]:
+        raw = data.tobytes()
+        bounds = offsets.tolist()
+        return [raw[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+    # -- Utils --
+
+    @staticmethod
+    def _align(offset: int) -> int:
+        return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+    def _batch_bfs(self, sources: np.ndarray, radius: int = None) -> np.ndarray:
+        """
+        Breadth-first searches from several sources at once. The frontier holds the (search, node) pairs of all
+        the searches and is expanded in one vectorized step per level.
+
+        :param sources: The source of each search
+        :type sources: np.ndarray
+        :param radius: The maximum depth of the searches
+        :type radius: int
+        :returns: For each search, the parent of each visited node in a shortest path from the source (the source
+        is its own parent), -1 for the other nodes
+        :rtype: np.ndarray
+        """
+        nb_searches = len(sources)
+        parents = np.full((nb_searches, self.nb_compounds), -1, dtype=np.int32)
+        flat_parents = parents.reshape(-1)
+        searches = np.arange(nb_searches, dtype=np.int64)
+        nodes = np.asarray(sources, dtype=np.int64)
+        flat_parents[searches * self.nb_compounds + nodes] = nodes
+        depth = 0
+        while nodes.size and (radius is None or depth < radius):
+            searches, nodes = self._visit_neighbors(flat_parents, searches, nodes)
+            depth += 1
+        return parents
+
+    def _bidirectional_bfs(self, sources: np.ndarray, targets: np.ndarray) -> list[list[int]]:
+        """
+        Bidirectional breadth-first searches between connected pairs of nodes. The forward and backward frontiers
+        of all the pairs are expanded alternately, level by level. The searches of a pair stop at the first level
+        where they meet, the shortest path going through the meeting node closest to the target.
+        """
+        nb_nodes = self.nb_compounds
+        nb_pairs = len(sources)
+        parents = [np.full(nb_pairs * nb_nodes, -1, dtype=np.int32) for _ in range(2)]
+        depths = [np.full(nb_pairs * nb_nodes, -1, dtype=np.int16) for _ in range(2)]
+        frontiers = []
+        for side, nodes in enumerate((sources, targets)):
+            searches = np.arange(nb_pairs, dtype=np.int64)
+            nodes = np.asarray(nodes, dtype=np.int64)
+            parents[side][searches * nb_nodes + nodes] = nodes
+            depths[side][searches * nb_nodes + nodes] = 0
+            frontiers.append((searches, nodes))
+
+        meeting_nodes = np.where(sources == targets, sources, -1)
+        level = [0, 0]
+        while np.any(meeting_nodes < 0):
+            # remove the pairs whose searches met, then expand the side with the smallest frontier
+            for i, (searches, nodes) in enumerate(frontiers):
+                active = meeting_nodes[searches] < 0
+                frontiers[i] = (searches[active], nodes[active])
+            side = 0 if len(frontiers[0][0]) <= len(frontiers[1][0]) else 1
+            searches, nodes = self._visit_neighbors(parents[side], *frontiers[side])
+            level[side] += 1
+            keys = searches * nb_nodes + nodes
+            depths[side][keys] = level[side]
+            frontiers[side] = (searches, nodes)
+
+            other_depths = depths[1 - side][keys]
+            met = other_depths >= 0
+            if np.any(met):
+                # for each pair, the meeting node with the shortest total distance
+                order = np.lexsort((other_depths[met], searches[met]))
+                met_searches, first = np.unique(searches[met][order], return_index=True)
+                meeting_nodes[met_searches] = nodes[met][order][first]
+
+        paths = []
+        for pair, meeting_node in enumerate(meeting_nodes.tolist()):
+            offset = pair * nb_nodes
+            forward = self._get_path(parents[0][offset:offset + nb_nodes], meeting_node)
+            backward = self._get_path(parents[1][offset:offset + nb_nodes], meeting_node)
+            paths.append(forward + backward[-2::-1])
+        return paths
+
+    def _bfs(self, sources: np.ndarray, radius: int = None) -> np.ndarray:
+        """
+        Breadth-first search from a set of sources by frontier expansion.
+
+        :returns: The parent of each visited node in a shortest path from the sources (the sources are their own
+        parents), -1 for the other nodes
+        :rtype: np.ndarray
+        """
+        parents = np.full(self.nb_compounds, -1, dtype=np.int64)
+        frontier = np.unique(sources)
+        parents[frontier] = frontier
+        depth = 0
+        while frontier.size and (radius is None or depth < radius):
+            neighbors, origins, _ = self._expand(frontier)
+            unvisited = parents[neighbors] < 0
+            neighbors, first = np.unique(neighbors[unvisited], return_index=True)
+            parents[neighbors] = frontier[origins[unvisited][first]]
+            frontier = neighbors
+            depth += 1
+        return parents
+
+    def _expand(self, frontier: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the neighbors of the frontier nodes, the position in the frontier of the node each neighbor
+        comes from, and the positions of the neighbors in the adjacency arrays
+        """
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        ends = np.cumsum(counts)
+        positions = np.repeat(starts - ends + counts, counts) + np.arange(ends[-1] if len(ends) else 0)
+        origins = np.repeat(np.arange(len(frontier), dtype=np.int64), counts)
+        return self.indices[positions].astype(np.int64), origins, positions
+
+    def _get_batch_size(self) -> int:
+        return max(1, MAX_BATCH_CELLS // max(1, self.nb_compounds))
+
+    @staticmethod
+    def _get_path(parents: np.ndarray, target: int) -> Optional[list[int]]:
+        if parents[target] < 0:
+            return None
+        path = [target]
+        while parents[path[-1]] != path[-1]:
+            path.append(int(parents[path[-1]]))
+        return path[::-1]
+
+    def _visit_neighbors(self, flat_parents: np.ndarray, searches: np.ndarray,
+                         nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Expands the frontier of several searches: visits the unvisited neighbors of the (search, node) pairs of
+        the frontier and returns the new frontier
+
+        :param flat_parents: The parents of the nodes of each search (flattened, `nb_compounds` cells per search)
+        :type flat_parents: np.ndarray
+        """
+        nb_nodes = self.nb_compounds
+        neighbors, origins, _ = self._expand(nodes)
+        keys = searches[origins] * nb_nodes + neighbors
+        unvisited = flat_parents[keys] < 0
+        keys, origins = keys[unvisited], origins[unvisited]
+        # deduplicate the keys without sorting: the last write of each key wins
+        stamps = -2 - np.arange(len(keys), dtype=flat_parents.dtype)
+        flat_parents[keys] = stamps
+        winners = flat_parents[keys] == stamps
+        keys = keys[winners]
+        flat_parents[keys] = nodes[origins[winners]]
+        return keys // nb_nodes, keys % nb_nodes
+
+
+class UnicellGraphView:
+    """
+    Thin read-only view of a `UnicellGraph` exposing the networkx graph API used by the callers
+    (`nodes`, `edges`, `neighbors`, `get_edge_data`, `edge_subgraph`, ...)
+    """
+
+    _graph: UnicellGraph = None
+
+    def __init__(self, graph: UnicellGraph):
+        self._graph = graph
+
+    def __contains__(self, node) -> bool:
+        return self.has_node(node)
+
+    def __getitem__(self, node) -> dict:
+        return self.adj[node]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._graph.compound_ids)
+
+    def __len__(self) -> int:
+        return self._graph.nb_compounds
+
+    def __str__(self) -> str:
+        return f"Graph with {self.number_of_nodes()} nodes and {self.number_of_edges()} edges"
+
+    @property
+    def adj(self) -> '_AdjacencyView':
+        return _AdjacencyView(self)
+
+    def degree(self, node) -> int:
+        index = self._node_index(node)
+        neighbors = self._graph.neighbors(index)
+        # as in networkx, a self-loop counts twice
+        return len(neighbors) + int(np.count_nonzero(neighbors == index))
+
+    @property
+    def edges(self) -> '_EdgeView':
+        return _EdgeView(self)
+
+    def edge_subgraph(self, edges: Iterable[tuple[str, str]]) -> nx.Graph:
+        """ Returns a networkx graph with the given edges and their attributes """
+        indexes = []
+        for u, v in edges:
+            edge = self._edge_index(u, v)
+            if edge >= 0:
+                indexes.append(edge)
+        return self._graph.to_networkx(indexes)
+
+    def get_edge_data(self, u, v, default=None) -> dict:
+        edge = self._edge_index(u, v)
+        return self._graph.get_edge_data(edge) if edge >= 0 else default
+
+    def has_edge(self, u, v) -> bool:
+        return self._edge_index(u, v) >= 0
+
+    def has_node(self, node) -> bool:
+        return self._graph.get_compound_index(node) >= 0
+
+    def neighbors(self, node) -> Iterator[str]:
+        compound_ids = self._graph.compound_ids
+        return (compound_ids[j] for j in self._graph.neighbors(self._node_index(node)))
+
+    @property
+    def nodes(self) -> '_NodeView':
+        return _NodeView(self)
+
+    def number_of_edges(self) -> int:
+        return self._graph.nb_edges
+
+    def number_of_nodes(self) -> int:
+        return self._graph.nb_compounds
+
+    def subgraph(self, nodes: Iterable[str]) -> nx.Graph:
+        """ Returns a networkx graph induced by the given nodes """
+        selected = np.zeros(self._graph.nb_compounds, dtype=bool)
+        for node in nodes:
+            index = self._graph.get_compound_index(node)
+            if index >= 0:
+                selected[index] = True
+        edges = np.flatnonzero(selected[self._graph.edge_src] & selected[self._graph.edge_dst])
+        graph = self._graph.to_networkx(edges)
+        compound_ids = self._graph.compound_ids
+        graph.add_nodes_from(compound_ids[i] for i in np.flatnonzero(selected))
+        return graph
+
+    def to_networkx(self) -> nx.Graph:
+        """ Returns a full networkx copy of the graph """
+        return self._graph.to_networkx()
+
+    def _edge_index(self, u, v) -> int:
+        i, j = self._graph.get_compound_index(u), self._graph.get_compound_index(v)
+        if i < 0 or j < 0:
+            return -1
+        return self._graph.find_edge(i, j)
+
+    def _node_index(self, node) -> int:
+        index = self._graph.get_compound_index(node)
+        if index < 0:
+            raise BadRequestException(f"The node {node} is not in the graph")
+        return index
+
+
+class _NodeView:
+
+    def __init__(self, view: UnicellGraphView):
+        self._view = view
+
+    def __call__(self):
+        return self
+
+    def __contains__(self, node) -> bool:
+        return self._view.has_node(node)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._view)
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def __repr__(self) -> str:
+        return f"NodeView({tuple(self)})"
+
+
+class _EdgeView:
+
+    def __init__(self, view: UnicellGraphView):
+        self._view = view
+
+    def __call__(self):
+        return self
+
+    def __contains__(self, edge) -> bool:
+        return self._view.has_edge(*edge)
+
+    def __getitem__(self, edge) -> dict:
+        data = self._view.get_edge_data(*edge)
+        if data is None:
+            raise KeyError(f"The edge {edge} is not in the graph")
+        return data
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        graph = self._view._graph
+        compound_ids = graph.compound_ids
+        for src, dst in zip(graph.edge_src.tolist(), graph.edge_dst.tolist()):
+            yield compound_ids[src], compound_ids[dst]
+
+    def __len__(self) -> int:
+        return self._view.number_of_edges()
+
+
+class _AdjacencyView:
+
+    def __init__(self, view: UnicellGraphView):
+        self._view = view
+
+    def __getitem__(self, node) -> dict[str, dict]:
+        graph = self._view._graph
+        i = self._view._node_index(node)
+        start, end = graph.indptr[i], graph.indptr[i + 1]
+        compound_ids = graph.compound_ids
+        return {compound_ids[j]: graph.get_edge_data(e)
+                for j, e in zip(graph.indices[start:end].tolist(), graph.adj_edges[start:end].tolist())}
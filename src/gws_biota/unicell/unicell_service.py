@@ -1,33 +1,54 @@
+import hashlib
+import os
+from datetime import datetime
 
-
-import pickle
-
-import networkx as nx
-from gws_core import BadRequestException, Logger
+import msgpack
+from gws_core import BadRequestException, Logger, Settings
+from peewee import fn
 
 from gws_biota.db.biota_db_manager import BiotaDbManager
 
 from ..compound.cofactor import Cofactor
 from ..taxonomy.taxonomy import Taxonomy
 from .unicell import Unicell
+from .unicell_graph import UnicellGraph
 
 
 class UnicellService:
+    """
+    Builds the unicell skeletons.
+
+    The skeleton of each taxon (and cofactor set) is cached: the compact graph is saved in a file that is
+    memory-mapped by the next calls, as long as the version of the reactions (their ids, number and last
+    modification date) does not change. When the reactions change, the compound pairs of the unchanged
+    reactions are reused and only the new or modified reactions are read again.
+    """
+
+    NB_ITEMS_PER_PAGE = 1000
+
+    # Increment when the content of the cache changes, to invalidate the caches
+    CACHE_FORMAT_VERSION = 1
+    GRAPH_FILE = "graph.ucg"
+    REACTIONS_FILE = "reactions.msgpack"
 
     @classmethod
     @BiotaDbManager.transaction()
-    def create_unicell_skeleton(cls, tax_id=None):
-        """ Create a universal cell """
+    def create_unicell_skeleton(cls, tax_id=None, use_cache: bool = True, force_rebuild: bool = False):
+        """
+        Create a universal cell
+
+        :param tax_id: The taxonomy id of the organism. All the reactions are used if None.
+        :type tax_id: str
+        :param use_cache: If True, the skeleton is read from (or written to) the cache of the taxon
+        :type use_cache: bool
+        :param force_rebuild: If True, all the reactions are read again and the cache is rebuilt
+        :type force_rebuild: bool
+        :returns: The unicell
+        :rtype: Unicell
+        """
         from ..reaction.reaction import Reaction
 
-        compound_id_list = []
-        reaction_id_list = []
-        rhea_edge_map = {}
-
-        page = 1
-        nb_items_per_page = 1000
-        cofactor_list: list[str] = list(Cofactor.get_factors_as_list())
-        graph = nx.Graph()
+        cofactors = set(Cofactor.get_factors_as_list())
 
         if tax_id:
             tax = Taxonomy.get_or_none(Taxonomy.tax_id == tax_id)
@@ -42,52 +63,116 @@ class UnicellService:
         else:
             query = Reaction.search_by_tax_ids(
                 tax.tax_id).where(Reaction.direction == "UN")
-            # query = Reaction.select().where(Reaction.direction == "UN")
-
-        nb_rxn = query.count()
-        Logger.info(f"Creating unicell with {nb_rxn} reactions ...")
 
-        while True:
-            if tax is None:
-                current_query = query.paginate(page, nb_items_per_page)
+        if not use_cache:
+            Logger.info("Creating unicell without cache ...")
+            reaction_edges = [(rhea_id, cls._get_compound_pairs(equation, cofactors))
+                              for _, rhea_id, equation in cls._iter_reaction_equations(query)]
+            unicell_graph = UnicellGraph.build(reaction_edges)
+            Logger.info("Done!")
+            return Unicell.from_unicell_graph(unicell_graph)
+
+        cache_dir = cls._get_cache_dir(tax.tax_id if tax else None, cofactors)
+        graph_path = os.path.join(cache_dir, cls.GRAPH_FILE)
+        reactions_path = os.path.join(cache_dir, cls.REACTIONS_FILE)
+        db_version = cls._get_db_version(query)
+
+        cached_reactions = {}
+        if not force_rebuild and os.path.exists(reactions_path):
+            try:
+                with open(reactions_path, "rb") as fp:
+                    cache = msgpack.unpack(fp, raw=False, strict_map_key=False)
+                if cache["db_version"] == db_version and os.path.exists(graph_path):
+                    Logger.info(f"Unicell loaded from cache {graph_path}")
+                    return Unicell.from_unicell_graph(UnicellGraph.load(graph_path))
+                cached_reactions = cache["reactions"]
+            except Exception as err:
+                Logger.warning(f"Could not read the unicell cache, rebuilding: {err}")
+
+        # list the reactions without their data, then read the equations of the new or modified reactions only
+        reactions = {}
+        modified_ids = []
+        for id_, rhea_id, last_modified_at in cls._iter_reaction_versions(query):
+            last_modified_at = str(last_modified_at)
+            cached = cached_reactions.get(id_)
+            if cached is not None and cached[0] == rhea_id and cached[1] == last_modified_at:
+                reactions[id_] = cached
             else:
-                current_query = query.paginate(page, nb_items_per_page)
-
-            if len(current_query) == 0:
-                break
-
-            Logger.info(
-                f"Reaction page {page}/{round(nb_rxn/nb_items_per_page)+1} ...")
-            for rxn in current_query:
-                reaction_id_list.append(rxn.rhea_id)
-                eqn = rxn.data["equation"]
-                for chebi_id_1 in eqn["substrates"]:
-                    if chebi_id_1 in cofactor_list:
-                        continue
-                    for chebi_id_2 in eqn["products"]:
-                        if chebi_id_2 in cofactor_list:
-                            continue
-                        graph.add_edge(chebi_id_1, chebi_id_2,
-                                       rhea_id=rxn.rhea_id, dg_prime=1.0)
-                        if rxn.rhea_id in rhea_edge_map:
-                            rhea_edge_map[rxn.rhea_id].append(
-                                (chebi_id_1, chebi_id_2))
-                        else:
-                            rhea_edge_map[rxn.rhea_id] = [
-                                (chebi_id_1, chebi_id_2)]
-
-                        compound_id_list.extend([chebi_id_1, chebi_id_2])
-
-            page += 1
-
-        compound_id_list = list(set(compound_id_list))
-        uni_cell = Unicell(
-            compound_id_list=pickle.dumps(compound_id_list),
-            reaction_id_list=pickle.dumps(reaction_id_list),
-            rhea_edge_map=pickle.dumps(rhea_edge_map),
-            graph=pickle.dumps(graph),
-        )
+                reactions[id_] = [rhea_id, last_modified_at, None]
+                modified_ids.append(id_)
+
+        Logger.info(f"Creating unicell with {len(reactions)} reactions "
+                    f"({len(reactions) - len(modified_ids)} from cache, {len(modified_ids)} to read) ...")
+        for start in range(0, len(modified_ids), cls.NB_ITEMS_PER_PAGE):
+            ids = modified_ids[start:start + cls.NB_ITEMS_PER_PAGE]
+            for id_, _, equation in cls._iter_reaction_equations(Reaction.select().where(Reaction.id << ids)):
+                reactions[id_][2] = cls._get_compound_pairs(equation, cofactors)
+
+        unicell_graph = UnicellGraph.build((rhea_id, [tuple(pair) for pair in pairs or []])
+                                           for rhea_id, _, pairs in reactions.values())
+
+        os.makedirs(cache_dir, exist_ok=True)
+        unicell_graph.save(graph_path)
+        with open(reactions_path + ".tmp", "wb") as fp:
+            msgpack.pack({"db_version": db_version, "reactions": reactions}, fp, use_bin_type=True)
+        os.replace(reactions_path + ".tmp", reactions_path)
 
         Logger.info("Done!")
 
-        return uni_cell
+        return Unicell.from_unicell_graph(UnicellGraph.load(graph_path))
+
+    # -- G --
+
+    @classmethod
+    def get_cache_root_dir(cls) -> str:
+        """ Returns the directory of the unicell caches """
+        return os.path.join(Settings.get_instance().get_data_dir(), "gws_biota", "unicell_cache")
+
+    @classmethod
+    def _get_cache_dir(cls, tax_id: str, cofactors: set[str]) -> str:
+        cofactor_hash = hashlib.sha256(" ".join(sorted(cofactors)).encode()).hexdigest()[:16]
+        name = f"{tax_id or 'all'}_{cofactor_hash}_v{cls.CACHE_FORMAT_VERSION}"
+        return os.path.join(cls.get_cache_root_dir(), name)
+
+    @classmethod
+    def _get_compound_pairs(cls, equation: dict, cofactors: set[str]) -> list[tuple[str, str]]:
+        """ Returns the (substrate, product) pairs of an equation, without the cofactors """
+        if not equation:
+            return []
+        substrates = [chebi_id for chebi_id in equation.get("substrates", {}) if chebi_id not in cofactors]
+        products = [chebi_id for chebi_id in equation.get("products", {}) if chebi_id not in cofactors]
+        return [(chebi_id_1, chebi_id_2) for chebi_id_1 in substrates for chebi_id_2 in products]
+
+    @classmethod
+    def _get_db_version(cls, query) -> str:
+        """
+        Returns the version of the reactions of a query: their number, their last modification date and a hash of
+        their ids. The hash detects the changes that do not update the modification date, e.g. the bulk updates
+        of the taxa of the reactions (which change the reactions of a taxon), or a rebuild of the reaction table.
+        """
+        from ..reaction.reaction import Reaction
+        count, last_modified_at = query.select(
+            fn.COUNT(Reaction.id), fn.MAX(Reaction.last_modified_at)).order_by().tuples().get()
+        if isinstance(last_modified_at, datetime):
+            last_modified_at = last_modified_at.isoformat()
+        id_hash = hashlib.sha256()
+        for id_, in query.select(Reaction.id).order_by(Reaction.id).tuples().iterator():
+            id_hash.update(str(id_).encode())
+            id_hash.update(b"\0")
+        return f"{count}_{last_modified_at}_{id_hash.hexdigest()[:16]}"
+
+    # -- I --
+
+    @classmethod
+    def _iter_reaction_equations(cls, query):
+        """ Yields the (id, rhea_id, equation) of the reactions of a query """
+        from ..reaction.reaction import Reaction
+        return Reaction.iter_rows([Reaction.id, Reaction.rhea_id], query=query, batch_size=cls.NB_ITEMS_PER_PAGE,
+                                  json_paths={"equation": "data.equation"})
+
+    @classmethod
+    def _iter_reaction_versions(cls, query):
+        """ Yields the (id, rhea_id, last_modified_at) of the reactions of a query """
+        from ..reaction.reaction import Reaction
+        return Reaction.iter_rows([Reaction.id, Reaction.rhea_id, Reaction.last_modified_at], query=query,
+                                  batch_size=cls.NB_ITEMS_PER_PAGE)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import unittest
 
 from gws_biota._helper.brenda import Brenda
@@ -29,3 +30,52 @@ class TestBrenda(unittest.TestCase):
         list_proteins, _ = brenda.parse_all_enzyme_to_dict()
         self.assertEqual(list_proteins[0]["organism"], "Pseudomonas sp.")
         self.assertEqual(list_proteins[6]["ec"], "1.13.11.38")
+
+    def test_parse_cache(self):
+        settings = Settings.get_instance()
+        testdata_path = os.path.join(
+            settings.get_variable("gws_biota", "testdata_dir"), "../test_gws_biota/helper/data/"
+        )
+        main_testdata_path = settings.get_variable("gws_biota", "testdata_dir")
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            brenda = Brenda(
+                brenda_file=os.path.join(testdata_path, "brenda_test.txt"),
+                taxonomy_dir=main_testdata_path,
+                bto_file=os.path.join(main_testdata_path, "bto_test.obo"),
+                chebi_file=os.path.join(main_testdata_path, "chebi_test.obo"),
+                cache_dir=cache_dir,
+            )
+            list_proteins, list_deprecated_ec = brenda.parse_all_enzyme_to_dict()
+            self.assertTrue(os.path.exists(brenda.get_cache_path()))
+
+            # the second parse is read from the cache
+            brenda.parser = None
+            cached_proteins, cached_deprecated_ec = brenda.parse_all_enzyme_to_dict()
+            self.assertIsNone(brenda.parser)
+            self.assertEqual(len(cached_proteins), len(list_proteins))
+            self.assertEqual(len(cached_deprecated_ec), len(list_deprecated_ec))
+            self.assertEqual(cached_proteins[0]["organism"], "Pseudomonas sp.")
+            self.assertEqual(cached_proteins[6]["ec"], "1.13.11.38")
+
+    def test_parallel_parse(self):
+        settings = Settings.get_instance()
+        testdata_path = os.path.join(
+            settings.get_variable("gws_biota", "testdata_dir"), "../test_gws_biota/helper/data/"
+        )
+        main_testdata_path = settings.get_variable("gws_biota", "testdata_dir")
+
+        brenda = Brenda(
+            brenda_file=os.path.join(testdata_path, "brenda_test.txt"),
+            taxonomy_dir=main_testdata_path,
+            bto_file=os.path.join(main_testdata_path, "bto_test.obo"),
+            chebi_file=os.path.join(main_testdata_path, "chebi_test.obo"),
+        )
+        list_proteins, list_deprecated_ec = brenda.parse_all_enzyme_to_dict()
+
+        messages = []
+        parallel_proteins, parallel_deprecated_ec = brenda.parse_all_enzyme_to_dict(
+            num_workers=2, progress_callback=messages.append)
+        self.assertEqual(parallel_proteins, list_proteins)
+        self.assertEqual(parallel_deprecated_ec, list_deprecated_ec)
+        self.assertTrue(len(messages) > 0)
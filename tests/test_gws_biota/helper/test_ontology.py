@@ -42,6 +42,7 @@ class TestOntology(unittest.TestCase):
                 "definition": "A structured controlled vocabulary for the source of an enzyme. It comprises terms of tissues, cell lines, cell types and cell cultures from uni- and multicellular organisms.",
                 "synonyms": [],
                 "ancestors": ["BTO:0000000"],
+                "parents": [],
             },
         )
         self.assertEqual(
@@ -52,6 +53,7 @@ class TestOntology(unittest.TestCase):
                 "definition": "None",
                 "synonyms": [],
                 "ancestors": ["BTO:0000001", "BTO:0000216"],
+                "parents": ["BTO:0000216"],
             },
         )
 
@@ -13,7 +13,9 @@ class TestModel(unittest.TestCase):
         )
 
         list_reactions = Rhea.parse_reaction_from_file(testdata_path, "rhea-reaction.txt")
-        self.assertEqual(len(list_reactions), 12)
+        # the empty block after the last separator is not a reaction
+        self.assertEqual(len(list_reactions), 11)
+        self.assertTrue(all("entry" in reaction for reaction in list_reactions))
         self.assertEqual(list_reactions[0]["entry"], "RHEA:10022")
         self.assertEqual(
             list_reactions[1]["substrates"], ["CHEBI:15377", "CHEBI:57951", "CHEBI:58349"]
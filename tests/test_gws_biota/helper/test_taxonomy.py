@@ -39,3 +39,7 @@ class TestModel(unittest.TestCase):
                 "division": "Unassigned",
             },
         )
+
+        lineages = NCBITaxonomy.get_all_lineages(dict_taxons, ["superkingdom", "genus", "species"])
+        self.assertEqual(lineages["72"], {"genus": "71", "species": "72"})
+        self.assertEqual(lineages["1"], {})
@@ -0,0 +1,29 @@
+import os
+import unittest
+
+from gws_biota._helper.uniprot import Uniprot
+from gws_core import Settings
+
+
+class TestUniprot(unittest.TestCase):
+    def test_parse_fasta(self):
+        settings = Settings.get_instance()
+        file_path = os.path.join(settings.get_variable("gws_biota", "testdata_dir"), "uniprot_sprot.fasta")
+
+        # small blocks: records are split across blocks
+        rows = [row for chunk in Uniprot.read_fasta_chunks(file_path, chunk_size=3, block_size=100)
+                for row in Uniprot.parse_fasta_records(chunk)]
+        self.assertEqual(len(rows), 8)
+        uniprot_id, uniprot_db, uniprot_gene, evidence_score, tax_id, description, sequence = rows[0]
+        self.assertEqual(uniprot_id, "Q6GZX4")
+        self.assertEqual(uniprot_db, "sp")
+        self.assertEqual(uniprot_gene, "001R_FRG3G")
+        self.assertEqual(evidence_score, 4)
+        self.assertEqual(tax_id, "654924")
+        self.assertTrue(description.startswith("sp|Q6GZX4|001R_FRG3G Putative transcription factor 001R"))
+        self.assertTrue(sequence.startswith("MAFSAEDVLKEYDRRRRMEALLLSLYYPNDRKLLDYKEWSPPRVQVECPKAPVEWNNPPSEKGL"))
+        self.assertTrue(sequence.endswith("SFRKIYTDLGWKFTPL"))
+
+        gz_rows = [row for chunk in Uniprot.read_fasta_chunks(file_path + ".gz")
+                   for row in Uniprot.parse_fasta_records(chunk)]
+        self.assertEqual(gz_rows, rows)
@@ -0,0 +1,50 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+from gws_biota.base.protected_base_model import ProtectedBaseModel
+from peewee import CharField, IntegerField, SqliteDatabase
+
+
+class BulkLoadTestTable(ProtectedBaseModel):
+    code = CharField(null=True)
+    count = IntegerField(null=True)
+
+    class Meta:
+        table_name = 'biota_test_bulk_load'
+        is_table = True
+
+
+class TestBulkLoad(unittest.TestCase):
+
+    def test_tsv_values(self):
+        field = SimpleNamespace(db_value=lambda value: value)
+        self.assertEqual(ProtectedBaseModel._to_tsv_value(field, None), "\\N")
+        self.assertEqual(ProtectedBaseModel._to_tsv_value(field, float("nan")), "\\N")
+        self.assertEqual(ProtectedBaseModel._to_tsv_value(field, True), "1")
+        self.assertEqual(ProtectedBaseModel._to_tsv_value(field, 1.5), "1.5")
+        self.assertEqual(ProtectedBaseModel._to_tsv_value(field, "a\tb\nc\\d"), "a\\tb\\nc\\\\d")
+        self.assertEqual(ProtectedBaseModel._to_tsv_value(field, {"name": "x"}), '{"name": "x"}')
+        self.assertEqual(
+            ProtectedBaseModel._to_tsv_value(field, datetime(2024, 1, 2, 3, 4, 5)), "2024-01-02 03:04:05.000000")
+
+    def test_insert_fallback_on_sqlite(self):
+        db = SqliteDatabase(":memory:")
+        with db.bind_ctx([BulkLoadTestTable]):
+            db.create_tables([BulkLoadTestTable])
+
+            rows = [{"code": f"C{i}", "count": i} for i in range(250)]
+            models = [BulkLoadTestTable(code="M1", count=1), BulkLoadTestTable(code="M2")]
+            self.assertEqual(BulkLoadTestTable.bulk_load(rows, batch_size=100), 250)
+            self.assertEqual(BulkLoadTestTable.bulk_load(models, strategy="insert", sort_by_id=True), 2)
+
+            self.assertEqual(BulkLoadTestTable.select().count(), 252)
+            # the defaults are set on the models and saved
+            saved = BulkLoadTestTable.get(BulkLoadTestTable.code == "M2")
+            self.assertEqual(saved.id, models[1].id)
+            self.assertIsNone(saved.count)
+            self.assertIsNotNone(saved.created_at)
+
+            self.assertEqual(BulkLoadTestTable.bulk_load([]), 0)
+            with self.assertRaises(Exception):
+                BulkLoadTestTable.bulk_load(rows, strategy="infile")
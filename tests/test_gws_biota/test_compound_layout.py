@@ -1,3 +1,9 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
 
 from gws_biota.compound.compound_layout import CompoundLayout
 from gws_core import BaseTestCase
@@ -22,3 +28,43 @@ class TestCompoundLayout(BaseTestCase):
             x="0",
             y="0"
         )
+
+    def test_layout_index(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "_layout")
+            shutil.copytree(CompoundLayout.get_db_path(), db_path)
+
+            index = CompoundLayout.load_index(db_path, force=True)
+            self.assertTrue(os.path.exists(CompoundLayout.get_index_path(db_path)))
+            self.assertEqual(index["master_ids"]["CHEBI:7098"], "CHEBI:15682")
+            self.assertEqual(CompoundLayout.load_index(db_path), index)
+
+            # a modified cluster file invalidates the index
+            file_path = os.path.join(db_path, "amino_acid_metabolism", "arginine_and_proline_metabolism.json")
+            with open(file_path, encoding="utf-8") as fp:
+                content = json.load(fp)
+            content["data"]["CHEBI:15682"]["level"] = 3
+            with open(file_path, "w", encoding="utf-8") as fp:
+                json.dump(content, fp)
+            os.utime(file_path, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+            index = CompoundLayout.load_index(db_path)
+            self.assertEqual(index["data"]["CHEBI:15682"]["amino_acid_metabolism"]["level"], 3)
+
+    def test_layout_records_are_not_shared(self):
+        layout = CompoundLayout.get_layout_by_chebi_id("CHEBI:7098")
+        self.assertIsNone(layout["clusters"]["amino_acid_metabolism"]["alt"])
+        layout["clusters"]["amino_acid_metabolism"]["x"] = -1
+
+        layout = CompoundLayout.get_layout_by_chebi_id(["CHEBI:15682"])
+        self.assertNotEqual(layout["clusters"]["amino_acid_metabolism"]["x"], -1)
+        self.assertIn("CHEBI:7098", CompoundLayout.get_alt_chebi_ids("CHEBI:15682")["amino_acid_metabolism"])
+
+        # the public data are plain dict copies, with the alternative chebi ids
+        flat_data = CompoundLayout.get_flat_data()
+        self.assertIsInstance(flat_data["CHEBI:15682"]["amino_acid_metabolism"], dict)
+        self.assertIn("CHEBI:7098", flat_data["CHEBI:15682"]["amino_acid_metabolism"]["alt"])
+        flat_data["CHEBI:15682"]["amino_acid_metabolism"]["x"] = -1
+        self.assertNotEqual(CompoundLayout.get_flat_data()["CHEBI:15682"]["amino_acid_metabolism"]["x"], -1)
+        self.assertEqual(json.loads(json.dumps(CompoundLayout.generate()["CHEBI:15682"])),
+                         CompoundLayout.generate()["CHEBI:15682"])
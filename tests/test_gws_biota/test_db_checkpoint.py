@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+from gws_biota.db.db_checkpoint import DbCheckpoint
+
+
+class TestDbCheckpoint(unittest.TestCase):
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source_file = os.path.join(tmp_dir, "source.txt")
+            with open(source_file, "w", encoding="utf-8") as fp:
+                fp.write("ENTRY       RHEA:10022\n///\n")
+            checkpoint_dir = os.path.join(tmp_dir, "checkpoints")
+
+            calls = []
+            checkpoint = DbCheckpoint("test", [source_file], checkpoint_dir=checkpoint_dir)
+            self.assertFalse(checkpoint.is_resuming)
+            parsed = checkpoint.load_or_parse("terms", lambda: calls.append("parse") or [{"id": "RHEA:10022"}])
+            self.assertEqual(parsed, [{"id": "RHEA:10022"}])
+            self.assertTrue(checkpoint.run_phase("first", lambda: calls.append("first")))
+            with self.assertRaises(ValueError):
+                checkpoint.run_phase("second", lambda: (_ for _ in ()).throw(ValueError("failed")))
+
+            # the rerun skips the parsing and the completed phase
+            checkpoint = DbCheckpoint("test", [source_file], checkpoint_dir=checkpoint_dir)
+            self.assertTrue(checkpoint.is_resuming)
+            parsed = checkpoint.load_or_parse("terms", lambda: calls.append("parse") or [])
+            self.assertEqual(parsed, [{"id": "RHEA:10022"}])
+            self.assertFalse(checkpoint.run_phase("first", lambda: calls.append("first")))
+            self.assertTrue(checkpoint.run_phase("second", lambda: calls.append("second")))
+            checkpoint.complete()
+            self.assertEqual(calls, ["parse", "first", "second"])
+
+            # a completed build is not resumed, but the parsed outputs are kept
+            checkpoint = DbCheckpoint("test", [source_file], checkpoint_dir=checkpoint_dir)
+            self.assertFalse(checkpoint.is_resuming)
+            self.assertEqual(checkpoint.load_or_parse("terms", lambda: []), [{"id": "RHEA:10022"}])
+
+            # a new source file invalidates the checkpoint
+            with open(source_file, "a", encoding="utf-8") as fp:
+                fp.write("ENTRY       RHEA:10023\n///\n")
+            checkpoint = DbCheckpoint("test", [source_file], checkpoint_dir=checkpoint_dir)
+            self.assertEqual(checkpoint.load_or_parse("terms", lambda: []), [])
+            self.assertEqual(len(os.listdir(os.path.join(checkpoint_dir, "test"))), 1)
@@ -1,11 +1,32 @@
 import os
 
-from gws_biota import BTO, DeprecatedEnzyme, Enzyme, EnzymeClass
+from gws_biota import BTO, DeprecatedEnzyme, Enzyme, EnzymeClass, EnzymeKinetics
+from gws_biota.enzyme.enzyme_kinetics_service import EnzymeKineticsService
 from gws_biota.enzyme.enzyme_service import EnzymeService
+from gws_biota.taxonomy.taxonomy import TaxonomyLineage
 from gws_core import BaseTestCase, Settings
 
 
 class TestEnzyme(BaseTestCase):
+    def test_enzyme_kinetics_lookup(self):
+        self.print("Enzyme kinetics lookup with taxonomy fallback")
+
+        # the organism 1001 has a value, the organism 1002 of the same genus 1000 has none
+        enzyme = Enzyme(ec_number="9.9.9.1", tax_id="1001", tax_species="1001", tax_genus="1000")
+        enzyme.set_name("fake enzyme")
+        enzyme.save()
+        EnzymeKinetics(enzyme=enzyme, ec_number="9.9.9.1", tax_id="1001", param="TN",
+                       min_value=2.0, max_value=4.0).save()
+        TaxonomyLineage(tax_id="1002", tax_species="1002", tax_genus="1000").save()
+        DeprecatedEnzyme(ec_number="9.9.9.2", new_ec_number="9.9.9.1").save()
+
+        table = EnzymeKineticsService.lookup_kinetics(
+            [("9.9.9.1", None, "1001"), ("9.9.9.1", None, "1002"), ("9.9.9.2", None, "1002")], param="TN")
+        self.assertEqual(table["value"].tolist(), [3.0, 3.0, 3.0])
+        self.assertEqual(table["rank"].tolist(), ["organism", "genus", "genus"])
+        self.assertEqual(table["matched_tax_id"].tolist(), ["1001", "1000", "1000"])
+        self.assertEqual(table["count"].tolist(), [1, 1, 1])
+
     def test_enzyme_params(self):
         self.print("Enzyme params")
         settings = Settings.get_instance()
@@ -92,6 +113,30 @@ class TestEnzyme(BaseTestCase):
         self.assertEqual(enzyme.get_params("UknownParam")[0].value, None)
         self.assertEqual(enzyme.get_params("UknownParam")[1000].value, None)
 
+        # Kinetic parameters
+        kinetics = EnzymeKinetics.select().where(
+            (EnzymeKinetics.param == "KM") & (EnzymeKinetics.ec_number == "1.4.3.7"))
+        self.assertEqual(len(kinetics), 4)
+        kinetics = EnzymeKinetics.select().where(
+            (EnzymeKinetics.param == "PHO") & (EnzymeKinetics.enzyme == enzyme))
+        self.assertEqual([(k.min_value, k.max_value) for k in kinetics], [(7.0, 7.0)])
+        kinetics = EnzymeKinetics.get((EnzymeKinetics.param == "TN") & (EnzymeKinetics.ec_number == "1.4.3.15"))
+        self.assertEqual(kinetics.min_value, 0.0833)
+        self.assertEqual(kinetics.substrate, "D-glutamate")
+        self.assertEqual(kinetics.refs, [1])
+        self.assertEqual(EnzymeKinetics.parse_value("8.1-8.3"), (8.1, 8.3, None))
+        self.assertEqual(EnzymeKinetics.parse_value("14-20 {orotidine 5'-phosphate}"),
+                         (14.0, 20.0, "orotidine 5'-phosphate"))
+        self.assertIsNone(EnzymeKinetics.parse_value("-999 {more}"))
+
+        # Kinetic parameters lookup
+        table = EnzymeKineticsService.lookup_kinetics(
+            [("1.4.3.15", None, None), ("1.4.3.15", "CHEBI:0", None), ("9.9.9.9", None, None)],
+            param="TN", fallback_to_all_organisms=True)
+        self.assertEqual(table["value"].tolist()[0], 0.0833)
+        self.assertEqual(table["rank"].tolist(), ["all", None, None])
+        self.assertEqual(table["count"].tolist(), [1, 0, 0])
+
         # print(enzyme.get_params_as_json('ST'))
 
         # return
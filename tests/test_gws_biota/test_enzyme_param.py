@@ -0,0 +1,58 @@
+import math
+import unittest
+from types import SimpleNamespace
+
+from gws_biota.enzyme.enzyme_param import Params
+
+DATA = {
+    "TN": [
+        {"data": "0.0833 {D-glutamate}", "refs": [1], "units": "1/s", "value": "0.0833",
+         "substrate": "D-glutamate", "chebi": "CHEBI:15966"},
+        {"data": "14-20 {orotidine 5'-phosphate}", "refs": [1, 2]},
+        {"data": "-999 {more}", "refs": [2]},
+    ],
+    "RT": ["oxidation"],
+    "references": {"1": 4387700, "2": "Urich, K."},
+}
+
+
+class TestEnzymeParam(unittest.TestCase):
+
+    def test_params(self):
+        params = Params("TN", DATA)
+        self.assertEqual(len(params), 3)
+        self.assertIs(params[0], params[0])
+        self.assertEqual([param.min_value for param in params][:2], [0.0833, 14.0])
+        self.assertEqual(params[1].max_value, 20.0)
+        self.assertEqual(params[1].substrate, "orotidine 5'-phosphate")
+        self.assertTrue(math.isnan(params[2].min_value))
+        self.assertIsNone(params[2].substrate)
+        self.assertEqual(params[0].chebi_id, "CHEBI:15966")
+        self.assertIsNone(params[10].value)
+        self.assertEqual(len(params.to_json()), 3)
+        self.assertEqual(Params("RT", DATA)[0].value, "oxidation")
+        self.assertEqual(Params("KM", DATA).to_json(), [])
+
+        # the cached parameters follow the changes of length of the list
+        data = {"RT": ["oxidation"]}
+        rt_params = Params("RT", data)
+        self.assertEqual([param.value for param in rt_params], ["oxidation"])
+        data["RT"].append("reduction")
+        self.assertEqual([param.value for param in rt_params], ["oxidation", "reduction"])
+
+        arrays = params.to_arrays()
+        self.assertEqual(arrays["max_value"].tolist()[:2], [0.0833, 20.0])
+        self.assertEqual(arrays["refs"].tolist(), [[1], [1, 2], [2]])
+        self.assertEqual(arrays["units"].tolist(), ["1/s", None, None])
+
+    def test_from_enzymes(self):
+        enzymes = [
+            SimpleNamespace(id="1", ec_number="1.4.3.15", tax_id="5141", get_params=lambda name: Params(name, DATA)),
+            SimpleNamespace(id="2", ec_number="1.1.1.1", tax_id=None, get_params=lambda name: Params(name, {})),
+        ]
+        table = Params.from_enzymes(enzymes, "TN")
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table["enzyme_id"].tolist(), ["1", "1", "1"])
+        self.assertEqual(table["substrate"].tolist()[:2], ["D-glutamate", "orotidine 5'-phosphate"])
+        self.assertTrue(table["substrate"].isna()[2])
+        self.assertEqual(table["min_value"].dtype.kind, "f")
@@ -14,3 +14,14 @@ class TestGO(BaseTestCase):
             GO.get(GO.go_id == "GO:0000006").get_name(),
             "high-affinity zinc transmembrane transporter activity",
         )
+
+        # transitive closure of the hierarchy
+        term = GO.get(GO.go_id == "GO:0022890")
+        parent = GO.get(GO.go_id == "GO:0000003")
+        self.assertEqual(sorted(go.go_id for go in GO.select_ancestors(term, max_depth=1)),
+                         ["GO:0005385", "GO:0046873"])
+        self.assertEqual(term.ancestors[-1].go_id, "GO:0000001")
+        self.assertEqual(sorted(go.go_id for go in term.parents), ["GO:0005385", "GO:0046873"])
+        self.assertTrue(GO.is_a(term, parent))
+        self.assertFalse(GO.is_a(parent, term))
+        self.assertEqual(len(GO.select_descendants(parent)), 9)
@@ -0,0 +1,38 @@
+import unittest
+
+from gws_biota.base.protected_base_model import ProtectedBaseModel
+from gws_core import JSONField
+from peewee import CharField, IntegerField, SqliteDatabase
+
+
+class IterRowsTestTable(ProtectedBaseModel):
+    code = CharField(null=True)
+    count = IntegerField(null=True)
+    data = JSONField(null=True)
+
+    class Meta:
+        table_name = 'biota_test_iter_rows'
+        is_table = True
+
+
+class TestIterRows(unittest.TestCase):
+
+    def test_iter_rows(self):
+        db = SqliteDatabase(":memory:")
+        with db.bind_ctx([IterRowsTestTable]):
+            db.create_tables([IterRowsTestTable])
+            rows = [{"code": f"C{i}", "count": i, "data": {"equation": {"substrates": [i]}}} for i in range(25)]
+            IterRowsTestTable.bulk_load(rows, strategy="insert")
+
+            # keyset pages of 10 rows: all the rows are read once
+            codes = [code for code, in IterRowsTestTable.iter_rows(["code"], batch_size=10)]
+            self.assertEqual(sorted(codes), sorted(row["code"] for row in rows))
+
+            result = list(IterRowsTestTable.iter_rows(
+                [IterRowsTestTable.code], where=IterRowsTestTable.count < 5, batch_size=2,
+                json_paths={"equation": "data.equation"}, named=True))
+            self.assertEqual(len(result), 5)
+            for row in result:
+                self.assertEqual(row.equation, {"substrates": [int(row.code[1:])]})
+
+            self.assertEqual(list(IterRowsTestTable.iter_rows(["code"], where=IterRowsTestTable.count > 100)), [])
@@ -0,0 +1,37 @@
+import unittest
+from types import SimpleNamespace
+
+from gws_biota.base.natural_key_resolver import NaturalKeyResolver
+from gws_biota.ontology.ontology_closure import OntologyClosure
+
+
+class TestNaturalKeyResolver(unittest.TestCase):
+    def test_resolve_ancestors(self):
+        terms = [
+            SimpleNamespace(id="1", chebi_id="CHEBI:1"),
+            SimpleNamespace(id="2", chebi_id="CHEBI:2"),
+            SimpleNamespace(id="3", chebi_id="CHEBI:3"),
+        ]
+        resolver = NaturalKeyResolver.from_models(terms, "chebi_id")
+        self.assertEqual(len(resolver), 3)
+
+        vals = resolver.resolve_ancestors(
+            "3", "CHEBI:3", ["CHEBI:3", "CHEBI:1", "CHEBI:2", "CHEBI:404"], term_field="compound")
+        self.assertEqual(vals, [
+            {"compound": "3", "ancestor": "1"},
+            {"compound": "3", "ancestor": "2"},
+        ])
+        self.assertEqual(resolver.resolve("CHEBI:405"), None)
+        self.assertEqual(resolver.unresolved, ["CHEBI:404", "CHEBI:405"])
+
+    def test_resolve_closure(self):
+        terms = [SimpleNamespace(id=str(i), go_id=f"GO:{i}") for i in range(1, 4)]
+        resolver = NaturalKeyResolver.from_models(terms, "go_id")
+        closure = OntologyClosure({"GO:1": [], "GO:2": ["GO:1", "GO:404"], "GO:3": ["GO:2"]})
+        vals = resolver.resolve_closure(closure, term_field="go")
+        self.assertEqual(sorted(vals, key=lambda val: (val["go"], val["ancestor"])), [
+            {"go": "2", "ancestor": "1", "depth": 1},
+            {"go": "3", "ancestor": "1", "depth": 2},
+            {"go": "3", "ancestor": "2", "depth": 1},
+        ])
+        self.assertEqual(resolver.unresolved, ["GO:404"])
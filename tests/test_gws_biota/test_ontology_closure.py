@@ -0,0 +1,38 @@
+import unittest
+
+from gws_biota.ontology.ontology_closure import OntologyClosure
+
+PARENTS = {
+    "GO:1": ["GO:1"],
+    "GO:3": ["GO:1"],
+    "GO:6": ["GO:3"],
+    "GO:7": ["GO:3"],
+    "GO:5385": ["GO:7"],
+    "GO:46873": ["GO:5385"],
+    "GO:22890": ["GO:5385", "GO:46873"],
+    "GO:99": ["GO:404"],
+}
+
+
+class TestOntologyClosure(unittest.TestCase):
+
+    def test_closure(self):
+        closure = OntologyClosure(PARENTS)
+        ancestors = closure.get_ancestors()
+        self.assertEqual(ancestors["GO:1"], {})
+        self.assertEqual(ancestors["GO:6"], {"GO:3": 1, "GO:1": 2})
+        # the depth is the length of the shortest path
+        self.assertEqual(ancestors["GO:22890"], {"GO:5385": 1, "GO:46873": 1, "GO:7": 2, "GO:3": 3, "GO:1": 4})
+        # the parents that are not terms are roots
+        self.assertEqual(ancestors["GO:99"], {"GO:404": 1})
+        self.assertEqual(ancestors["GO:404"], {})
+        self.assertEqual(closure.cyclic_terms, [])
+        self.assertEqual(len(list(closure.iter_rows())), sum(len(a) for a in ancestors.values()))
+
+    def test_cycle(self):
+        closure = OntologyClosure({"A": [], "B": ["A", "C"], "C": ["B"], "D": ["C"]})
+        ancestors = closure.get_ancestors()
+        self.assertEqual(closure.cyclic_terms, ["B", "C", "D"])
+        self.assertEqual(ancestors["B"], {"A": 1, "C": 1})
+        self.assertEqual(ancestors["C"], {"B": 1, "A": 2})
+        self.assertEqual(ancestors["D"], {"C": 1, "B": 2, "A": 3})
@@ -29,3 +29,4 @@ class TestPatwhays(BaseTestCase):
         self.assertEqual(p.get_name(), "5-Phosphoribose 1-diphosphate biosynthesis")
         self.assertEqual(len(p.ancestors), 1)
         self.assertEqual(p.ancestors[0].get_name(), "Pentose phosphate pathway")
+        self.assertEqual([parent.get_name() for parent in p.parents], ["Pentose phosphate pathway"])
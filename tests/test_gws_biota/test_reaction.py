@@ -31,3 +31,16 @@ class TestReaction(BaseTestCase):
         print(rxn.ft_tax_ids)
         print(rxn.ft_ec_numbers)
         print(rxn.layout)
+
+        # the prefetched relations are the queried ones
+        reactions = Reaction.prefetch_relations(list(Reaction.select()))
+        for rxn in reactions:
+            self.assertEqual(sorted(c.id for c in rxn.get_substrates()), sorted(c.id for c in rxn.substrates))
+            self.assertEqual(sorted(c.id for c in rxn.get_products()), sorted(c.id for c in rxn.products))
+            self.assertEqual(sorted(e.id for e in rxn.get_enzymes()), sorted(e.id for e in rxn.enzymes))
+
+        # all the instances of a same reaction get the relations
+        rxn_copy = Reaction.get(Reaction.rhea_id == "RHEA:58156")
+        rxn, rxn_copy = Reaction.prefetch_relations([Reaction.get(Reaction.id == rxn_copy.id), rxn_copy])
+        self.assertEqual([c.id for c in rxn.get_substrates()], [c.id for c in rxn_copy.get_substrates()])
+        self.assertEqual(sorted(c.id for c in rxn_copy.get_substrates()), sorted(c.id for c in rxn_copy.substrates))
@@ -0,0 +1,62 @@
+import math
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from gws_biota.reaction.reaction_stoichiometry import ReactionStoichiometry
+
+EQUATIONS = [
+    # 2 H2O2 => 2 H2O + O2
+    ("RHEA:1", {"substrates": {"CHEBI:16240": "2"}, "products": {"CHEBI:15377": "2", "CHEBI:15379": 1}}),
+    # A + H+ = B
+    ("RHEA:2", {"substrates": {"CHEBI:10": 1, "CHEBI:15378": 1}, "products": {"CHEBI:11": 1}}),
+    # n A = B (polymer)
+    ("RHEA:3", {"substrates": {"CHEBI:10": "n"}, "products": {"CHEBI:11": 1}}),
+]
+
+
+class TestReactionStoichiometry(unittest.TestCase):
+
+    def test_balances(self):
+        stoichiometry = ReactionStoichiometry.from_equations(EQUATIONS)
+        self.assertEqual(stoichiometry.nb_reactions, 3)
+        self.assertEqual(stoichiometry.compound_ids,
+                         ["CHEBI:16240", "CHEBI:15377", "CHEBI:15379", "CHEBI:10", "CHEBI:15378", "CHEBI:11"])
+
+        masses = {"CHEBI:16240": 34.0147, "CHEBI:15377": 18.0153, "CHEBI:15379": 31.9988,
+                  "CHEBI:10": 100.0, "CHEBI:15378": 1.00794, "CHEBI:11": 101.00794}
+        charges = {"CHEBI:16240": 0, "CHEBI:15377": 0, "CHEBI:15379": 0,
+                   "CHEBI:10": -1, "CHEBI:15378": 1, "CHEBI:11": None}
+        mass_delta = stoichiometry.dot([masses[c] for c in stoichiometry.compound_ids])
+        charge_delta = stoichiometry.dot([np.nan if charges[c] is None else charges[c]
+                                          for c in stoichiometry.compound_ids])
+
+        self.assertAlmostEqual(mass_delta[0], 0.0, places=3)
+        self.assertAlmostEqual(mass_delta[1], 0.0, places=3)
+        self.assertTrue(math.isnan(mass_delta[2]))
+        self.assertEqual(charge_delta[0], 0.0)
+        # unknown charge
+        self.assertTrue(math.isnan(charge_delta[1]))
+
+    def test_exclude_compounds(self):
+        stoichiometry = ReactionStoichiometry.from_equations(EQUATIONS, exclude_compounds=["CHEBI:15378"])
+        self.assertNotIn("CHEBI:15378", stoichiometry.compound_ids)
+        self.assertEqual(stoichiometry.nb_compounds, 5)
+        self.assertEqual(ReactionStoichiometry.parse_coefficient("2"), 2.0)
+        self.assertTrue(math.isnan(ReactionStoichiometry.parse_coefficient("2n")))
+
+    def test_sparse_matrix(self):
+        stoichiometry = ReactionStoichiometry.from_equations(EQUATIONS[:2])
+        data, indices, indptr = stoichiometry.to_csc_arrays()
+        self.assertEqual(indptr.tolist(), [0, 3, 6])
+        self.assertEqual(indices.tolist(), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(data.tolist(), [-2.0, 2.0, 1.0, -1.0, -1.0, 1.0])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "stoichiometry.npz")
+            stoichiometry.save_npz(path)
+            loaded = ReactionStoichiometry.load_npz(path)
+        self.assertEqual(loaded.compound_ids, stoichiometry.compound_ids)
+        self.assertEqual(loaded.reaction_ids, stoichiometry.reaction_ids)
+        self.assertEqual(loaded.dot(np.ones(6)).tolist(), stoichiometry.dot(np.ones(6)).tolist())
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+from gws_biota.unicell.unicell_graph import UnicellGraph, UnicellGraphView
+
+REACTIONS = [
+    ("RHEA:1", [("CHEBI:1", "CHEBI:2"), ("CHEBI:1", "CHEBI:3")]),
+    ("RHEA:2", [("CHEBI:2", "CHEBI:4")]),
+    ("RHEA:3", [("CHEBI:3", "CHEBI:1")]),
+    ("RHEA:4", []),
+    ("RHEA:5", [("CHEBI:5", "CHEBI:6")]),
+]
+
+
+class TestUnicellGraph(unittest.TestCase):
+
+    def _assert_graph(self, graph: UnicellGraph):
+        self.assertEqual(graph.nb_compounds, 6)
+        self.assertEqual(graph.nb_edges, 4)
+        self.assertEqual(graph.reaction_ids, ["RHEA:1", "RHEA:2", "RHEA:3", "RHEA:4", "RHEA:5"])
+
+        expected = nx.Graph()
+        for rhea_id, pairs in REACTIONS:
+            for chebi_id_1, chebi_id_2 in pairs:
+                expected.add_edge(chebi_id_1, chebi_id_2, rhea_id=rhea_id, dg_prime=1.0)
+        self.assertTrue(nx.utils.graphs_equal(graph.to_networkx(), expected))
+
+        index = graph.get_compound_index
+        path = graph.shortest_path(index("CHEBI:4"), index("CHEBI:3"))
+        self.assertEqual([graph.compound_ids[i] for i in path], ["CHEBI:4", "CHEBI:2", "CHEBI:1", "CHEBI:3"])
+        self.assertIsNone(graph.shortest_path(index("CHEBI:1"), index("CHEBI:5")))
+        neighbors = graph.neighbors_within([index("CHEBI:4")], radius=2)
+        self.assertEqual(sorted(graph.compound_ids[i] for i in neighbors), ["CHEBI:1", "CHEBI:2", "CHEBI:4"])
+
+    def test_build_and_serialize(self):
+        graph = UnicellGraph.build(REACTIONS)
+        self._assert_graph(graph)
+        self._assert_graph(UnicellGraph.from_buffer(graph.to_bytes()))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "unicell.bin")
+            graph.save(path)
+            loaded = UnicellGraph.load(path)
+            self._assert_graph(loaded)
+            # the arrays are views on the memory-mapped file, which is kept as the buffer of the graph
+            self.assertIsNone(graph.buffer)
+            self.assertTrue(np.shares_memory(loaded.indptr, loaded.buffer))
+
+        compound_id_list = list(reversed(graph.compound_ids))
+        legacy = UnicellGraph.from_legacy(
+            [rhea_id for rhea_id, _ in REACTIONS], graph.get_rhea_edge_map(), compound_id_list)
+        self._assert_graph(legacy)
+        self.assertEqual(legacy.compound_ids, compound_id_list)
+
+    def test_view(self):
+        view = UnicellGraphView(UnicellGraph.build(REACTIONS))
+        self.assertTrue("CHEBI:1" in view.nodes)
+        self.assertFalse("CHEBI:7" in view.nodes)
+        self.assertEqual(len(view.edges), 4)
+        # the last reaction overwrites the edge attributes
+        self.assertEqual(view.edges["CHEBI:3", "CHEBI:1"], {"rhea_id": "RHEA:3", "dg_prime": 1.0})
+        self.assertIsNone(view.get_edge_data("CHEBI:1", "CHEBI:4"))
+        self.assertEqual(sorted(view.neighbors("CHEBI:1")), ["CHEBI:2", "CHEBI:3"])
+        subgraph = view.edge_subgraph([("CHEBI:1", "CHEBI:2"), ("CHEBI:5", "CHEBI:6")])
+        self.assertEqual(len(subgraph.nodes), 4)
+        self.assertEqual(subgraph.edges["CHEBI:2", "CHEBI:1"]["rhea_id"], "RHEA:1")
+
+    def test_batch_traversal(self):
+        # random graph compared with networkx
+        rng = np.random.default_rng(0)
+        pairs = rng.integers(0, 300, size=(400, 2))
+        reactions = [(f"RHEA:{i}", [(f"CHEBI:{u}", f"CHEBI:{v}")]) for i, (u, v) in enumerate(pairs)]
+        graph = UnicellGraph.build(reactions)
+        expected = graph.to_networkx()
+        compound_ids = graph.compound_ids
+
+        queries = rng.integers(0, graph.nb_compounds, size=(200, 2)).tolist()
+        connected = graph.batch_are_connected(queries)
+        paths = graph.batch_shortest_paths(queries)
+        for (u, v), is_connected, path in zip(queries, connected, paths):
+            self.assertEqual(is_connected, nx.has_path(expected, compound_ids[u], compound_ids[v]))
+            if is_connected:
+                self.assertEqual(len(path) - 1, nx.shortest_path_length(expected, compound_ids[u], compound_ids[v]))
+                self.assertEqual((path[0], path[-1]), (u, v))
+                for i, j in zip(path, path[1:]):
+                    self.assertGreaterEqual(graph.find_edge(i, j), 0)
+            else:
+                self.assertIsNone(path)
+
+        sources = list(range(0, graph.nb_compounds, 7))
+        for source, neighbors in zip(sources, graph.multi_source_neighbors(sources, radius=2)):
+            ego = nx.ego_graph(expected, compound_ids[source], radius=2)
+            self.assertEqual(sorted(compound_ids[i] for i in neighbors), sorted(ego.nodes))
+
+        edges = graph.incident_edges([0, 1])
+        expected_edges = {frozenset(edge) for edge in expected.edges([compound_ids[0], compound_ids[1]])}
+        self.assertEqual(len(edges), len(expected_edges))
+
+    def test_indexes(self):
+        graph = UnicellGraph.from_buffer(UnicellGraph.build(REACTIONS).to_bytes())
+        self.assertEqual(graph.get_compound_index("CHEBI:4"), 3)
+        self.assertEqual(graph.get_compound_index("CHEBI:7"), -1)
+        self.assertEqual(graph.get_compound_indexes(["CHEBI:2", "CHEBI:7", "CHEBI:6"]).tolist(), [1, -1, 5])
+        self.assertEqual(graph.get_reaction_index("RHEA:4"), 3)
+        self.assertEqual(graph.get_reaction_indexes(["RHEA:9", "RHEA:1"]).tolist(), [-1, 0])
+        self.assertEqual(graph.get_compound_indexes([]).tolist(), [])